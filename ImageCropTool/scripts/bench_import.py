@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 启动耗时基准脚本
+
+多次运行 `main.py --help`，统计启动耗时，并检查是否加载了GDAL/NumPy等重量级模块。
+
+Usage:
+    python scripts/bench_import.py
+    python scripts/bench_import.py -n 20 --importtime
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(PROJECT_DIR, 'main.py')
+
+# --help 路径不应加载的模块
+HEAVY_MODULES = ['osgeo', 'osgeo.gdal', 'numpy', 'tqdm', 'PIL']
+
+# 在子进程中执行 main.py --help，并把已加载的重量级模块输出到 stderr 最后一行
+PROBE_CODE = f'''
+import json, runpy, sys
+sys.argv = [{MAIN_SCRIPT!r}, '--help']
+try:
+    runpy.run_path({MAIN_SCRIPT!r}, run_name='__main__')
+except SystemExit:
+    pass
+sys.stderr.write(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]) + '\\n')
+'''
+
+
+def run_once(importtime: bool = False):
+    """运行一次，返回 (耗时秒数, 已加载的重量级模块, stderr)"""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', PROBE_CODE]
+
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    elapsed = time.perf_counter() - start
+
+    lines = proc.stderr.strip().splitlines()
+    loaded = json.loads(lines[-1]) if lines else []
+    return elapsed, loaded, proc.stderr
+
+
+def top_imports(stderr: str, limit: int = 10):
+    """解析 -X importtime 输出，返回累计耗时最长的模块"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='main.py --help 启动耗时基准')
+    parser.add_argument('-n', '--runs', type=int, default=10, help='运行次数，默认10')
+    parser.add_argument('--importtime', action='store_true', help='显示导入耗时最长的模块')
+    parser.add_argument('--json', help='将结果写入JSON文件')
+    args = parser.parse_args()
+
+    times = []
+    loaded = []
+    for _ in range(args.runs):
+        elapsed, loaded, _ = run_once()
+        times.append(elapsed)
+
+    result = {
+        'runs': args.runs,
+        'median_ms': statistics.median(times) * 1000,
+        'min_ms': min(times) * 1000,
+        'max_ms': max(times) * 1000,
+        'heavy_modules_loaded': loaded,
+    }
+
+    print(f"main.py --help x{args.runs}: "
+          f"median {result['median_ms']:.1f} ms, "
+          f"min {result['min_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+
+    if args.importtime:
+        _, _, stderr = run_once(importtime=True)
+        print("\n导入耗时最长的模块 (累计, us):")
+        for cumulative, name in top_imports(stderr):
+            print(f"  {cumulative:>10}  {name}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    if loaded:
+        print(f"\n[FAIL] --help 加载了重量级模块: {', '.join(loaded)}")
+        return 1
+    print("\n[PASS] --help 未加载GDAL/NumPy")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 裁剪性能基准脚本
+
+按矩阵（尺寸、波段数、数据类型、分块/条带、压缩方式）生成合成影像，
+测量 crop_by_pixel、crop_by_geo、影像信息读取和 GUI 渲染路径的耗时、
+吞吐量（MPix/s、MB/s）与峰值内存，结果写入JSON便于不同版本之间对比。
+
+每个用例在独立子进程中运行，峰值内存互不影响；合成影像按参数缓存，重复运行无需重新生成。
+
+Usage:
+    python scripts/benchmark.py --quick
+    python scripts/benchmark.py --sizes 4096 16384 --bands 1 4 --json result.json
+    python scripts/benchmark.py --json new.json --compare old.json
+    python scripts/benchmark.py --gdal-profiles default low-memory throughput
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'src'))
+
+# 测量的用例
+CASES = ['info', 'crop_pixel', 'crop_geo', 'gui_render']
+
+# 默认矩阵
+DEFAULT_SIZES = [2048, 8192]
+DEFAULT_BANDS = [1, 3]
+DEFAULT_DTYPES = ['Byte', 'UInt16']
+DEFAULT_LAYOUTS = ['tiled', 'striped']
+DEFAULT_COMPRESS = ['NONE', 'DEFLATE']
+
+# 裁剪窗口边长（像素），取影像中心
+DEFAULT_CROP_SIZE = 2048
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存 (MB)，无法获取时返回None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为KB，macOS 单位为字节
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def raster_name(spec):
+    """合成影像的缓存文件名"""
+    return (f"bench_{spec['size']}_{spec['bands']}b_{spec['dtype']}_"
+            f"{spec['layout']}_{spec['compress']}.tif").lower()
+
+
+def generate_raster(path, spec):
+    """流式生成合成影像（渐变叠加噪声，压缩率接近真实影像）"""
+    from image_crop_tool.synthetic import generate_raster as generate
+
+    generate(
+        path + '.tmp', spec['size'], spec['size'], spec['bands'], spec['dtype'],
+        block_size=256 if spec['layout'] == 'tiled' else None,
+        compress=spec['compress'],
+        geotransform=(116.0, 0.0001, 0, 40.0, 0, -0.0001),
+        pattern='mixed',
+        max_value=255 if spec['dtype'] == 'Byte' else 4095,
+    )
+    os.replace(path + '.tmp', path)
+
+
+def ensure_raster(data_dir, spec):
+    """返回合成影像路径，不存在时生成"""
+    path = os.path.join(data_dir, raster_name(spec))
+    if not os.path.exists(path):
+        print(f"  生成 {os.path.basename(path)} ...", flush=True)
+        generate_raster(path, spec)
+    return path
+
+
+def crop_window(size, crop_size):
+    """影像中心的裁剪窗口 (x_off, y_off, x_size, y_size)"""
+    side = min(size, crop_size)
+    off = (size - side) // 2
+    return off, off, side, side
+
+
+def run_case(case, path, crop_size, out_dir):
+    """
+    执行一次用例（在子进程中调用）
+
+    Returns:
+        (处理的像素数, 处理的字节数)
+    """
+    from osgeo import gdal
+    from image_crop_tool.image_io import open_raster, get_raster_info, close_raster
+
+    ds = open_raster(path)
+    size = ds.RasterXSize
+    bands = ds.RasterCount
+    item_size = gdal.GetDataTypeSize(ds.GetRasterBand(1).DataType) // 8
+    close_raster(ds)
+    x_off, y_off, x_size, y_size = crop_window(size, crop_size)
+    pixels = x_size * y_size
+
+    if case == 'info':
+        ds = open_raster(path)
+        get_raster_info(ds)
+        ds.GetRasterBand(1).GetStatistics(True, False)
+        close_raster(ds)
+        return 0, 0
+
+    if case == 'crop_pixel':
+        from image_crop_tool.crop_core import crop_by_pixel
+        crop_by_pixel(path, os.path.join(out_dir, 'crop_pixel.tif'), x_off, y_off, x_size, y_size)
+        return pixels, pixels * bands * item_size
+
+    if case == 'crop_geo':
+        from image_crop_tool.crop_core import crop_by_geo
+        ds = open_raster(path)
+        gt = ds.GetGeoTransform()
+        close_raster(ds)
+        min_x = gt[0] + x_off * gt[1]
+        max_x = gt[0] + (x_off + x_size) * gt[1]
+        max_y = gt[3] + y_off * gt[5]
+        min_y = gt[3] + (y_off + y_size) * gt[5]
+        crop_by_geo(path, os.path.join(out_dir, 'crop_geo.tif'), min_x, min_y, max_x, max_y)
+        return pixels, pixels * bands * item_size
+
+    if case == 'gui_render':
+        # 与 GUI 加载一致：读取显示波段并转为8位，再按适应窗口与 1:1 两种比例渲染
+        import numpy as np
+        from PIL import Image
+        from image_crop_tool.gui import render_region
+
+        ds = open_raster(path)
+        display = [ds.GetRasterBand(i).ReadAsArray() for i in range(1, min(bands, 3) + 1)]
+        close_raster(ds)
+        arr = np.dstack(display) if len(display) == 3 else display[0]
+        if arr.dtype != np.uint8:
+            p2, p98 = np.percentile(arr[::16, ::16], (2, 98))
+            arr = np.clip((arr - p2) / max(p98 - p2, 1) * 255, 0, 255).astype(np.uint8)
+        image = Image.fromarray(arr, mode='RGB' if arr.ndim == 3 else 'L')
+        render_region(image, (0, 0, size, size), min(1.0, 1280 / size))
+        render_region(image, (x_off, y_off, x_off + min(x_size, 1280), y_off + min(y_size, 800)), 1.0)
+        return size * size, arr.nbytes
+
+    raise ValueError(f"未知用例: {case}")
+
+
+def worker_main(args):
+    """子进程入口：执行用例并把结果以JSON输出到 stdout 最后一行"""
+    times = []
+    pixels = nbytes = 0
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pixels, nbytes = run_case(args.case, args.path, args.crop_size, out_dir)
+            times.append(time.perf_counter() - start)
+    print(json.dumps({
+        'times': times,
+        'pixels': pixels,
+        'bytes': nbytes,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+    return 0
+
+
+def measure(case, path, crop_size, repeat, gdal_profile='default'):
+    """在独立子进程中运行用例（通过环境变量选择GDAL运行参数配置），返回结果字典"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', case,
+           '--path', path, '--crop-size', str(crop_size), '--repeat', str(repeat)]
+    env = dict(os.environ, IMAGE_CROP_GDAL_PROFILE=gdal_profile)
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, env=env)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'unknown'}
+
+    raw = json.loads(lines[-1])
+    median = statistics.median(raw['times'])
+    return {
+        'median_s': median,
+        'min_s': min(raw['times']),
+        'max_s': max(raw['times']),
+        'mpix_per_s': raw['pixels'] / median / 1e6 if raw['pixels'] and median else None,
+        'mb_per_s': raw['bytes'] / median / 1024 / 1024 if raw['bytes'] and median else None,
+        'peak_rss_mb': raw['peak_rss_mb'],
+    }
+
+
+def environment():
+    """记录运行环境，便于对比"""
+    env = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    try:
+        from osgeo import gdal
+        env['gdal'] = gdal.__version__
+    except ImportError:
+        env['gdal'] = None
+    try:
+        import numpy as np
+        env['numpy'] = np.__version__
+    except ImportError:
+        env['numpy'] = None
+    try:
+        env['commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True
+        ).stdout.strip() or None
+    except OSError:
+        env['commit'] = None
+    return env
+
+
+def result_key(row):
+    """用于对比的用例标识"""
+    return (row['case'], row['size'], row['bands'], row['dtype'], row['layout'], row['compress'],
+            row.get('gdal_profile', 'default'))
+
+
+def print_comparison(results, baseline_path):
+    """与基线结果对比，打印耗时比例（>1 表示变慢）"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result_key(row): row for row in json.load(f)['results']}
+
+    print(f"\n与基线对比 ({baseline_path})，耗时比例 >1 表示变慢:")
+    for row in results:
+        old = baseline.get(result_key(row))
+        if not old or 'median_s' not in old or 'median_s' not in row:
+            continue
+        ratio = row['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        flag = '  <-- 变慢' if ratio > 1.1 else ''
+        print(f"  {format_label(row):<48} {ratio:6.2f}x{flag}")
+
+
+def format_label(row):
+    profile = row.get('gdal_profile', 'default')
+    return (f"{row['case']:<11} {row['size']:>6} {row['bands']}b {row['dtype']:<7} "
+            f"{row['layout']:<8} {row['compress']:<8}" + ('' if profile == 'default' else f" [{profile}]"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='影像裁剪性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='影像边长（像素）')
+    parser.add_argument('--bands', type=int, nargs='+', default=DEFAULT_BANDS, help='波段数')
+    parser.add_argument('--dtypes', nargs='+', default=DEFAULT_DTYPES, help='数据类型 (Byte/UInt16)')
+    parser.add_argument('--layouts', nargs='+', choices=['tiled', 'striped'], default=DEFAULT_LAYOUTS,
+                        help='存储方式')
+    parser.add_argument('--compress', nargs='+', default=DEFAULT_COMPRESS, help='压缩方式')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES, help='测量的用例')
+    parser.add_argument('--gdal-profiles', nargs='+', default=['default'],
+                        help='对比的GDAL运行参数配置（如 default low-memory throughput）')
+    parser.add_argument('--crop-size', type=int, default=DEFAULT_CROP_SIZE, help='裁剪窗口边长，默认2048')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='每个用例重复次数，默认3')
+    parser.add_argument('--quick', action='store_true', help='小矩阵快速运行（1024/2048，单次）')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'image_crop_bench'),
+                        help='合成影像缓存目录')
+    parser.add_argument('--json', help='将结果写入JSON文件')
+    parser.add_argument('--compare', help='与之前的JSON结果对比')
+    # 子进程内部参数
+    parser.add_argument('--worker', choices=CASES, dest='case', help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        return worker_main(args)
+
+    if args.quick:
+        args.sizes = [1024, 2048]
+        args.repeat = 1
+        args.crop_size = min(args.crop_size, 512)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    matrix = itertools.product(args.sizes, args.bands, args.dtypes, args.layouts, args.compress)
+    for size, bands, dtype, layout, compress in matrix:
+        spec = {'size': size, 'bands': bands, 'dtype': dtype, 'layout': layout, 'compress': compress}
+        path = ensure_raster(args.data_dir, spec)
+        for case, gdal_profile in itertools.product(args.cases, args.gdal_profiles):
+            row = dict(spec, case=case, crop_size=min(size, args.crop_size), gdal_profile=gdal_profile)
+            row.update(measure(case, path, args.crop_size, args.repeat, gdal_profile))
+            results.append(row)
+
+            if 'error' in row:
+                print(f"  {format_label(row):<48} [ERROR] {row['error']}")
+                continue
+            rate = f"{row['mpix_per_s']:8.1f} MPix/s {row['mb_per_s']:8.1f} MB/s" \
+                if row['mpix_per_s'] else ' ' * 30
+            rss = f"{row['peak_rss_mb']:7.0f} MB" if row['peak_rss_mb'] else ''
+            print(f"  {format_label(row):<48} {row['median_s'] * 1000:9.1f} ms {rate} {rss}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\n结果已写入: {args.json}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    return 1 if any('error' in row for row in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,17 +3,32 @@
 """
 影像裁剪小工具 - 测试数据生成脚本
 
-生成多种格式、投影和类型的测试影像。
+生成多种格式、投影和类型的测试影像；也可按行块流式生成数GB的大影像（可并行生成多个）。
+
+Usage:
+    python scripts/generate_test_data.py
+    python scripts/generate_test_data.py --large -o data/large --size 40000 --bands 4 \\
+        --dtype UInt16 --compress ZSTD --count 4
 """
 
+import argparse
 import os
 import sys
-import numpy as np
 
 # 添加项目路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from image_crop_tool.synthetic import generate_raster, generate_rasters, PATTERNS
 
-from osgeo import gdal, osr
+
+# 多样化测试影像: (文件名, 宽, 高, 波段数, 数据类型, 驱动, 坐标系)
+DIVERSE_IMAGES = [
+    ('wgs84_rgb.tif', 500, 400, 3, 'Byte', 'GTiff', 'EPSG:4326'),           # 标准 GeoTIFF (WGS84)
+    ('utm_16bit.tif', 300, 300, 1, 'UInt16', 'GTiff', 'EPSG:32650'),        # UTM 投影 GeoTIFF
+    ('float_dem.tif', 200, 200, 1, 'Float32', 'GTiff', 'EPSG:4326'),        # 浮点型 GeoTIFF
+    ('normal.jpg', 800, 600, 3, 'Byte', 'JPEG', None),                      # JPEG (无地理坐标)
+    ('map.png', 400, 400, 4, 'Byte', 'PNG', None),                          # PNG
+]
 
 
 def create_image(
@@ -21,111 +36,82 @@ def create_image(
     width: int,
     height: int,
     bands: int = 3,
-    dtype: int = gdal.GDT_Byte,
+    dtype: str = 'Byte',
     format: str = 'GTiff',
-    proj_type: str = 'WGS84'
+    crs: str = 'EPSG:4326'
 ):
-    """创建测试影像"""
-    driver = gdal.GetDriverByName(format)
-    # Check if driver supports Create
-    if not driver:
-        print(f"Skipping {format}: Driver not found")
-        return
-
-    # Use MEM driver for creating the dataset first, then copying
-    mem_driver = gdal.GetDriverByName('MEM')
-    ds = mem_driver.Create('', width, height, bands, dtype)
-
-    # 设置投影和地理变换
-    srs = osr.SpatialReference()
-    if proj_type == 'WGS84':
-        srs.ImportFromEPSG(4326)
-        gt = (116.0, 0.001, 0, 40.0, 0, -0.001)
-    elif proj_type == 'UTM':
-        srs.ImportFromEPSG(32650) # UTM Zone 50N
-        gt = (400000, 30, 0, 4400000, 0, -30)
-    else: # Pixel
-        srs = None
-        gt = (0, 1, 0, 0, 0, 1)
-
-    if srs:
-        ds.SetProjection(srs.ExportToWkt())
-    ds.SetGeoTransform(gt)
-
-    # 写入数据
-    for b in range(1, bands + 1):
-        band = ds.GetRasterBand(b)
-        
-        # Determine max value based on dtype
-        max_val = 255
-        if dtype == gdal.GDT_UInt16:
-            max_val = 65535
-        elif dtype == gdal.GDT_Float32:
-            max_val = 1.0
-
-        if dtype == gdal.GDT_Float32:
-            data = np.random.rand(height, width).astype(np.float32)
-        else:
-            data = np.random.randint(0, max_val, (height, width))
-            if dtype == gdal.GDT_Byte:
-                data = data.astype(np.uint8)
-            elif dtype == gdal.GDT_UInt16:
-                data = data.astype(np.uint16)
-        
-        # draw grid
-        if b == 1:
-             grid_val = max_val
-             data[::50, :] = grid_val
-             data[:, ::50] = grid_val
-        
-        band.WriteArray(data)
-    
-    # Save to file
-    driver.CreateCopy(path, ds)
-    
-    ds = None
-    print(f"Generated: {os.path.basename(path)} ({width}x{height}, {format}, {proj_type})")
-
+    """创建测试影像（随机噪声，第1波段带网格线）"""
+    generate_raster(
+        path, width, height, bands, dtype, format,
+        block_size=None, compress=None, crs=crs, pattern='noise', grid=50
+    )
+    print(f"Generated: {os.path.basename(path)} ({width}x{height}, {format}, {crs or 'Pixel'})")
 
-def main():
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    output_dir = os.path.join(base_dir, 'data', 'input', 'diverse')
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
 
+def generate_diverse(output_dir: str):
+    """生成多样化的小测试影像"""
+    os.makedirs(output_dir, exist_ok=True)
     print("Generating diverse test images...")
+    for name, width, height, bands, dtype, driver, crs in DIVERSE_IMAGES:
+        create_image(os.path.join(output_dir, name), width, height, bands, dtype, driver, crs)
+    print("Done!")
 
-    # 1. 标准 GeoTIFF (WGS84)
-    create_image(
-        os.path.join(output_dir, 'wgs84_rgb.tif'),
-        500, 400, 3, gdal.GDT_Byte, 'GTiff', 'WGS84'
-    )
-
-    # 2. UTM 投影 GeoTIFF
-    create_image(
-        os.path.join(output_dir, 'utm_16bit.tif'),
-        300, 300, 1, gdal.GDT_UInt16, 'GTiff', 'UTM'
-    )
 
-    # 3. 浮点型 GeoTIFF
-    create_image(
-        os.path.join(output_dir, 'float_dem.tif'),
-        200, 200, 1, gdal.GDT_Float32, 'GTiff', 'WGS84'
-    )
+def generate_large(args):
+    """流式生成大影像，多个文件并行"""
+    os.makedirs(args.output, exist_ok=True)
+    nodata_regions = None
+    if args.nodata is not None:
+        # 左侧和底部各留一条NoData带，模拟影像边缘
+        band_w = args.size // 10
+        nodata_regions = [(0, 0, band_w, args.size), (0, args.size - band_w, args.size, band_w)]
+
+    jobs = []
+    for i in range(args.count):
+        name = (f"synthetic_{args.size}_{args.bands}b_{args.dtype}_{i:02d}.tif").lower()
+        jobs.append(dict(
+            output_path=os.path.join(args.output, name),
+            width=args.size,
+            height=args.size,
+            bands=args.bands,
+            dtype=args.dtype,
+            block_size=args.block_size or None,
+            compress=args.compress,
+            crs=args.crs,
+            pattern=args.pattern,
+            nodata=args.nodata,
+            nodata_regions=nodata_regions,
+            seed=i,
+        ))
+
+    print(f"Generating {args.count} image(s) of {args.size}x{args.size}x{args.bands} {args.dtype}...")
+    for path in generate_rasters(jobs, args.workers):
+        print(f"Generated: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
 
-    # 4. JPEG (通常无地理坐标，或者通过world file/exif)
-    create_image(
-        os.path.join(output_dir, 'normal.jpg'),
-        800, 600, 3, gdal.GDT_Byte, 'JPEG', 'Pixel'
-    )
 
-    # 5. PNG
-    create_image(
-        os.path.join(output_dir, 'map.png'),
-        400, 400, 4, gdal.GDT_Byte, 'PNG', 'Pixel'
-    )
+def main():
+    parser = argparse.ArgumentParser(description='生成测试影像')
+    parser.add_argument('-o', '--output', help='输出目录，默认 data/input/diverse（--large 时默认 data/input/large）')
+    parser.add_argument('--large', action='store_true', help='流式生成大影像')
+    parser.add_argument('--size', type=int, default=20000, help='影像边长，默认20000')
+    parser.add_argument('--bands', type=int, default=3, help='波段数，默认3')
+    parser.add_argument('--dtype', default='Byte', help='数据类型，默认Byte')
+    parser.add_argument('--block-size', type=int, default=256, help='分块边长，0表示条带存储，默认256')
+    parser.add_argument('--compress', default='DEFLATE', help='压缩方式，默认DEFLATE')
+    parser.add_argument('--crs', default='EPSG:4326', help='坐标系，默认EPSG:4326')
+    parser.add_argument('--pattern', choices=PATTERNS, default='mixed', help='填充方式，默认mixed')
+    parser.add_argument('--nodata', type=float, help='NoData值（指定时在边缘生成NoData区域）')
+    parser.add_argument('--count', type=int, default=1, help='生成文件数，默认1')
+    parser.add_argument('--workers', type=int, help='并行数，默认为CPU核数')
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if args.large:
+        args.output = args.output or os.path.join(base_dir, 'data', 'input', 'large')
+        generate_large(args)
+    else:
+        generate_diverse(args.output or os.path.join(base_dir, 'data', 'input', 'diverse'))
 
-    print("Done!")
 
 if __name__ == '__main__':
     main()
@@ -12,6 +12,11 @@ Modules:
     - image_io: 影像读写模块
     - coord_transform: 坐标转换模块
     - crop_core: 核心裁剪模块
+    - cutline: 多边形裁剪
+    - tiling: 规则网格切片
+    - planning: 裁剪开销估算
+    - batch: 按清单批量裁剪（断点续裁）
+    - vsi: 压缩包与HTTP输入（GDAL虚拟文件系统）
     - cli: 命令行接口
 
 Example:
@@ -26,24 +31,51 @@ Example:
 __version__ = "0.1.0"
 __author__ = "Your Name"
 
-# 导出核心功能
-from .utils import (
-    ImageCropError,
-    FileNotFoundError,
-    InvalidBoundsError,
-    CoordinateTransformError,
-    GDALError,
-    setup_logging,
-    logger
-)
+# 导出核心功能（延迟导入）
+# 子模块在首次访问对应属性时才导入，导入本包不会加载GDAL/NumPy
+_LAZY_EXPORTS = {
+    # 异常类与工具
+    'ImageCropError': 'utils',
+    'FileNotFoundError': 'utils',
+    'InvalidBoundsError': 'utils',
+    'CoordinateTransformError': 'utils',
+    'GDALError': 'utils',
+    'CropCancelledError': 'utils',
+    'CancelToken': 'utils',
+    'setup_logging': 'utils',
+    'logger': 'utils',
+    # 核心功能
+    'crop_raster': 'crop_core',
+    'crop_by_pixel': 'crop_core',
+    'crop_by_geo': 'crop_core',
+    'crop_to_bytes': 'crop_core',
+    'crop_to_array': 'crop_core',
+    'crop_by_cutline': 'cutline',
+    'crop_by_cutlines': 'cutline',
+    'tile_raster': 'tiling',
+    'load_shards': 'tiling',
+    'plan_crop': 'planning',
+    'load_manifest': 'batch',
+    'run_batch': 'batch',
+    # 命令行入口
+    'main': 'cli',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    module = importlib.import_module(f".{module_name}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
 
-from .crop_core import (
-    crop_raster,
-    crop_by_pixel,
-    crop_by_geo
-)
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
-from .cli import main
 
 __all__ = [
     # 版本信息
@@ -55,11 +87,22 @@ __all__ = [
     'InvalidBoundsError',
     'CoordinateTransformError',
     'GDALError',
+    'CropCancelledError',
     # 核心功能
     'crop_raster',
     'crop_by_pixel',
     'crop_by_geo',
+    'crop_to_bytes',
+    'crop_to_array',
+    'crop_by_cutline',
+    'crop_by_cutlines',
+    'tile_raster',
+    'load_shards',
+    'plan_crop',
+    'load_manifest',
+    'run_batch',
     # 工具
+    'CancelToken',
     'setup_logging',
     'logger',
     'main',
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 批量裁剪模块
+
+按清单文件依次执行裁剪任务。每个任务都以断点续裁方式运行（见 resume 模块），
+中断后重新运行同一清单时，已完成的任务直接跳过，未完成的任务从中断的行块继续。
+
+清单文件为 JSON 数组或 JSON Lines，每个任务:
+    {"input": "scene.tif", "output": "out/a.tif", "bounds": [100, 100, 500, 500],
+     "type": "pixel", "format": "GTiff", "bands": [3, 2, 1], "trim": false}
+
+type/format/bands/trim 可省略；相对路径相对于清单文件所在目录，输入也可以是 HTTP(S) URL。
+输入为压缩包时可用 "member" 指定成员（路径或通配符）。
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from .utils import logger, is_url, ImageCropError, CancelToken, CropCancelledError
+from .crop_core import crop_raster
+from .metrics import CropMetrics, append_metrics_record
+from .resume import output_complete
+from .vsi import resolve_input_path
+
+
+# 任务回调: job_callback(序号, 任务, 状态)，状态为 'done'、'skipped' 或 'failed'
+JobCallback = Callable[[int, Dict[str, Any], str], None]
+
+# 任务字段
+REQUIRED_FIELDS = ('input', 'output', 'bounds')
+OPTIONAL_FIELDS = ('type', 'format', 'bands', 'trim', 'member')
+
+
+def load_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """
+    读取任务清单
+
+    Args:
+        manifest_path: 清单文件路径（JSON 数组或 JSON Lines）
+
+    Returns:
+        任务列表
+
+    Raises:
+        ImageCropError: 文件无法读取或任务字段无效
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if text.lstrip().startswith('['):
+            jobs = json.loads(text)
+        else:
+            jobs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except (OSError, ValueError) as e:
+        raise ImageCropError(f"无法读取任务清单 {manifest_path}: {e}")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    for index, job in enumerate(jobs, start=1):
+        if not isinstance(job, dict):
+            raise ImageCropError(f"任务 {index} 格式无效")
+        missing = [k for k in REQUIRED_FIELDS if k not in job]
+        if missing:
+            raise ImageCropError(f"任务 {index} 缺少字段: {', '.join(missing)}")
+        unknown = [k for k in job if k not in REQUIRED_FIELDS + OPTIONAL_FIELDS]
+        if unknown:
+            raise ImageCropError(f"任务 {index} 包含未知字段: {', '.join(unknown)}")
+        if len(job['bounds']) != 4:
+            raise ImageCropError(f"任务 {index} 的 bounds 需要4个值")
+        for key in ('input', 'output'):
+            if not is_url(job[key]):
+                job[key] = os.path.join(base_dir, job[key])
+    return jobs
+
+
+def plan_batch(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    估算各任务的开销（不读取像素、不写出文件），供调度器分配工作节点
+
+    Args:
+        jobs: 任务列表（字段同清单文件）
+
+    Returns:
+        每个任务一个字典: CropPlan 的字段，加上 input、output 和 complete（是否已完成，
+        重新运行时会跳过）
+    """
+    from .planning import plan_crop
+
+    plans = []
+    for job in jobs:
+        plan = plan_crop(
+            resolve_input_path(job['input'], job.get('member')), tuple(job['bounds']),
+            coord_type=job.get('type', 'pixel'),
+            output_format=job.get('format', 'GTiff'),
+            bands=job.get('bands')
+        )
+        plans.append(dict(plan.to_dict(), input=job['input'], output=job['output'],
+                          complete=output_complete(job['output'])))
+    return plans
+
+
+def run_batch(
+    jobs: List[Dict[str, Any]],
+    force: bool = False,
+    stop_on_error: bool = False,
+    cancel_token: Optional[CancelToken] = None,
+    job_callback: Optional[JobCallback] = None,
+    metrics_path: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    依次执行裁剪任务
+
+    输出文件已存在且没有续裁日志的任务视为已完成，直接跳过。
+
+    Args:
+        jobs: 任务列表（字段同清单文件）
+        force: 是否重新裁剪已完成的任务
+        stop_on_error: 任务失败时是否停止（默认记录后继续下一个任务）
+        cancel_token: 取消令牌，取消时当前任务保留续裁日志
+        job_callback: 每个任务结束时的回调
+        metrics_path: 统计记录文件（JSON Lines），每个执行的任务追加一行（含失败、取消的任务），
+            None表示不记录
+
+    Returns:
+        {'done': 完成数, 'skipped': 跳过数, 'failed': 失败数}
+
+    Raises:
+        CropCancelledError: 批量任务被取消
+        ImageCropError: stop_on_error 时任务失败
+    """
+    summary = {'done': 0, 'skipped': 0, 'failed': 0}
+    for index, job in enumerate(jobs, start=1):
+        if not force and output_complete(job['output']):
+            logger.info(f"[{index}/{len(jobs)}] 已完成，跳过: {job['output']}")
+            status = 'skipped'
+        else:
+            logger.info(f"[{index}/{len(jobs)}] 裁剪: {job['input']} -> {job['output']}")
+            metrics = CropMetrics()
+            status, error = 'failed', None
+            try:
+                crop_raster(
+                    resolve_input_path(job['input'], job.get('member')),
+                    job['output'], tuple(job['bounds']),
+                    coord_type=job.get('type', 'pixel'),
+                    output_format=job.get('format', 'GTiff'),
+                    cancel_token=cancel_token,
+                    trim_nodata=job.get('trim', False),
+                    bands=job.get('bands'),
+                    resume=True,
+                    metrics=metrics
+                )
+                status = 'done'
+            except CropCancelledError as e:
+                error = str(e)
+                raise
+            except (ImageCropError, ValueError) as e:
+                error = str(e)
+                if stop_on_error:
+                    raise
+                logger.error(f"[{index}/{len(jobs)}] 失败: {e}")
+            except BaseException as e:
+                error = str(e) or type(e).__name__
+                raise
+            finally:
+                if metrics_path:
+                    append_metrics_record(metrics_path, dict(
+                        metrics.finish(), job=index, input=job['input'], output=job['output'],
+                        success=status == 'done', error=error))
+
+        summary[status] += 1
+        if job_callback:
+            job_callback(index, job, status)
+    return summary
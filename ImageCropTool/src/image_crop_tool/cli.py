@@ -7,12 +7,20 @@
 """
 
 import argparse
+import json
 import sys
 from typing import List, Optional
 
+# 仅导入轻量模块；GDAL/NumPy 相关模块在实际执行时再导入，
+# 使 --help 与参数错误无需加载GDAL
 from .utils import logger, setup_logging, ImageCropError
-from .crop_core import crop_raster
-from .image_io import open_raster, get_raster_info, close_raster
+
+# --member 的帮助文本
+MEMBER_HELP = '输入为压缩包时要读取的成员路径或通配符（如 "*_B4.TIF"），默认选择包内唯一的影像文件'
+
+# --gdal-profile 的帮助文本
+GDAL_PROFILE_HELP = ('GDAL运行参数配置: default、low-memory、interactive、throughput 或配置文件中的自定义配置，'
+                     '也可通过环境变量 IMAGE_CROP_GDAL_PROFILE 指定')
 
 
 def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
@@ -37,16 +45,62 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
   按地理坐标裁剪:
     python main.py -i input.tif -o output.tif -b 116.0 40.0 117.0 39.0 -t geo
     
+  只输出部分波段 (按给定顺序):
+    python main.py -i input.tif -o rgb.tif -b 100 100 500 500 --bands 4 3 2
+    
+  输出各阶段耗时分解:
+    python main.py -i input.tif -o output.tif -b 100 100 500 500 --profile
+    
+  转换为8位 (2%-98%百分位拉伸):
+    python main.py -i input.tif -o out8.tif -b 100 100 500 500 --dtype Byte --scale percentile
+    
+  估算裁剪开销 (涉及的数据块、解码量、输出大小、内存峰值)，不读取像素、不写出文件:
+    python main.py -i input.tif -b 116.0 40.0 117.0 39.0 -t geo --plan
+    python main.py -i input.tif -b 0 0 20000 20000 --plan json
+    
+  大影像断点续裁 (中断后以相同参数再次运行即从中断处继续):
+    python main.py -i huge.tif -o output.tif -b 0 0 200000 150000 --resume
+    
   查看影像信息:
     python main.py -i input.tif --info
+    
+  直接从压缩包裁剪，无需解压 (包内有多个影像时用 --member 选择，支持通配符):
+    python main.py -i LC08_L2SP.tar.gz --member "*_SR_B4.TIF" -o b4.tif -b 0 0 1024 1024
+    python main.py -i /vsizip//data/scene.zip/scene/image.tif -o out.tif -b 0 0 1024 1024
+    
+  直接从HTTP服务器上的COG裁剪，只下载裁剪范围涉及的数据块 (服务器须支持 Range 请求):
+    python main.py -i https://data.example.com/cog/scene.tif -o out.tif -b 0 0 1024 1024
+    
+  使用大缓存、多线程的GDAL配置裁剪，或查看生效的配置:
+    python main.py -i input.tif -o output.tif -b 100 100 500 500 --gdal-profile throughput
+    python main.py --gdal-profile throughput --print-config
+    
+  启动常驻裁剪服务 (详见 python main.py serve --help):
+    python main.py serve --socket /tmp/image_crop_tool.sock --port 8765
+    
+  按多边形裁剪 (详见 python main.py cutline --help):
+    python main.py cutline -i input.tif -c fields.shp -o field.tif
+    
+  按规则网格切片 (详见 python main.py tile --help):
+    python main.py tile -i input.tif -o chips/ --size 512 --stride 256
+    
+  启动本地瓦片服务 (详见 python main.py tileserver --help):
+    python main.py tileserver -i input.tif --port 8080
+    
+  按清单批量裁剪，跳过已完成的任务 (详见 python main.py batch --help):
+    python main.py batch jobs.jsonl
 '''
     )
     
     # 必需参数
     parser.add_argument(
         '-i', '--input',
-        required=True,
-        help='输入影像路径'
+        help='输入影像路径；可为压缩包（.zip、.tar、.tar.gz、.tgz、.gz）、HTTP(S) URL 或GDAL虚拟路径（/vsizip/、/vsicurl/ 等）'
+    )
+    
+    parser.add_argument(
+        '--member',
+        help=MEMBER_HELP
     )
     
     # 可选参数
@@ -76,6 +130,81 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         help='输出格式，默认GTiff。支持: GTiff, JPEG, PNG等'
     )
     
+    parser.add_argument(
+        '--bands',
+        nargs='+',
+        type=int,
+        metavar='N',
+        help='输出波段（从1开始，按给定顺序），如 --bands 4 3 2；默认全部波段'
+    )
+    
+    parser.add_argument(
+        '--dtype',
+        help='输出数据类型（Byte、UInt16、Int16、UInt32、Int32、Float32、Float64），默认与源影像相同'
+    )
+    
+    parser.add_argument(
+        '--scale',
+        choices=['none', 'linear', 'percentile'],
+        default='none',
+        help='转换数据类型时的缩放方式: none(仅截断) linear(最小/最大值拉伸) percentile(百分位拉伸)，默认none'
+    )
+    
+    parser.add_argument(
+        '--scale-range',
+        nargs=2,
+        type=float,
+        metavar=('MIN', 'MAX'),
+        help='按指定的源数据范围线性拉伸'
+    )
+    
+    parser.add_argument(
+        '--percentiles',
+        nargs=2,
+        type=float,
+        default=[2.0, 98.0],
+        metavar=('LOW', 'HIGH'),
+        help='percentile 模式的百分位，默认 2 98'
+    )
+    
+    parser.add_argument(
+        '--out-nodata',
+        type=float,
+        help='转换后的NoData值，默认源影像有NoData时整数类型为0、浮点类型为NaN'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='裁剪结束后输出各阶段耗时分解和I/O统计'
+    )
+    
+    parser.add_argument(
+        '--metrics-json',
+        metavar='FILE',
+        help='将各阶段耗时和I/O计数追加写入JSON文件（每次运行一行，失败时含错误信息，便于批量汇总）'
+    )
+    
+    parser.add_argument(
+        '--trim',
+        action='store_true',
+        help='将裁剪范围收缩到有效像素（非NoData）的外接矩形'
+    )
+    
+    parser.add_argument(
+        '--plan',
+        nargs='?',
+        const='text',
+        choices=['text', 'json'],
+        help='只估算裁剪开销（涉及的源数据块、解码/读取字节数、输出大小、内存峰值）并输出，不读取像素、不写出文件'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='断点续裁: 记录已完成的行块（输出旁的 .journal 文件），中断或取消后再次运行从中断处继续'
+    )
+    
     parser.add_argument(
         '--info',
         action='store_true',
@@ -94,11 +223,28 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         help='静默模式，只显示错误'
     )
     
+    parser.add_argument(
+        '--gdal-profile',
+        help=GDAL_PROFILE_HELP
+    )
+    
+    parser.add_argument(
+        '--print-config',
+        action='store_true',
+        help='显示生效的GDAL运行参数（缓存、线程数、VSI缓存等）后退出'
+    )
+    
     parsed = parser.parse_args(args)
     
     # 验证参数
+    if parsed.print_config:
+        return parsed
+    if not parsed.input:
+        parser.error("需要指定输入影像路径 (-i/--input)")
+    if not parsed.dtype and (parsed.scale != 'none' or parsed.scale_range):
+        parser.error("--scale/--scale-range 需要同时指定 --dtype")
     if not parsed.info:
-        if not parsed.output:
+        if not parsed.output and not parsed.plan:
             parser.error("裁剪模式需要指定输出路径 (-o/--output)")
         if not parsed.bounds:
             parser.error("裁剪模式需要指定裁剪范围 (-b/--bounds)")
@@ -113,9 +259,9 @@ def show_raster_info(input_path: str) -> None:
     Args:
         input_path: 输入影像路径
     """
-    ds = None
-    try:
-        ds = open_raster(input_path)
+    from .image_io import opened_raster, get_raster_info
+    
+    with opened_raster(input_path) as ds:
         info = get_raster_info(ds)
         gt = ds.GetGeoTransform()
         
@@ -155,10 +301,498 @@ def show_raster_info(input_path: str) -> None:
             print(f"投影信息: {info['projection'][:100]}...")
         
         print("=" * 50 + "\n")
-        
+
+
+def configure_logging(parsed: argparse.Namespace) -> None:
+    """
+    根据 -v/-q 参数配置日志级别
+    
+    Args:
+        parsed: 解析后的参数对象
+    """
+    import logging
+    if parsed.quiet:
+        setup_logging(logging.ERROR)
+    elif parsed.verbose:
+        setup_logging(logging.DEBUG)
+    else:
+        setup_logging(logging.INFO)
+
+
+def resolve_input(parsed: argparse.Namespace) -> bool:
+    """
+    将URL和压缩包输入（按 --member 选择成员）解析为GDAL虚拟路径（结果写回 parsed.input）
+    
+    Args:
+        parsed: 解析后的参数对象
+    
+    Returns:
+        输入是否有效
+    """
+    from .vsi import resolve_input_path
+    try:
+        parsed.input = resolve_input_path(parsed.input, parsed.member)
+        return True
+    except ImageCropError as e:
+        logger.error(str(e))
+        return False
+
+
+def configure_gdal_profile(parsed: argparse.Namespace) -> bool:
+    """
+    根据 --gdal-profile 参数选择GDAL运行参数配置（GDAL在首次使用时才加载）
+    
+    Args:
+        parsed: 解析后的参数对象
+    
+    Returns:
+        配置是否有效
+    """
+    from .gdal_profiles import select_gdal_profile
+    try:
+        select_gdal_profile(parsed.gdal_profile)
+        return True
+    except ImageCropError as e:
+        logger.error(str(e))
+        return False
+
+
+def parse_serve_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 serve 子命令参数
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog='image_crop_tool serve',
+        description='启动常驻裁剪服务，通过 Unix socket 或本地 HTTP 接收裁剪任务',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+示例:
+  python main.py serve --socket /tmp/image_crop_tool.sock
+  python main.py serve --port 8765 --workers 8 --cache-mb 2048
+
+  curl -X POST http://127.0.0.1:8765/crop -o out.tif \\
+       -d '{"input": "input.tif", "bounds": [100, 100, 500, 500]}'
+'''
+    )
+    parser.add_argument('--socket', help='Unix socket 路径')
+    parser.add_argument('--host', default='127.0.0.1', help='HTTP 监听地址，默认127.0.0.1')
+    parser.add_argument('--port', type=int, help='HTTP 端口')
+    parser.add_argument('--workers', type=int, help='工作线程数，默认CPU核数')
+    parser.add_argument('--cache-mb', type=int, help='GDAL块缓存大小（MB），所有任务共享')
+    parser.add_argument('--output-root',
+                        help='任务 output 允许写入的目录，相对路径相对于该目录解析，默认当前目录')
+    parser.add_argument('-v', '--verbose', action='store_true', help='显示详细信息')
+    parser.add_argument('-q', '--quiet', action='store_true', help='静默模式，只显示错误')
+    parser.add_argument('--gdal-profile', help=GDAL_PROFILE_HELP)
+    
+    parsed = parser.parse_args(args)
+    if not parsed.socket and parsed.port is None:
+        parser.error("请至少指定 --socket 或 --port")
+    return parsed
+
+
+def serve_main(args: Optional[List[str]] = None) -> int:
+    """
+    serve 子命令入口
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        退出码
+    """
+    parsed = parse_serve_args(args)
+    configure_logging(parsed)
+    if not configure_gdal_profile(parsed):
+        return 1
+    
+    from .server import run_server
+    
+    try:
+        run_server(
+            socket_path=parsed.socket,
+            host=parsed.host,
+            port=parsed.port,
+            workers=parsed.workers,
+            cache_mb=parsed.cache_mb,
+            output_root=parsed.output_root
+        )
+        return 0
+    except ImageCropError as e:
+        logger.error(f"服务错误: {e}")
+        return 1
+    except KeyboardInterrupt:
+        logger.info("服务已停止")
+        return 0
+
+
+def parse_cutline_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 cutline 子命令参数
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog='image_crop_tool cutline',
+        description='按多边形裁剪影像，多边形外的像素写为NoData或透明',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+示例:
+  所有多边形合并为一个输出:
+    python main.py cutline -i scene.tif -c fields.shp -o fields.tif
+    python main.py cutline -i scene.tif -c "POLYGON((116.1 39.9, 116.3 39.9, 116.2 39.7, 116.1 39.9))" -o out.tif
+    
+  每个多边形分别输出 (-o 为目录):
+    python main.py cutline -i scene.tif -c fields.gpkg --layer parcels --where "area > 1000" \\
+           --split -o parcels/ --name "{stem}_{parcel_id}" --mask alpha
+
+文件名模板可用字段: {stem} {index} {fid} 及要素属性名
+'''
+    )
+    parser.add_argument('-i', '--input', required=True, help='输入影像路径（可为压缩包、HTTP(S) URL 或GDAL虚拟路径）')
+    parser.add_argument('--member', help=MEMBER_HELP)
+    parser.add_argument('-c', '--cutline', required=True,
+                        help='多边形: WKT、GeoJSON 字符串或矢量文件路径')
+    parser.add_argument('-o', '--output', required=True,
+                        help='输出影像路径；--split 时为输出目录')
+    parser.add_argument('--layer', help='矢量文件图层名，默认第一个图层')
+    parser.add_argument('--where', help='属性过滤条件 (OGR SQL)')
+    parser.add_argument('--cutline-srs',
+                        help='多边形坐标系 (如 EPSG:4326)；默认矢量文件使用图层坐标系，字符串与影像相同')
+    parser.add_argument('--split', action='store_true', help='每个多边形分别输出')
+    parser.add_argument('--name', default='{stem}_{index:04d}',
+                        help='--split 时的文件名模板（不含扩展名），默认 {stem}_{index:04d}')
+    parser.add_argument('--mask', choices=['nodata', 'alpha'], default='nodata',
+                        help='多边形外像素: nodata(写为NoData) 或 alpha(追加Alpha波段)，默认nodata')
+    parser.add_argument('--nodata', type=float, help='NoData值，默认使用源影像NoData，未设置时为0')
+    parser.add_argument('--all-touched', action='store_true', help='包含所有与多边形接触的像素')
+    parser.add_argument('-f', '--format', default='GTiff', help='输出格式，默认GTiff')
+    parser.add_argument('-v', '--verbose', action='store_true', help='显示详细信息')
+    parser.add_argument('-q', '--quiet', action='store_true', help='静默模式，只显示错误')
+    parser.add_argument('--gdal-profile', help=GDAL_PROFILE_HELP)
+    return parser.parse_args(args)
+
+
+def cutline_main(args: Optional[List[str]] = None) -> int:
+    """
+    cutline 子命令入口
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        退出码
+    """
+    parsed = parse_cutline_args(args)
+    configure_logging(parsed)
+    if not configure_gdal_profile(parsed):
+        return 1
+    if not resolve_input(parsed):
+        return 1
+    
+    from .cutline import crop_by_cutline, crop_by_cutlines
+    
+    options = dict(
+        layer=parsed.layer,
+        where=parsed.where,
+        cutline_srs=parsed.cutline_srs,
+        mask_mode=parsed.mask,
+        nodata=parsed.nodata,
+        output_format=parsed.format,
+        all_touched=parsed.all_touched
+    )
+    
+    try:
+        if parsed.split:
+            crop_by_cutlines(parsed.input, parsed.output, parsed.cutline,
+                             name_template=parsed.name, **options)
+        else:
+            crop_by_cutline(parsed.input, parsed.output, parsed.cutline, **options)
+        logger.info("裁剪完成！")
+        return 0
+    except (ImageCropError, ValueError) as e:
+        logger.error(f"裁剪错误: {e}")
+        return 1
+    except KeyboardInterrupt:
+        logger.info("用户中断")
+        return 130
+
+
+def parse_tile_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 tile 子命令参数
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog='image_crop_tool tile',
+        description='将影像按规则网格切分为多个切片',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+示例:
+  python main.py tile -i scene.tif -o chips/ --size 512
+  python main.py tile -i scene.tif -o chips/ --size 512 --stride 384 --edge drop \\
+         --name "{row}/{stem}_{col}" --index chips/index.geojson
+  python main.py tile -i scene.tif -o chips/ --size 256 -f npy --shard-size 1024
+
+文件名模板可用字段: {stem} {index} {row} {col} {x} {y}
+'''
+    )
+    parser.add_argument('-i', '--input', required=True, help='输入影像路径（可为压缩包、HTTP(S) URL 或GDAL虚拟路径）')
+    parser.add_argument('--member', help=MEMBER_HELP)
+    parser.add_argument('-o', '--output', required=True, help='输出目录')
+    parser.add_argument('-s', '--size', type=int, required=True, help='切片尺寸（像素）')
+    parser.add_argument('--stride', type=int, help='步长（像素），默认等于切片尺寸；小于尺寸时切片重叠')
+    parser.add_argument('--edge', choices=['pad', 'drop'], default='pad',
+                        help='边缘切片: pad(用NoData或0填充) 或 drop(丢弃)，默认pad')
+    parser.add_argument('-f', '--format', default='GTiff',
+                        help='输出格式，默认GTiff；npy/npz 表示写入 NumPy 分片并生成 {stem}_index.json')
+    parser.add_argument('--shard-size', type=int, default=256,
+                        help='NumPy 分片包含的切片数，默认256')
+    parser.add_argument('--name', default='{stem}_r{row:04d}_c{col:04d}',
+                        help='文件名模板（不含扩展名），默认 {stem}_r{row:04d}_c{col:04d}')
+    parser.add_argument('--index', help='索引文件路径（.csv 或 .geojson）')
+    parser.add_argument('--skip-empty', action='store_true', help='跳过没有有效像素（全为NoData）的切片')
+    parser.add_argument('--workers', type=int, help='写出线程数，默认CPU核数')
+    parser.add_argument('-v', '--verbose', action='store_true', help='显示详细信息')
+    parser.add_argument('-q', '--quiet', action='store_true', help='静默模式，只显示错误')
+    parser.add_argument('--gdal-profile', help=GDAL_PROFILE_HELP)
+    return parser.parse_args(args)
+
+
+def tile_main(args: Optional[List[str]] = None) -> int:
+    """
+    tile 子命令入口
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        退出码
+    """
+    parsed = parse_tile_args(args)
+    configure_logging(parsed)
+    if not configure_gdal_profile(parsed):
+        return 1
+    if not resolve_input(parsed):
+        return 1
+    
+    from tqdm import tqdm
+    from .tiling import tile_raster
+    
+    progress_bar = tqdm(total=0, unit='块', desc='切片', disable=parsed.quiet)
+    
+    def on_progress(done: int, total: int) -> None:
+        progress_bar.total = total
+        progress_bar.update(done - progress_bar.n)
+    
+    try:
+        tile_raster(
+            parsed.input,
+            parsed.output,
+            parsed.size,
+            stride=parsed.stride,
+            edge=parsed.edge,
+            output_format=parsed.format,
+            name_template=parsed.name,
+            index_path=parsed.index,
+            workers=parsed.workers,
+            progress_callback=on_progress,
+            shard_size=parsed.shard_size,
+            skip_empty=parsed.skip_empty
+        )
+        return 0
+    except (ImageCropError, ValueError) as e:
+        logger.error(f"切片错误: {e}")
+        return 1
+    except KeyboardInterrupt:
+        logger.info("用户中断")
+        return 130
     finally:
-        if ds:
-            close_raster(ds)
+        progress_bar.close()
+
+
+def parse_tileserver_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 tileserver 子命令参数
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog='image_crop_tool tileserver',
+        description='启动本地 XYZ 瓦片服务，供 Web 客户端浏览影像',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+示例:
+  python main.py tileserver -i scene.tif --port 8080
+  python main.py tileserver -i a.tif -i b.tif --cache-dir data/tile_cache
+
+  瓦片地址: http://127.0.0.1:8080/scene/{z}/{x}/{y}.png  (也支持 .jpg/.webp)
+  TileJSON: http://127.0.0.1:8080/scene.json
+'''
+    )
+    parser.add_argument('-i', '--input', action='append', required=True,
+                        help='发布的影像路径，可重复指定；以文件名（不含扩展名）作为影像名称')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址，默认127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080, help='端口，默认8080')
+    parser.add_argument('--cache-dir', help='瓦片磁盘缓存目录，默认不使用磁盘缓存')
+    parser.add_argument('--memory-cache-mb', type=int, default=256,
+                        help='瓦片内存缓存大小（MB），默认256')
+    parser.add_argument('-v', '--verbose', action='store_true', help='显示详细信息')
+    parser.add_argument('-q', '--quiet', action='store_true', help='静默模式，只显示错误')
+    parser.add_argument('--gdal-profile', help=GDAL_PROFILE_HELP)
+    return parser.parse_args(args)
+
+
+def tileserver_main(args: Optional[List[str]] = None) -> int:
+    """
+    tileserver 子命令入口
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        退出码
+    """
+    import os
+    
+    parsed = parse_tileserver_args(args)
+    configure_logging(parsed)
+    if not configure_gdal_profile(parsed):
+        return 1
+    
+    # 影像名称取文件名，重名时追加序号
+    inputs = {}
+    for path in parsed.input:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name in inputs:
+            n += 1
+            name = f"{stem}_{n}"
+        inputs[name] = path
+    
+    from .tile_server import run_tile_server
+    
+    try:
+        run_tile_server(
+            inputs,
+            host=parsed.host,
+            port=parsed.port,
+            cache_dir=parsed.cache_dir,
+            memory_cache_mb=parsed.memory_cache_mb
+        )
+        return 0
+    except ImageCropError as e:
+        logger.error(f"服务错误: {e}")
+        return 1
+    except KeyboardInterrupt:
+        logger.info("服务已停止")
+        return 0
+
+
+def parse_batch_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析 batch 子命令参数
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        解析后的参数对象
+    """
+    parser = argparse.ArgumentParser(
+        prog='image_crop_tool batch',
+        description='按清单批量裁剪；每个任务可断点续裁，重新运行时跳过已完成的任务',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+清单文件 (JSON 数组或每行一个任务的 JSON Lines，相对路径相对于清单所在目录):
+  {"input": "scene.tif", "output": "out/a.tif", "bounds": [100, 100, 500, 500]}
+  {"input": "scene.tif", "output": "out/b.tif", "bounds": [116.0, 40.0, 117.0, 39.0], "type": "geo",
+   "bands": [3, 2, 1], "trim": true, "format": "GTiff"}
+
+示例:
+  python main.py batch jobs.jsonl
+  python main.py batch jobs.json --force --stop-on-error
+  python main.py batch jobs.jsonl --plan > plans.jsonl
+  python main.py batch jobs.jsonl --metrics-json metrics.jsonl
+'''
+    )
+    parser.add_argument('manifest', help='任务清单文件')
+    parser.add_argument('--force', action='store_true', help='重新裁剪已完成的任务')
+    parser.add_argument('--stop-on-error', action='store_true', help='任务失败时停止，默认继续下一个任务')
+    parser.add_argument('--plan', action='store_true',
+                        help='只估算各任务的开销，每个任务输出一行JSON，不读取像素、不写出文件')
+    parser.add_argument('--metrics-json', metavar='FILE',
+                        help='将每个任务的耗时和I/O计数追加写入JSON文件（每个任务一行，含失败的任务）')
+    parser.add_argument('-v', '--verbose', action='store_true', help='显示详细信息')
+    parser.add_argument('-q', '--quiet', action='store_true', help='静默模式，只显示错误')
+    parser.add_argument('--gdal-profile', help=GDAL_PROFILE_HELP)
+    return parser.parse_args(args)
+
+
+def batch_main(args: Optional[List[str]] = None) -> int:
+    """
+    batch 子命令入口
+    
+    Args:
+        args: 命令行参数列表（不含子命令名）
+    
+    Returns:
+        退出码：有任务失败时为1
+    """
+    parsed = parse_batch_args(args)
+    configure_logging(parsed)
+    if not configure_gdal_profile(parsed):
+        return 1
+    
+    from .batch import load_manifest, plan_batch, run_batch
+    
+    try:
+        jobs = load_manifest(parsed.manifest)
+        if parsed.plan:
+            for plan in plan_batch(jobs):
+                print(json.dumps(plan, ensure_ascii=False))
+            return 0
+        summary = run_batch(jobs, force=parsed.force, stop_on_error=parsed.stop_on_error,
+                            metrics_path=parsed.metrics_json)
+    except ImageCropError as e:
+        logger.error(f"批量裁剪错误: {e}")
+        return 1
+    except KeyboardInterrupt:
+        logger.info("用户中断，再次运行同一清单即可继续")
+        return 130
+    
+    logger.info(f"批量裁剪结束: 完成 {summary['done']}，跳过 {summary['skipped']}，"
+                f"失败 {summary['failed']}")
+    return 1 if summary['failed'] else 0
+
+
+# 子命令名 -> 入口函数；不带子命令时为裁剪/信息模式
+SUBCOMMANDS = {
+    'serve': serve_main,
+    'cutline': cutline_main,
+    'tile': tile_main,
+    'tileserver': tileserver_main,
+    'batch': batch_main,
+}
 
 
 def main(args: Optional[List[str]] = None) -> int:
@@ -171,18 +805,28 @@ def main(args: Optional[List[str]] = None) -> int:
     Returns:
         退出码：0表示成功，非0表示失败
     """
+    if args is None:
+        args = sys.argv[1:]
+    if args and args[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[args[0]](args[1:])
+    
     try:
         # 解析参数
         parsed = parse_args(args)
         
         # 配置日志级别
-        import logging
-        if parsed.quiet:
-            setup_logging(logging.ERROR)
-        elif parsed.verbose:
-            setup_logging(logging.DEBUG)
-        else:
-            setup_logging(logging.INFO)
+        configure_logging(parsed)
+        if not configure_gdal_profile(parsed):
+            return 1
+        
+        # 显示生效的GDAL配置
+        if parsed.print_config:
+            from .gdal_profiles import format_config
+            print(format_config())
+            return 0
+        
+        if not resolve_input(parsed):
+            return 1
         
         # 显示信息模式
         if parsed.info:
@@ -190,19 +834,73 @@ def main(args: Optional[List[str]] = None) -> int:
             return 0
         
         # 裁剪模式
+        from tqdm import tqdm
+        from .crop_core import crop_raster
+        from .metrics import CropMetrics, append_metrics_record
+        
+        metrics = CropMetrics()
+        convert = None
+        if parsed.dtype:
+            from .scaling import DtypeConversion
+            convert = DtypeConversion(
+                parsed.dtype,
+                scale=parsed.scale,
+                scale_range=parsed.scale_range,
+                percentiles=parsed.percentiles,
+                nodata=parsed.out_nodata
+            )
+        
+        # 估算模式
+        if parsed.plan:
+            from .planning import plan_crop, format_plan
+            plan = plan_crop(parsed.input, tuple(parsed.bounds), parsed.type, parsed.format,
+                             parsed.bands, convert)
+            print(json.dumps(plan.to_dict()) if parsed.plan == 'json' else format_plan(plan))
+            return 0
+        
         logger.info("开始裁剪影像...")
         logger.info(f"输入: {parsed.input}")
         logger.info(f"输出: {parsed.output}")
         logger.info(f"范围: {parsed.bounds}")
         logger.info(f"坐标类型: {parsed.type}")
         
-        success = crop_raster(
-            input_path=parsed.input,
-            output_path=parsed.output,
-            bounds=tuple(parsed.bounds),
-            coord_type=parsed.type,
-            output_format=parsed.format
-        )
+        # 进度条（静默模式下不显示）
+        progress_bar = tqdm(total=0, unit='块', desc='裁剪', disable=parsed.quiet)
+        
+        def on_progress(done: int, total: int) -> None:
+            progress_bar.total = total
+            progress_bar.update(done - progress_bar.n)
+        
+        # 失败的裁剪同样写出统计记录（success=false 并附错误信息）
+        success = False
+        error = None
+        try:
+            success = crop_raster(
+                input_path=parsed.input,
+                output_path=parsed.output,
+                bounds=tuple(parsed.bounds),
+                coord_type=parsed.type,
+                output_format=parsed.format,
+                progress_callback=on_progress,
+                trim_nodata=parsed.trim,
+                bands=parsed.bands,
+                convert=convert,
+                metrics=metrics,
+                resume=parsed.resume
+            )
+        except BaseException as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            progress_bar.close()
+            summary = metrics.finish()
+            if parsed.metrics_json:
+                append_metrics_record(parsed.metrics_json, dict(
+                    summary, input=parsed.input, output=parsed.output,
+                    success=bool(success), error=error))
+        
+        if parsed.profile:
+            print("\n" + metrics.format_report())
         
         if success:
             logger.info("裁剪完成！")
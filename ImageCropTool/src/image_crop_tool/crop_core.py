@@ -6,59 +6,356 @@
 提供影像裁剪的核心功能实现。
 """
 
-from typing import Tuple, Optional, Union, List
+import math
+import uuid
+from typing import Tuple, Optional, Union, List, Callable, Sequence
 from osgeo import gdal
+import numpy as np
 
 from .utils import (
-    logger, validate_pixel_bounds, InvalidBoundsError, GDALError
+    logger, validate_pixel_bounds, ImageCropError, InvalidBoundsError, GDALError,
+    CancelToken, CropCancelledError
 )
 from .image_io import (
     open_raster, get_raster_info, create_raster,
-    read_band_data, write_band_data, close_raster
+    read_band_data, write_band_data, close_raster, delete_raster,
+    read_vsi_file, copy_band_metadata, map_raster, opened_raster, raster_closing
 )
 from .coord_transform import (
     get_geotransform, geo_bounds_to_pixel_bounds, calculate_crop_geotransform
 )
+from .scaling import DtypeConversion
+from .metrics import CropMetrics, count_blocks
+from .resume import CropJournal, chunk_crc, source_signature
+from .vsi import is_network_path, prefetch_window
 
 
-def crop_by_pixel(
-    input_path: str,
+# 进度回调: progress_callback(已完成块数, 总块数)
+ProgressCallback = Callable[[int, int], None]
+
+# 每次读写的数据块大小上限（字节）
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# 查找有效数据范围时，粗略扫描掩膜的最大边长（像素）
+TRIM_SCAN_SIZE = 1024
+
+# 精确定位有效数据边界时每次读取的行/列数
+TRIM_REFINE_STEP = 256
+
+# 输出格式对应的文件扩展名（内存文件命名用）
+FORMAT_EXTENSIONS = {
+    'GTiff': '.tif',
+    'PNG': '.png',
+    'JPEG': '.jpg',
+}
+
+
+def resolve_pixel_window(
+    src_ds: gdal.Dataset,
+    bounds: Tuple[float, float, float, float],
+    coord_type: str = 'pixel'
+) -> Tuple[int, int, int, int]:
+    """
+    将裁剪范围解析为校验后的像素窗口
+    
+    Args:
+        src_ds: 源数据集
+        bounds: 裁剪范围
+            - pixel模式: (x_off, y_off, x_size, y_size)
+            - geo模式: (min_x, min_y, max_x, max_y)
+        coord_type: 坐标类型，'pixel' 或 'geo'
+    
+    Returns:
+        (x_off, y_off, x_size, y_size) 像素窗口
+    
+    Raises:
+        InvalidBoundsError: 裁剪范围无效
+        ValueError: 坐标类型不支持
+    """
+    width = src_ds.RasterXSize
+    height = src_ds.RasterYSize
+    
+    if coord_type.lower() == 'pixel':
+        window = tuple(int(b) for b in bounds)
+    elif coord_type.lower() == 'geo':
+        min_x, min_y, max_x, max_y = [float(b) for b in bounds]
+        window = geo_bounds_to_pixel_bounds(
+            get_geotransform(src_ds), min_x, min_y, max_x, max_y, width, height
+        )
+    else:
+        raise ValueError(f"不支持的坐标类型: {coord_type}，请使用 'pixel' 或 'geo'")
+    
+    return validate_pixel_bounds(window, width, height)
+
+
+def resolve_bands(src_ds: gdal.Dataset, bands: Optional[Sequence[int]] = None) -> List[int]:
+    """
+    校验波段列表
+    
+    Args:
+        src_ds: 源数据集
+        bands: 波段号列表（从1开始，可重复、可改变顺序），None表示全部波段
+    
+    Returns:
+        波段号列表
+    
+    Raises:
+        ImageCropError: 波段号超出范围或列表为空
+    """
+    count = src_ds.RasterCount
+    if bands is None:
+        return list(range(1, count + 1))
+    
+    bands = [int(b) for b in bands]
+    if not bands:
+        raise ImageCropError("波段列表不能为空")
+    invalid = [b for b in bands if not 1 <= b <= count]
+    if invalid:
+        raise ImageCropError(f"波段号超出范围 1-{count}: {invalid}")
+    return bands
+
+
+def _scan_valid_edge(
+    mask: gdal.Band,
+    x_off: int,
+    y_off: int,
+    x_size: int,
+    y_size: int,
+    axis: int,
+    reverse: bool
+) -> Optional[int]:
+    """
+    在全分辨率掩膜上从一侧逐块扫描，返回第一个含有效像素的行（axis=0）或列（axis=1）
+    
+    Returns:
+        相对于窗口的行/列号，窗口内没有有效像素时返回None
+    """
+    length = y_size if axis == 0 else x_size
+    chunks = [(s, min(TRIM_REFINE_STEP, length - s)) for s in range(0, length, TRIM_REFINE_STEP)]
+    if reverse:
+        chunks.reverse()
+    
+    for start, count in chunks:
+        if axis == 0:
+            arr = mask.ReadAsArray(x_off, y_off + start, x_size, count)
+        else:
+            arr = mask.ReadAsArray(x_off + start, y_off, count, y_size)
+        hits = np.flatnonzero(arr.any(axis=1 - axis))
+        if hits.size:
+            return start + int(hits[-1] if reverse else hits[0])
+    return None
+
+
+def find_valid_extent(
+    src_ds: gdal.Dataset,
+    x_off: int,
+    y_off: int,
+    x_size: int,
+    y_size: int,
+    band_index: int = 1
+) -> Optional[Tuple[int, int, int, int]]:
+    """
+    查找窗口内有效像素（指定波段的掩膜）的外接矩形
+    
+    先以降采样平均方式读取掩膜（有概视图时GDAL自动使用），确定大致范围；
+    再在全分辨率掩膜上从四边向内扫描，只读取边界附近的少量行列。
+    不读取全分辨率的影像数据。
+    
+    Args:
+        src_ds: 源数据集
+        x_off: 窗口X偏移
+        y_off: 窗口Y偏移
+        x_size: 窗口宽度
+        y_size: 窗口高度
+        band_index: 按哪个波段的掩膜判断（默认第一个波段）
+    
+    Returns:
+        有效像素的外接矩形 (x_off, y_off, x_size, y_size)，没有有效像素时返回None
+    """
+    band = src_ds.GetRasterBand(band_index)
+    if band.GetMaskFlags() & gdal.GMF_ALL_VALID:
+        return x_off, y_off, x_size, y_size
+    mask = band.GetMaskBand()
+    
+    # 粗扫: 每个单元取平均值（浮点），单元内任一有效像素即大于0
+    factor = max(1, math.ceil(max(x_size, y_size) / TRIM_SCAN_SIZE))
+    if factor > 1:
+        buf_w = math.ceil(x_size / factor)
+        buf_h = math.ceil(y_size / factor)
+        coarse = mask.ReadAsArray(x_off, y_off, x_size, y_size,
+                                  buf_xsize=buf_w, buf_ysize=buf_h,
+                                  buf_type=gdal.GDT_Float32,
+                                  resample_alg=gdal.GRIORA_Average)
+        rows = np.flatnonzero(coarse.any(axis=1))
+        cols = np.flatnonzero(coarse.any(axis=0))
+        if not rows.size:
+            return None
+        # 单元映射回源像素并各向外扩一个单元，避免概视图取样误差
+        sx, sy = x_size / buf_w, y_size / buf_h
+        cx0 = max(0, int((cols[0] - 1) * sx))
+        cy0 = max(0, int((rows[0] - 1) * sy))
+        cx1 = min(x_size, math.ceil((cols[-1] + 2) * sx))
+        cy1 = min(y_size, math.ceil((rows[-1] + 2) * sy))
+        x_off, y_off, x_size, y_size = x_off + cx0, y_off + cy0, cx1 - cx0, cy1 - cy0
+    
+    # 精扫: 全分辨率掩膜上从四边向内定位
+    top = _scan_valid_edge(mask, x_off, y_off, x_size, y_size, axis=0, reverse=False)
+    if top is None:
+        return None
+    bottom = _scan_valid_edge(mask, x_off, y_off, x_size, y_size, axis=0, reverse=True)
+    y_off, y_size = y_off + top, bottom - top + 1
+    left = _scan_valid_edge(mask, x_off, y_off, x_size, y_size, axis=1, reverse=False)
+    right = _scan_valid_edge(mask, x_off, y_off, x_size, y_size, axis=1, reverse=True)
+    return x_off + left, y_off, right - left + 1, y_size
+
+
+def plan_row_chunks(
+    dataset: gdal.Dataset,
+    x_size: int,
+    y_size: int,
+    chunk_bytes: int = CHUNK_BYTES
+) -> List[Tuple[int, int]]:
+    """
+    将裁剪窗口按行划分为数据块
+    
+    每块的行数按源影像的块高度对齐，并使单块数据量不超过 chunk_bytes。
+    
+    Args:
+        dataset: 源数据集
+        x_size: 裁剪宽度
+        y_size: 裁剪高度
+        chunk_bytes: 单块数据量上限（字节）
+    
+    Returns:
+        [(行偏移, 行数), ...]，行偏移相对于裁剪窗口
+    """
+    band = dataset.GetRasterBand(1)
+    block_h = band.GetBlockSize()[1]
+    row_bytes = x_size * gdal.GetDataTypeSize(band.DataType) // 8
+    
+    rows = max(1, chunk_bytes // max(1, row_bytes))
+    if rows >= block_h:
+        rows = rows // block_h * block_h
+    
+    return [(row, min(rows, y_size - row)) for row in range(0, y_size, rows)]
+
+
+def _open_partial_output(
+    journal: CropJournal,
+    chunks: List[Tuple[int, int]],
+    x_size: int,
+    y_size: int,
+    band_count: int,
+    dtype: int
+) -> Optional[gdal.Dataset]:
+    """
+    以更新模式打开上次中断的输出文件
+    
+    日志有效且输出尺寸、波段数、数据类型一致时才续裁。最后记录的行块读回校验CRC，
+    不一致时重新裁剪该行块。
+    
+    Returns:
+        输出数据集，不能续裁时返回None
+    """
+    if not journal.load():
+        return None
+    try:
+        dst_ds = open_raster(journal.output_path, gdal.GA_Update)
+    except ImageCropError as e:
+        logger.warning(f"无法打开未完成的输出，重新裁剪: {e}")
+        return None
+    
+    shape = (dst_ds.RasterXSize, dst_ds.RasterYSize, dst_ds.RasterCount)
+    if shape != (x_size, y_size, band_count) or dst_ds.GetRasterBand(1).DataType != dtype:
+        logger.warning(f"未完成的输出与本次参数不一致，重新裁剪: {journal.output_path}")
+        close_raster(dst_ds)
+        return None
+    
+    if journal.last:
+        band, row = journal.last
+        rows = dict(chunks)[row]
+        data = read_band_data(dst_ds, band, 0, row, x_size, rows)
+        if chunk_crc(data) != journal.completed[journal.last]:
+            logger.warning(f"行块校验失败，重新裁剪: 波段 {band}, 行 {row}")
+            journal.discard(journal.last)
+    
+    journal.reopen()
+    logger.info(f"断点续裁: 已完成 {len(journal.completed)}/{len(chunks) * band_count} 个行块")
+    return dst_ds
+
+
+def crop_dataset(
+    src_ds: gdal.Dataset,
     output_path: str,
     x_off: int,
     y_off: int,
     x_size: int,
     y_size: int,
-    output_format: str = 'GTiff'
+    output_format: str = 'GTiff',
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancelToken] = None,
+    trim_nodata: bool = False,
+    bands: Optional[Sequence[int]] = None,
+    convert: Optional[DtypeConversion] = None,
+    metrics: Optional[CropMetrics] = None,
+    resume: bool = False
 ) -> bool:
     """
-    按像素坐标裁剪影像
+    从已打开的数据集按像素坐标裁剪
+    
+    数据按波段、按行块读写，每完成一块调用一次 progress_callback，
+    并在块之间检查 cancel_token。取消时删除未完成的输出文件。
+    源数据集由调用方负责关闭，便于复用已打开的数据集。
+    指定 bands 时只读取所选波段，按给定顺序写出，并保留各波段的
+    NoData值、描述和颜色解释。指定 convert 时逐块转换数据类型。
+    指定 metrics 时记录各阶段耗时和读写字节数、源数据块数等计数。
+    未压缩的原始布局源影像通过内存映射读取，行块直接以视图交给GDAL写出，不经过块缓存复制。
+    网络影像在读取每个行块前预取其涉及的数据块，合并为尽量少的范围请求。
+    指定 resume 时在输出旁写续裁日志（见 resume 模块），每个行块刷新落盘后记录；
+    中断或取消后以相同参数再次调用，从未完成的行块继续，完成并校验后删除日志。
     
     Args:
-        input_path: 输入影像路径
-        output_path: 输出影像路径
+        src_ds: 源数据集
+        output_path: 输出影像路径（可为 /vsimem/ 等GDAL虚拟路径）
         x_off: X方向偏移（像素，左上角列号）
         y_off: Y方向偏移（像素，左上角行号）
         x_size: 裁剪宽度（像素）
         y_size: 裁剪高度（像素）
         output_format: 输出格式（默认GeoTIFF）
+        progress_callback: 进度回调 (已完成块数, 总块数)
+        cancel_token: 取消令牌
+        trim_nodata: 是否将裁剪范围收缩到有效像素的外接矩形
+        bands: 输出波段列表（从1开始），None表示全部波段
+        convert: 输出数据类型转换设置，None表示保持源数据类型
+        metrics: 计时与I/O统计，None表示不统计
+        resume: 是否断点续裁（输出须为本地文件，驱动须支持更新模式）
     
     Returns:
         是否成功
     
     Raises:
-        InvalidBoundsError: 裁剪范围无效
+        InvalidBoundsError: 裁剪范围无效，或收缩时范围内没有有效像素
+        ImageCropError: 波段号无效，或续裁校验失败
         GDALError: GDAL操作失败
+        CropCancelledError: 裁剪被取消
     """
-    src_ds = None
     dst_ds = None
+    mapped = None
+    journal = None
+    if metrics is None:
+        metrics = CropMetrics()
     
     try:
-        # 打开源影像
-        src_ds = open_raster(input_path)
-        src_info = get_raster_info(src_ds)
+        with metrics.stage('metadata'):
+            src_info = get_raster_info(src_ds)
+            band_list = resolve_bands(src_ds, bands)
+            mapped = map_raster(src_ds)
+            prefetch = mapped is None and is_network_path(src_ds.GetDescription())
         
         logger.info(f"源影像: {src_info['width']}x{src_info['height']}, "
                     f"{src_info['bands']}波段")
+        if bands is not None:
+            logger.info(f"输出波段: {band_list}")
         
         # 验证并校正裁剪边界
         bounds = validate_pixel_bounds(
@@ -68,6 +365,15 @@ def crop_by_pixel(
         )
         x_off, y_off, x_size, y_size = bounds
         
+        if trim_nodata:
+            with metrics.stage('trim'):
+                valid = find_valid_extent(src_ds, x_off, y_off, x_size, y_size, band_list[0])
+            if valid is None:
+                raise InvalidBoundsError("裁剪范围内没有有效像素")
+            if valid != bounds:
+                logger.info(f"收缩到有效数据范围: ({x_off}, {y_off}, {x_size}, {y_size}) -> {valid}")
+            x_off, y_off, x_size, y_size = valid
+        
         logger.info(f"裁剪范围: 起点({x_off}, {y_off}), 尺寸({x_size}, {y_size})")
         
         # 获取源影像的地理变换参数
@@ -76,45 +382,229 @@ def crop_by_pixel(
         # 计算裁剪后的地理变换参数
         dst_gt = calculate_crop_geotransform(src_gt, x_off, y_off)
         
+        # 数据类型转换参数（统计基于降采样读取，裁剪时逐块应用）
+        scalers = None
+        if convert:
+            with metrics.stage('stats'):
+                scalers = convert.build_scalers(src_ds, band_list, (x_off, y_off, x_size, y_size))
+            logger.info(f"输出数据类型: {gdal.GetDataTypeName(convert.gdal_dtype)}, 缩放: {convert.scale}")
+        
+        dst_dtype = convert.gdal_dtype if convert else src_info['dtype']
+        chunks = plan_row_chunks(src_ds, x_size, y_size)
+        
+        # 断点续裁: 参数一致时打开上次未完成的输出
+        if resume:
+            journal = CropJournal(output_path, {
+                'source': source_signature(src_ds),
+                'window': [x_off, y_off, x_size, y_size],
+                'bands': band_list,
+                'dtype': gdal.GetDataTypeName(dst_dtype),
+                'format': output_format,
+                'chunk_rows': chunks[0][1],
+                'scale': [s.src_range for s in scalers] if scalers else None,
+            })
+            with metrics.stage('open'):
+                dst_ds = _open_partial_output(journal, chunks, x_size, y_size,
+                                              len(band_list), dst_dtype)
+            if dst_ds is None:
+                # 先写日志再创建输出，输出文件存在而没有日志即表示已完成
+                journal.start()
+        
         # 创建目标影像
-        dst_ds = create_raster(
-            output_path=output_path,
-            width=x_size,
-            height=y_size,
-            bands=src_info['bands'],
-            dtype=src_info['dtype'],
-            driver_name=output_format,
-            geotransform=dst_gt,
-            projection=src_info['projection'],
-            nodata=src_info['nodata']
-        )
+        if dst_ds is None:
+            with metrics.stage('create'):
+                dst_ds = create_raster(
+                    output_path=output_path,
+                    width=x_size,
+                    height=y_size,
+                    bands=len(band_list),
+                    dtype=dst_dtype,
+                    driver_name=output_format,
+                    geotransform=dst_gt,
+                    projection=src_info['projection']
+                )
+                
+                # 逐波段复制NoData值、描述和颜色解释
+                for dst_idx, src_idx in enumerate(band_list, start=1):
+                    dst_band = dst_ds.GetRasterBand(dst_idx)
+                    copy_band_metadata(src_ds.GetRasterBand(src_idx), dst_band)
+                    if scalers:
+                        # 转换后NoData值可能改变
+                        dst_nodata = scalers[dst_idx - 1].dst_nodata
+                        if dst_nodata is not None:
+                            dst_band.SetNoDataValue(dst_nodata)
+                        elif dst_band.GetNoDataValue() is not None:
+                            dst_band.DeleteNoDataValue()
         
-        # 逐波段读写数据
-        for band_idx in range(1, src_info['bands'] + 1):
-            logger.debug(f"处理波段 {band_idx}/{src_info['bands']}")
-            
-            # 读取源数据
-            data = read_band_data(src_ds, band_idx, x_off, y_off, x_size, y_size)
+        # 逐波段、逐行块读写数据
+        total = len(chunks) * len(band_list)
+        done = 0
+        
+        for dst_idx, band_idx in enumerate(band_list, start=1):
+            logger.debug(f"处理波段 {band_idx} -> {dst_idx}/{len(band_list)}")
             
-            # 写入目标数据
-            write_band_data(dst_ds, band_idx, data)
+            for row, rows in chunks:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                
+                # 续裁时跳过已完成的行块
+                if journal and (dst_idx, row) in journal.completed:
+                    metrics.count(chunks_skipped=1)
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
+                    continue
+                
+                # 网络影像: 一次请求该行块涉及的全部数据块
+                if prefetch:
+                    with metrics.stage('prefetch', band=band_idx, row=row, rows=rows):
+                        prefetch_window(src_ds, x_off, y_off + row, x_size, rows, [band_idx])
+                
+                # 读取源数据
+                with metrics.stage('read', band=band_idx, row=row, rows=rows):
+                    if mapped:
+                        data = mapped.window(band_idx, x_off, y_off + row, x_size, rows)
+                    else:
+                        data = read_band_data(src_ds, band_idx, x_off, y_off + row, x_size, rows)
+                if mapped:
+                    metrics.count(bytes_mapped=data.nbytes, chunks=1)
+                else:
+                    metrics.count(
+                        bytes_read=data.nbytes, chunks=1,
+                        blocks_read=count_blocks(src_ds.GetRasterBand(band_idx),
+                                                 x_off, y_off + row, x_size, rows)
+                    )
+                if scalers:
+                    with metrics.stage('convert', band=band_idx, row=row, rows=rows):
+                        data = scalers[dst_idx - 1].apply(data)
+                
+                # 写入目标数据（缓存换出的块在此压缩写出）
+                with metrics.stage('write', band=dst_idx, row=row, rows=rows):
+                    write_band_data(dst_ds, dst_idx, data, 0, row)
+                metrics.count(bytes_written=data.nbytes)
+                metrics.sample_gdal_cache()
+                
+                # 行块刷新落盘后再记录，中断后从下一个行块继续
+                if journal:
+                    with metrics.stage('flush', band=dst_idx, row=row, rows=rows):
+                        dst_ds.FlushCache()
+                    journal.record(dst_idx, row, chunk_crc(data))
+                
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+        
+        # 刷新缓存（剩余块在此压缩写出）
+        with metrics.stage('flush'):
+            dst_ds.FlushCache()
+        with metrics.stage('close'):
+            close_raster(dst_ds)
+            dst_ds = None
+        
+        stat = gdal.VSIStatL(output_path)
+        if stat is not None:
+            metrics.count(output_file_bytes=stat.size)
         
-        # 刷新缓存
-        dst_ds.FlushCache()
+        if journal:
+            journal.finish(
+                [(b, row) for b in range(1, len(band_list) + 1) for row, _ in chunks],
+                x_size, y_size, len(band_list)
+            )
         
         logger.info(f"裁剪完成: {output_path}")
         return True
     
+    except CropCancelledError:
+        logger.info(f"裁剪已取消: {output_path}")
+        if journal:
+            # 保留未完成的输出和日志，以相同参数再次运行即可继续
+            logger.info(f"已保留未完成的输出，可续裁: {output_path}")
+        elif dst_ds:
+            # 删除未完成的输出文件
+            close_raster(dst_ds)
+            dst_ds = None
+            delete_raster(output_path, output_format)
+        raise
+    
     except Exception as e:
         logger.error(f"裁剪失败: {e}")
         raise
     
     finally:
-        # 关闭数据集
-        if src_ds:
-            close_raster(src_ds)
+        # 关闭目标数据集
         if dst_ds:
             close_raster(dst_ds)
+        if mapped:
+            mapped.close()
+        if journal:
+            journal.close()
+
+
+def crop_by_pixel(
+    input_path: str,
+    output_path: str,
+    x_off: int,
+    y_off: int,
+    x_size: int,
+    y_size: int,
+    output_format: str = 'GTiff',
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancelToken] = None,
+    trim_nodata: bool = False,
+    bands: Optional[Sequence[int]] = None,
+    convert: Optional[DtypeConversion] = None,
+    metrics: Optional[CropMetrics] = None,
+    resume: bool = False
+) -> bool:
+    """
+    按像素坐标裁剪影像
+    
+    Args:
+        input_path: 输入影像路径
+        output_path: 输出影像路径
+        x_off: X方向偏移（像素，左上角列号）
+        y_off: Y方向偏移（像素，左上角行号）
+        x_size: 裁剪宽度（像素）
+        y_size: 裁剪高度（像素）
+        output_format: 输出格式（默认GeoTIFF）
+        progress_callback: 进度回调 (已完成块数, 总块数)
+        cancel_token: 取消令牌
+        trim_nodata: 是否将裁剪范围收缩到有效像素的外接矩形
+        bands: 输出波段列表（从1开始，按给定顺序），None表示全部波段
+        convert: 输出数据类型转换设置，None表示保持源数据类型
+        metrics: 计时与I/O统计（包括打开和关闭源影像），None表示不统计
+        resume: 是否断点续裁（见 crop_dataset）
+    
+    Returns:
+        是否成功
+    
+    Raises:
+        InvalidBoundsError: 裁剪范围无效
+        ImageCropError: 波段号无效
+        GDALError: GDAL操作失败
+        CropCancelledError: 裁剪被取消
+    """
+    src_ds = None
+    if metrics is None:
+        metrics = CropMetrics()
+    
+    try:
+        # 打开源影像
+        with metrics.stage('open'):
+            src_ds = open_raster(input_path)
+        return crop_dataset(
+            src_ds, output_path,
+            x_off, y_off, x_size, y_size,
+            output_format, progress_callback, cancel_token, trim_nodata, bands, convert,
+            metrics, resume
+        )
+    
+    finally:
+        # 关闭数据集（裁剪结束或出错时立即释放文件句柄）
+        if src_ds:
+            with metrics.stage('close'):
+                close_raster(src_ds)
+            src_ds = None
 
 
 def crop_by_geo(
@@ -124,7 +614,8 @@ def crop_by_geo(
     min_y: float,
     max_x: float,
     max_y: float,
-    output_format: str = 'GTiff'
+    output_format: str = 'GTiff',
+    **kwargs
 ) -> bool:
     """
     按地理坐标裁剪影像
@@ -137,6 +628,7 @@ def crop_by_geo(
         max_x: 最大X坐标（东边界/右经度）
         max_y: 最大Y坐标（北边界/上纬度）
         output_format: 输出格式（默认GeoTIFF）
+        **kwargs: 透传给 crop_by_pixel 的参数（如 progress_callback、cancel_token）
     
     Returns:
         是否成功
@@ -145,40 +637,35 @@ def crop_by_geo(
         InvalidBoundsError: 裁剪范围无效
         GDALError: GDAL操作失败
     """
-    src_ds = None
-    
     try:
         # 打开源影像获取信息
-        src_ds = open_raster(input_path)
-        src_info = get_raster_info(src_ds)
-        src_gt = get_geotransform(src_ds)
-        
-        logger.info(f"地理坐标范围: ({min_x}, {min_y}) - ({max_x}, {max_y})")
+        metrics = kwargs.get('metrics') or CropMetrics()
+        with metrics.stage('open'):
+            src_ds = open_raster(input_path)
         
-        # 转换地理坐标到像素坐标
-        x_off, y_off, x_size, y_size = geo_bounds_to_pixel_bounds(
-            src_gt, min_x, min_y, max_x, max_y,
-            src_info['width'], src_info['height']
-        )
-        
-        # 关闭源数据集（crop_by_pixel会重新打开）
-        close_raster(src_ds)
-        src_ds = None
+        # 转换地理坐标到像素坐标后关闭源数据集（crop_by_pixel会重新打开）
+        with raster_closing(src_ds):
+            src_info = get_raster_info(src_ds)
+            src_gt = get_geotransform(src_ds)
+            
+            logger.info(f"地理坐标范围: ({min_x}, {min_y}) - ({max_x}, {max_y})")
+            
+            x_off, y_off, x_size, y_size = geo_bounds_to_pixel_bounds(
+                src_gt, min_x, min_y, max_x, max_y,
+                src_info['width'], src_info['height']
+            )
+        del src_ds
         
         # 调用像素坐标裁剪
         return crop_by_pixel(
             input_path, output_path,
             x_off, y_off, x_size, y_size,
-            output_format
+            output_format, **kwargs
         )
     
     except Exception as e:
         logger.error(f"地理坐标裁剪失败: {e}")
         raise
-    
-    finally:
-        if src_ds:
-            close_raster(src_ds)
 
 
 def crop_raster(
@@ -186,7 +673,8 @@ def crop_raster(
     output_path: str,
     bounds: Tuple[float, float, float, float],
     coord_type: str = 'pixel',
-    output_format: str = 'GTiff'
+    output_format: str = 'GTiff',
+    **kwargs
 ) -> bool:
     """
     裁剪影像的统一接口
@@ -199,6 +687,8 @@ def crop_raster(
             - geo模式: (min_x, min_y, max_x, max_y)
         coord_type: 坐标类型，'pixel' 或 'geo'
         output_format: 输出格式
+        **kwargs: 透传给 crop_by_pixel 的参数（如 progress_callback、cancel_token、
+            trim_nodata、bands、convert、metrics、resume）
     
     Returns:
         是否成功
@@ -208,14 +698,113 @@ def crop_raster(
         return crop_by_pixel(
             input_path, output_path,
             x_off, y_off, x_size, y_size,
-            output_format
+            output_format, **kwargs
         )
     elif coord_type.lower() == 'geo':
         min_x, min_y, max_x, max_y = [float(b) for b in bounds]
         return crop_by_geo(
             input_path, output_path,
             min_x, min_y, max_x, max_y,
-            output_format
+            output_format, **kwargs
         )
     else:
         raise ValueError(f"不支持的坐标类型: {coord_type}，请使用 'pixel' 或 'geo'")
+
+
+def crop_dataset_to_bytes(
+    src_ds: gdal.Dataset,
+    x_off: int,
+    y_off: int,
+    x_size: int,
+    y_size: int,
+    output_format: str = 'GTiff',
+    **kwargs
+) -> bytes:
+    """
+    从已打开的数据集裁剪，返回编码后的文件内容（经 /vsimem/ 内存文件，不写磁盘）
+    
+    Args:
+        src_ds: 源数据集
+        x_off: X方向偏移（像素）
+        y_off: Y方向偏移（像素）
+        x_size: 裁剪宽度（像素）
+        y_size: 裁剪高度（像素）
+        output_format: 输出格式（默认GeoTIFF）
+        **kwargs: 透传给 crop_dataset 的参数
+    
+    Returns:
+        输出文件的字节内容
+    """
+    ext = FORMAT_EXTENSIONS.get(output_format, '')
+    mem_path = f"/vsimem/image_crop_tool/{uuid.uuid4().hex}{ext}"
+    try:
+        crop_dataset(src_ds, mem_path, x_off, y_off, x_size, y_size,
+                     output_format, **kwargs)
+    except Exception:
+        gdal.Unlink(mem_path)
+        raise
+    return read_vsi_file(mem_path)
+
+
+def crop_to_bytes(
+    input_path: str,
+    bounds: Tuple[float, float, float, float],
+    coord_type: str = 'pixel',
+    output_format: str = 'GTiff',
+    **kwargs
+) -> bytes:
+    """
+    裁剪影像并返回编码后的文件内容（不写磁盘）
+    
+    Args:
+        input_path: 输入影像路径
+        bounds: 裁剪范围，含义同 crop_raster
+        coord_type: 坐标类型，'pixel' 或 'geo'
+        output_format: 输出格式（默认GeoTIFF）
+        **kwargs: 透传给 crop_dataset 的参数（如 progress_callback、cancel_token）
+    
+    Returns:
+        输出文件的字节内容
+    """
+    with opened_raster(input_path) as src_ds:
+        window = resolve_pixel_window(src_ds, bounds, coord_type)
+        return crop_dataset_to_bytes(src_ds, *window, output_format, **kwargs)
+
+
+def crop_to_array(
+    input_path: str,
+    bounds: Tuple[float, float, float, float],
+    coord_type: str = 'pixel',
+    bands: Optional[Sequence[int]] = None,
+    copy: bool = True
+) -> Tuple[np.ndarray, Tuple[float, float, float, float, float, float], str]:
+    """
+    裁剪影像并返回原始像素数组（不写磁盘）
+    
+    Args:
+        input_path: 输入影像路径
+        bounds: 裁剪范围，含义同 crop_raster
+        coord_type: 坐标类型，'pixel' 或 'geo'
+        bands: 波段列表（从1开始，按给定顺序），None表示全部波段
+        copy: 为False且源影像为未压缩的原始布局时，返回内存映射上的只读视图（零拷贝）
+    
+    Returns:
+        (数组, 裁剪后的仿射变换参数, 投影WKT)，数组形状为 (波段数, 行数, 列数)
+    """
+    with opened_raster(input_path) as src_ds:
+        x_off, y_off, x_size, y_size = resolve_pixel_window(src_ds, bounds, coord_type)
+        band_list = resolve_bands(src_ds, bands)
+        
+        mapped = None if copy else map_raster(src_ds)
+        if mapped:
+            with mapped:
+                data = mapped.window_bands(band_list, x_off, y_off, x_size, y_size)
+        else:
+            if is_network_path(src_ds.GetDescription()):
+                prefetch_window(src_ds, x_off, y_off, x_size, y_size, band_list)
+            data = np.stack([
+                read_band_data(src_ds, band_idx, x_off, y_off, x_size, y_size)
+                for band_idx in band_list
+            ])
+        dst_gt = calculate_crop_geotransform(get_geotransform(src_ds), x_off, y_off)
+        return data, dst_gt, src_ds.GetProjection()
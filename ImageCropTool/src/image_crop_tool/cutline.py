@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 多边形裁剪模块
+
+按多边形（WKT、GeoJSON 或矢量文件）裁剪影像，多边形外的像素写为 NoData 或透明（Alpha波段）。
+
+每个多边形只读取其外接矩形窗口，并在该窗口尺寸上栅格化掩膜。
+同一图层的多个多边形按行排序后分组读取，行方向相交的多边形共享一次窗口读取，
+整个图层只需顺序扫描一遍源影像。
+"""
+
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from osgeo import gdal, ogr, osr
+
+from .utils import logger, ImageCropError, InvalidBoundsError, CancelToken
+from .image_io import (
+    open_raster, opened_raster, get_raster_info, read_band_data, write_raster, close_raster,
+    GDAL_DTYPE_MAP
+)
+from .coord_transform import get_geotransform, calculate_crop_geotransform
+from .crop_core import ProgressCallback, CHUNK_BYTES, FORMAT_EXTENSIONS
+
+
+# 掩膜输出方式: nodata 将多边形外像素写为NoData, alpha 追加Alpha波段
+MASK_MODES = ('nodata', 'alpha')
+
+DEFAULT_NAME_TEMPLATE = '{stem}_{index:04d}'
+
+
+class Cutline(NamedTuple):
+    """一个裁剪多边形（已转换到影像坐标系）"""
+    geometry: ogr.Geometry
+    fid: int
+    attributes: Dict[str, Any]
+
+
+def _spatial_ref(definition: str) -> osr.SpatialReference:
+    """由WKT/EPSG等定义创建坐标系（经度在前的传统轴顺序）"""
+    srs = osr.SpatialReference()
+    if srs.SetFromUserInput(definition) != 0:
+        raise ImageCropError(f"无法识别的坐标系: {definition}")
+    srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return srs
+
+
+def _geojson_geometries(obj: Dict[str, Any]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """展开 GeoJSON 对象为 [(geometry, properties), ...]"""
+    kind = obj.get('type')
+    if kind == 'FeatureCollection':
+        return [(f['geometry'], f.get('properties') or {}) for f in obj.get('features', [])]
+    if kind == 'Feature':
+        return [(obj['geometry'], obj.get('properties') or {})]
+    return [(obj, {})]
+
+
+def load_cutlines(
+    source: str,
+    layer: Optional[str] = None,
+    where: Optional[str] = None,
+    source_srs: Optional[str] = None,
+    target_srs: Optional[str] = None
+) -> List[Cutline]:
+    """
+    读取裁剪多边形
+
+    Args:
+        source: WKT 字符串、GeoJSON 字符串或矢量文件路径（Shapefile、GeoJSON、GPKG等）
+        layer: 矢量文件的图层名（默认第一个图层）
+        where: 属性过滤条件（OGR SQL WHERE子句）
+        source_srs: 多边形坐标系；矢量文件默认使用图层坐标系，WKT/GeoJSON 字符串默认与影像相同
+        target_srs: 影像坐标系WKT；与多边形坐标系不同时进行转换
+
+    Returns:
+        多边形列表
+
+    Raises:
+        ImageCropError: 无法读取或不是多边形，或坐标系转换失败
+    """
+    try:
+        return _load_cutlines(source, layer, where, source_srs, target_srs)
+    except RuntimeError as e:
+        # 启用GDAL异常后，无效的矢量文件、过滤条件或坐标系以 RuntimeError 报告
+        raise ImageCropError(f"读取多边形失败: {e}")
+
+
+def _load_cutlines(
+    source: str,
+    layer: Optional[str],
+    where: Optional[str],
+    source_srs: Optional[str],
+    target_srs: Optional[str]
+) -> List[Cutline]:
+    """load_cutlines 的实现（GDAL/OGR 错误由调用方转换）"""
+    items = []
+    src_srs = _spatial_ref(source_srs) if source_srs else None
+
+    if os.path.exists(source):
+        vector_ds = ogr.Open(source)
+        if vector_ds is None:
+            raise ImageCropError(f"无法打开矢量文件: {source}")
+        lyr = vector_ds.GetLayerByName(layer) if layer else vector_ds.GetLayer(0)
+        if lyr is None:
+            raise ImageCropError(f"图层不存在: {layer}")
+        if where:
+            lyr.SetAttributeFilter(where)
+        if src_srs is None and lyr.GetSpatialRef() is not None:
+            src_srs = lyr.GetSpatialRef().Clone()
+            src_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        for feature in lyr:
+            geometry = feature.GetGeometryRef()
+            if geometry is not None:
+                items.append((geometry.Clone(), feature.GetFID(), feature.items()))
+        vector_ds = None
+    elif source.lstrip().startswith('{'):
+        try:
+            obj = json.loads(source)
+        except ValueError as e:
+            raise ImageCropError(f"无效的GeoJSON: {e}")
+        for fid, (geom, props) in enumerate(_geojson_geometries(obj)):
+            items.append((ogr.CreateGeometryFromJson(json.dumps(geom)), fid, props))
+    else:
+        geometry = ogr.CreateGeometryFromWkt(source)
+        if geometry is None:
+            raise ImageCropError(f"无法解析的多边形: {source[:80]}")
+        items.append((geometry, 0, {}))
+
+    transform = None
+    if src_srs is not None and target_srs:
+        dst_srs = _spatial_ref(target_srs)
+        if not src_srs.IsSame(dst_srs):
+            transform = osr.CoordinateTransformation(src_srs, dst_srs)
+
+    cutlines = []
+    for geometry, fid, attributes in items:
+        if geometry is None or ogr.GT_Flatten(geometry.GetGeometryType()) not in (ogr.wkbPolygon, ogr.wkbMultiPolygon):
+            raise ImageCropError(f"裁剪要素 {fid} 不是多边形")
+        if transform is not None:
+            geometry.Transform(transform)
+        cutlines.append(Cutline(geometry, fid, dict(attributes)))
+
+    if not cutlines:
+        raise ImageCropError(f"未读取到多边形: {source[:80]}")
+    logger.info(f"读取多边形: {len(cutlines)} 个")
+    return cutlines
+
+
+def cutline_window(
+    gt: Tuple[float, float, float, float, float, float],
+    geometry: ogr.Geometry,
+    width: int,
+    height: int
+) -> Optional[Tuple[int, int, int, int]]:
+    """
+    多边形外接矩形对应的像素窗口（裁剪到影像范围内）
+
+    Returns:
+        (x_off, y_off, x_size, y_size)，与影像不相交时返回None
+    """
+    min_x, max_x, min_y, max_y = geometry.GetEnvelope()
+    inv_gt = gdal.InvGeoTransform(gt)
+    if inv_gt is None:
+        raise ImageCropError("仿射变换矩阵奇异，无法求逆")
+
+    pixels = [gdal.ApplyGeoTransform(inv_gt, x, y)
+              for x in (min_x, max_x) for y in (min_y, max_y)]
+    x0 = max(0, int(np.floor(min(p[0] for p in pixels))))
+    y0 = max(0, int(np.floor(min(p[1] for p in pixels))))
+    x1 = min(width, int(np.ceil(max(p[0] for p in pixels))))
+    y1 = min(height, int(np.ceil(max(p[1] for p in pixels))))
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def rasterize_mask(
+    geometry: ogr.Geometry,
+    gt: Tuple[float, float, float, float, float, float],
+    x_size: int,
+    y_size: int,
+    all_touched: bool = False
+) -> np.ndarray:
+    """
+    在窗口尺寸上栅格化多边形
+
+    Args:
+        geometry: 多边形（影像坐标系）
+        gt: 窗口的仿射变换参数
+        x_size: 窗口宽度
+        y_size: 窗口高度
+        all_touched: 是否包含所有与多边形接触的像素（默认仅像素中心在多边形内）
+
+    Returns:
+        布尔掩膜，多边形内为True
+    """
+    mask_ds = gdal.GetDriverByName('MEM').Create('', x_size, y_size, 1, gdal.GDT_Byte)
+    mask_ds.SetGeoTransform(gt)
+
+    # GDAL 3.11 起内存矢量驱动更名为 MEM
+    driver = ogr.GetDriverByName('MEM') or ogr.GetDriverByName('Memory')
+    vector_ds = driver.CreateDataSource('')
+    layer = vector_ds.CreateLayer('cutline', geom_type=ogr.wkbMultiPolygon)
+    feature = ogr.Feature(layer.GetLayerDefn())
+    feature.SetGeometry(geometry)
+    layer.CreateFeature(feature)
+
+    options = ['ALL_TOUCHED=TRUE'] if all_touched else []
+    gdal.RasterizeLayer(mask_ds, [1], layer, burn_values=[1], options=options)
+    return mask_ds.GetRasterBand(1).ReadAsArray().astype(bool)
+
+
+def _check_nodata(nodata: float, dtype: np.dtype) -> None:
+    """检查NoData值能否用影像数据类型表示，不能时抛出 ImageCropError"""
+    if np.issubdtype(dtype, np.integer):
+        if not np.isfinite(nodata) or nodata != int(nodata):
+            raise ImageCropError(f"NoData值 {nodata} 不是整数，不能用于 {dtype.name} 影像")
+        limits = np.iinfo(dtype)
+    elif not np.isfinite(nodata):
+        return
+    else:
+        limits = np.finfo(dtype)
+    if not limits.min <= nodata <= limits.max:
+        raise ImageCropError(
+            f"NoData值 {nodata} 超出 {dtype.name} 的取值范围 [{limits.min}, {limits.max}]")
+
+
+def _alpha_value(dtype: np.dtype):
+    """Alpha波段的不透明值"""
+    if np.issubdtype(dtype, np.integer):
+        return np.iinfo(dtype).max
+    return 255
+
+
+def crop_cutlines(
+    input_path: str,
+    cutlines: List[Cutline],
+    output_paths: List[str],
+    mask_mode: str = 'nodata',
+    nodata: Optional[float] = None,
+    output_format: str = 'GTiff',
+    all_touched: bool = False,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancelToken] = None
+) -> List[str]:
+    """
+    按多边形裁剪影像（一次扫描源影像处理全部多边形）
+
+    Args:
+        input_path: 输入影像路径
+        cutlines: 多边形列表（影像坐标系）
+        output_paths: 与 cutlines 一一对应的输出路径
+        mask_mode: 'nodata'（多边形外写NoData）或 'alpha'（追加Alpha波段）
+        nodata: NoData值，默认使用源影像NoData，源影像未设置时为0
+        output_format: 输出格式（默认GeoTIFF）
+        all_touched: 是否包含所有与多边形接触的像素
+        progress_callback: 进度回调 (已完成多边形数, 总数)
+        cancel_token: 取消令牌
+
+    Returns:
+        实际写出的输出路径（与影像不相交的多边形被跳过）
+
+    Raises:
+        ValueError: 参数无效
+        GDALError: GDAL操作失败
+        CropCancelledError: 被取消
+    """
+    if mask_mode not in MASK_MODES:
+        raise ValueError(f"不支持的掩膜方式: {mask_mode}，请使用 'nodata' 或 'alpha'")
+    if len(cutlines) != len(output_paths):
+        raise ValueError("多边形数量与输出路径数量不一致")
+
+    src_ds = None
+    try:
+        src_ds = open_raster(input_path)
+        info = get_raster_info(src_ds)
+        src_gt = get_geotransform(src_ds)
+        bands = info['bands']
+        if info['dtype'] not in GDAL_DTYPE_MAP:
+            raise ImageCropError(f"不支持的数据类型: {info['dtype_name']}")
+        np_dtype = np.dtype(GDAL_DTYPE_MAP[info['dtype']])
+        if nodata is None:
+            nodata = info['nodata'] if info['nodata'] is not None else 0
+        if mask_mode == 'nodata':
+            _check_nodata(nodata, np_dtype)
+
+        jobs = []
+        for cutline, path in zip(cutlines, output_paths):
+            window = cutline_window(src_gt, cutline.geometry, info['width'], info['height'])
+            if window is None:
+                logger.warning(f"多边形 {cutline.fid} 与影像不相交，已跳过")
+                continue
+            jobs.append((window, cutline, path))
+        jobs.sort(key=lambda job: (job[0][1], job[0][0]))
+
+        # 按行分组: 与当前组行范围相交的多边形合并读取，单次读取不超过 CHUNK_BYTES
+        groups = []
+        for job in jobs:
+            x, y, w, h = job[0]
+            if groups:
+                gx0, gy0, gx1, gy1, members = groups[-1]
+                ux0, uy0, ux1, uy1 = min(gx0, x), gy0, max(gx1, x + w), max(gy1, y + h)
+                union_bytes = (ux1 - ux0) * (uy1 - uy0) * bands * np_dtype.itemsize
+                if y < gy1 and union_bytes <= CHUNK_BYTES:
+                    groups[-1] = (ux0, uy0, ux1, uy1, members + [job])
+                    continue
+            groups.append((x, y, x + w, y + h, [job]))
+
+        written = []
+        total = len(jobs)
+        for gx0, gy0, gx1, gy1, members in groups:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+
+            block = np.stack([
+                read_band_data(src_ds, b, gx0, gy0, gx1 - gx0, gy1 - gy0)
+                for b in range(1, bands + 1)
+            ])
+
+            for (x, y, w, h), cutline, path in members:
+                dst_gt = calculate_crop_geotransform(src_gt, x, y)
+                mask = rasterize_mask(cutline.geometry, dst_gt, w, h, all_touched)
+                data = block[:, y - gy0:y - gy0 + h, x - gx0:x - gx0 + w]
+
+                if mask_mode == 'alpha':
+                    alpha = np.where(mask, _alpha_value(np_dtype), 0).astype(np_dtype)
+                    data = np.concatenate([data, alpha[np.newaxis]])
+                    options = ['COMPRESS=LZW', 'BIGTIFF=IF_SAFER', 'ALPHA=YES'] \
+                        if output_format == 'GTiff' else None
+                    write_raster(path, data, info['dtype'], output_format,
+                                 dst_gt, info['projection'], None, options)
+                else:
+                    data = np.where(mask[np.newaxis], data, np.array(nodata, dtype=np_dtype))
+                    write_raster(path, data, info['dtype'], output_format,
+                                 dst_gt, info['projection'], nodata)
+
+                written.append(path)
+                if progress_callback:
+                    progress_callback(len(written), total)
+
+        logger.info(f"多边形裁剪完成: {len(written)} 个")
+        return written
+
+    finally:
+        if src_ds:
+            close_raster(src_ds)
+
+
+def crop_by_cutline(
+    input_path: str,
+    output_path: str,
+    cutline: str,
+    layer: Optional[str] = None,
+    where: Optional[str] = None,
+    cutline_srs: Optional[str] = None,
+    **kwargs
+) -> bool:
+    """
+    按多边形裁剪影像，所有多边形合并为一个输出
+
+    Args:
+        input_path: 输入影像路径
+        output_path: 输出影像路径
+        cutline: WKT、GeoJSON 字符串或矢量文件路径
+        layer: 矢量文件图层名
+        where: 属性过滤条件
+        cutline_srs: 多边形坐标系（见 load_cutlines）
+        **kwargs: 透传给 crop_cutlines 的参数（mask_mode、nodata、output_format 等）
+
+    Returns:
+        是否成功
+
+    Raises:
+        InvalidBoundsError: 多边形与影像不相交
+    """
+    cutlines = _load_for_raster(input_path, cutline, layer, where, cutline_srs)
+
+    union = ogr.Geometry(ogr.wkbMultiPolygon)
+    for item in cutlines:
+        union = union.Union(item.geometry)
+
+    written = crop_cutlines(input_path, [Cutline(union, 0, {})], [output_path], **kwargs)
+    if not written:
+        raise InvalidBoundsError("多边形与影像不相交")
+    return True
+
+
+def crop_by_cutlines(
+    input_path: str,
+    output_dir: str,
+    cutline: str,
+    layer: Optional[str] = None,
+    where: Optional[str] = None,
+    cutline_srs: Optional[str] = None,
+    name_template: str = DEFAULT_NAME_TEMPLATE,
+    output_format: str = 'GTiff',
+    **kwargs
+) -> List[str]:
+    """
+    按图层中的每个多边形分别裁剪，输出到目录
+
+    Args:
+        input_path: 输入影像路径
+        output_dir: 输出目录
+        cutline: WKT、GeoJSON 字符串或矢量文件路径
+        layer: 矢量文件图层名
+        where: 属性过滤条件
+        cutline_srs: 多边形坐标系（见 load_cutlines）
+        name_template: 文件名模板（不含扩展名），可用字段 {stem} {index} {fid} 及要素属性名
+        output_format: 输出格式（默认GeoTIFF）
+        **kwargs: 透传给 crop_cutlines 的参数
+
+    Returns:
+        写出的文件路径列表
+    """
+    cutlines = _load_for_raster(input_path, cutline, layer, where, cutline_srs)
+
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    ext = FORMAT_EXTENSIONS.get(output_format, '')
+    output_paths = []
+    for index, item in enumerate(cutlines):
+        fields = dict(item.attributes, stem=stem, index=index, fid=item.fid)
+        try:
+            name = name_template.format(**fields)
+        except KeyError as e:
+            raise ImageCropError(f"文件名模板字段不存在: {e}")
+        output_paths.append(os.path.join(output_dir, name + ext))
+
+    return crop_cutlines(input_path, cutlines, output_paths,
+                         output_format=output_format, **kwargs)
+
+
+def _load_for_raster(
+    input_path: str,
+    cutline: str,
+    layer: Optional[str],
+    where: Optional[str],
+    cutline_srs: Optional[str]
+) -> List[Cutline]:
+    """读取多边形并转换到影像坐标系"""
+    with opened_raster(input_path) as src_ds:
+        target_srs = src_ds.GetProjection() or None
+    return load_cutlines(cutline, layer, where, cutline_srs, target_srs)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - GDAL运行参数配置模块
+
+提供命名的GDAL运行配置（块缓存大小、线程数、VSI缓存等），可通过命令行、环境变量或配置文件选择。
+
+优先级（高到低）:
+    1. 与配置项同名的环境变量（如 GDAL_CACHEMAX），保持GDAL原有行为
+    2. 配置文件中的 options
+    3. 所选配置的取值
+
+配置的选择: 命令行 --gdal-profile > 环境变量 IMAGE_CROP_GDAL_PROFILE > 配置文件 profile > default
+
+配置文件 (JSON，路径由 IMAGE_CROP_GDAL_CONFIG 指定，默认 ~/.image_crop_tool/gdal.json):
+    {
+        "profile": "throughput",
+        "options": {"GDAL_CACHEMAX": "16384"},
+        "profiles": {"my-nfs": {"GDAL_CACHEMAX": "2048", "VSI_CACHE": "TRUE"}}
+    }
+
+本模块导入时不加载GDAL，便于命令行在解析参数阶段校验配置。
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+from .utils import logger, ImageCropError
+
+
+# 选择配置的环境变量
+PROFILE_ENV = 'IMAGE_CROP_GDAL_PROFILE'
+
+# 配置文件路径的环境变量
+CONFIG_ENV = 'IMAGE_CROP_GDAL_CONFIG'
+
+# 默认配置文件路径
+DEFAULT_CONFIG_PATH = os.path.join(os.path.expanduser('~'), '.image_crop_tool', 'gdal.json')
+
+# 内置配置
+#   default:     GDAL默认值（只保留程序原有的中文路径设置）
+#   low-memory:  小块缓存、单线程、关闭VSI缓存，适合内存受限的容器或大批量并行进程
+#   interactive: 中等缓存、少量线程，GUI和瓦片服务等低延迟场景
+#   throughput:  大块缓存、全部核心参与压缩/解压，适合大内存主机上的批量裁剪
+# 内置配置不设置 GDAL_DISABLE_READDIR_ON_OPEN: 本地影像的 .hdr、.tfw、.ovr、.msk、.aux.xml
+# 等旁路文件要列目录才能找到（网络影像只在打开时设置，见 vsi.NETWORK_OPEN_OPTIONS）
+PROFILES: Dict[str, Dict[str, str]] = {
+    'default': {},
+    'low-memory': {
+        'GDAL_CACHEMAX': '64',
+        'GDAL_NUM_THREADS': '1',
+        'VSI_CACHE': 'FALSE',
+        'GDAL_MAX_DATASET_POOL_SIZE': '50',
+    },
+    'interactive': {
+        'GDAL_CACHEMAX': '512',
+        'GDAL_NUM_THREADS': '2',
+        'VSI_CACHE': 'TRUE',
+        'VSI_CACHE_SIZE': str(64 * 1024 * 1024),
+    },
+    'throughput': {
+        'GDAL_CACHEMAX': '8192',
+        'GDAL_NUM_THREADS': 'ALL_CPUS',
+        'VSI_CACHE': 'TRUE',
+        'VSI_CACHE_SIZE': str(256 * 1024 * 1024),
+        'GDAL_MAX_DATASET_POOL_SIZE': '1000',
+        'GDAL_SWATH_SIZE': str(256 * 1024 * 1024),
+    },
+}
+
+# --print-config 始终显示的配置项
+REPORTED_OPTIONS = [
+    'GDAL_CACHEMAX', 'GDAL_NUM_THREADS', 'VSI_CACHE', 'VSI_CACHE_SIZE',
+    'GDAL_DISABLE_READDIR_ON_OPEN', 'GDAL_MAX_DATASET_POOL_SIZE', 'GDAL_SWATH_SIZE',
+]
+
+# 命令行选择的配置（在首次使用GDAL前设置）
+_selected_profile: Optional[str] = None
+
+# 首次应用配置前GDAL的块缓存上限（字节），配置未指定 GDAL_CACHEMAX 时恢复
+_startup_cache_max: Optional[int] = None
+
+# 上一次应用配置时写入的配置项；切换配置时只清除这些项，调用方自行设置的选项不受影响
+_applied_options: Set[str] = set()
+
+# 上一次应用配置时是否调整了块缓存上限
+_cache_applied = False
+
+
+def load_config_file(path: Optional[str] = None) -> Dict:
+    """
+    读取配置文件
+
+    Args:
+        path: 配置文件路径，None时取 IMAGE_CROP_GDAL_CONFIG 或默认路径
+
+    Returns:
+        配置字典，文件不存在时返回空字典
+
+    Raises:
+        ImageCropError: 文件内容无效
+    """
+    path = path or os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG_PATH
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ImageCropError(f"无法读取GDAL配置文件 {path}: {e}")
+    if not isinstance(config, dict):
+        raise ImageCropError(f"GDAL配置文件格式无效: {path}")
+    return config
+
+
+def available_profiles(config: Optional[Dict] = None) -> Dict[str, Dict[str, str]]:
+    """内置配置与配置文件中自定义配置的合集"""
+    profiles = dict(PROFILES)
+    if config:
+        profiles.update(config.get('profiles', {}))
+    return profiles
+
+
+def resolve_settings(
+    profile: Optional[str] = None,
+    config_path: Optional[str] = None
+) -> Tuple[str, Dict[str, Tuple[str, str]]]:
+    """
+    确定生效的配置名和各配置项的取值及来源
+
+    Args:
+        profile: 配置名，None时依次取命令行选择、环境变量、配置文件
+        config_path: 配置文件路径
+
+    Returns:
+        (配置名, {配置项: (取值, 来源)})
+
+    Raises:
+        ImageCropError: 配置名不存在或配置文件无效
+    """
+    config = load_config_file(config_path)
+    profiles = available_profiles(config)
+    name = (profile or _selected_profile or os.environ.get(PROFILE_ENV)
+            or config.get('profile') or 'default')
+    if name not in profiles:
+        raise ImageCropError(f"未知的GDAL配置: {name}，可选 {', '.join(sorted(profiles))}")
+
+    settings = {key: (str(value), f'profile:{name}') for key, value in profiles[name].items()}
+    for key, value in config.get('options', {}).items():
+        settings[key] = (str(value), 'config file')
+    for key in list(settings):
+        if key in os.environ:
+            settings[key] = (os.environ[key], 'environment')
+    return name, settings
+
+
+def _cache_bytes(value: str) -> Optional[int]:
+    """解析 GDAL_CACHEMAX（小于100000时单位为MB，否则为字节；百分比交给GDAL处理）"""
+    if not value.isdigit():
+        return None
+    number = int(value)
+    return number * 1024 * 1024 if number < 100000 else number
+
+
+def apply_gdal_profile(profile: Optional[str] = None) -> str:
+    """
+    将配置写入GDAL
+
+    GDAL_CACHEMAX 同时通过 SetCacheMax 生效，块缓存已初始化后仍可调整。
+    来源为环境变量的配置项由GDAL自行读取，不再覆盖。之前的配置写入、当前配置未涉及的项
+    恢复为GDAL默认值（块缓存上限恢复为首次应用配置前的值）；不是由配置写入的选项保持不变。
+
+    Args:
+        profile: 配置名，None时按默认优先级选择
+
+    Returns:
+        生效的配置名
+    """
+    from osgeo import gdal
+
+    global _startup_cache_max, _applied_options, _cache_applied
+    name, settings = resolve_settings(profile)
+    if _startup_cache_max is None:
+        _startup_cache_max = gdal.GetCacheMax()
+
+    applied = set()
+    for key, (value, source) in settings.items():
+        if source != 'environment':
+            gdal.SetConfigOption(key, value)
+            applied.add(key)
+    # 清除之前的配置写入、当前配置未涉及的项，恢复GDAL默认值
+    for key in _applied_options - applied:
+        gdal.SetConfigOption(key, None)
+    _applied_options = applied
+
+    cache = settings.get('GDAL_CACHEMAX')
+    cache_bytes = _cache_bytes(cache[0]) if cache else None
+    if cache_bytes:
+        gdal.SetCacheMax(cache_bytes)
+    elif _cache_applied:
+        gdal.SetCacheMax(_startup_cache_max)
+    _cache_applied = bool(cache_bytes)
+
+    logger.debug(f"GDAL配置: {name} {dict((k, v) for k, (v, _) in settings.items())}")
+    return name
+
+
+def select_gdal_profile(profile: Optional[str]) -> None:
+    """
+    选择运行配置（命令行使用）
+
+    在首次使用GDAL前调用时，配置随GDAL初始化一起生效；之后调用则立即生效。
+
+    Args:
+        profile: 配置名，None表示不指定
+
+    Raises:
+        ImageCropError: 配置名不存在或配置文件无效
+    """
+    global _selected_profile
+    resolve_settings(profile)
+    _selected_profile = profile
+
+    from . import utils
+    if profile and utils._gdal_configured:
+        apply_gdal_profile(profile)
+
+
+def effective_config(profile: Optional[str] = None) -> Tuple[str, List[Tuple[str, str, str]]]:
+    """
+    GDAL实际生效的配置（会初始化GDAL）
+
+    Returns:
+        (配置名, [(配置项, 取值, 来源), ...])
+    """
+    from osgeo import gdal
+    from .utils import ensure_gdal_configured
+
+    ensure_gdal_configured()
+    name, settings = resolve_settings(profile)
+    keys = REPORTED_OPTIONS + [k for k in settings if k not in REPORTED_OPTIONS]
+
+    rows = []
+    for key in keys:
+        source = settings[key][1] if key in settings else 'GDAL default'
+        if key == 'GDAL_CACHEMAX':
+            value = f"{gdal.GetCacheMax() // (1024 * 1024)} MB"
+        else:
+            value = gdal.GetConfigOption(key) or '(未设置)'
+        rows.append((key, value, source))
+    return name, rows
+
+
+def format_config(profile: Optional[str] = None) -> str:
+    """--print-config 的输出文本"""
+    from osgeo import gdal
+
+    name, rows = effective_config(profile)
+    config_path = os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG_PATH
+    lines = [
+        f"GDAL版本: {gdal.__version__}",
+        f"配置: {name}",
+        f"配置文件: {config_path}{'' if os.path.exists(config_path) else ' (不存在)'}",
+        '',
+    ]
+    for key, value, source in rows:
+        lines.append(f"  {key:<30} {value:<16} [{source}]")
+    return '\n'.join(lines)
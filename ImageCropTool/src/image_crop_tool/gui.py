@@ -7,12 +7,15 @@
 特点：
 1. 现代化界面 (深色侧边栏，清晰布局)
 2. 强大的图像浏览 (滚轮缩放，右键平移)
-3. 实时 RGB 值显示
+3. 实时像素值显示 (源数据全部波段及光谱曲线)
 4. 精确的像素/地理坐标转换
+5. 渐进式渲染 (交互时快速显示，停止后后台高质量重采样)
 """
 
 import os
 import sys
+import queue
+import threading
 import tkinter as limited_tk
 import tkinter.ttk as ttk
 from tkinter import filedialog, messagebox
@@ -48,9 +51,48 @@ ZOOM_FACTOR = 1.2               # 每次滚轮缩放倍数
 MIN_ZOOM = 0.1
 MAX_ZOOM = 50.0
 
+# 渲染参数
+RENDER_MARGIN = 256             # 视口外额外渲染的边距 (画布像素)，平移不超出该范围时无需重新渲染
+REFINE_DELAY_MS = 200           # 交互停止多久后进行高质量重采样
+REFINE_POLL_MS = 15             # 轮询后台重采样结果的间隔
+PROBE_INTERVAL_MS = 16          # 像素值读取的最小间隔 (约等于屏幕刷新率)
+SAVE_POLL_MS = 50               # 轮询后台保存进度的间隔
+
 # 裁剪框手柄参数
 HANDLE_SIZE = 8                 # 手柄大小 (像素)
 
+
+def render_region(image, region, scale, resample=Image.Resampling.NEAREST):
+    """
+    将影像区域重采样为屏幕显示尺寸
+    
+    Args:
+        image: 原始 PIL Image
+        region: 影像区域 (ix1, iy1, ix2, iy2)
+        scale: 显示缩放比例
+        resample: 重采样方法
+    
+    Returns:
+        重采样后的 PIL Image
+    """
+    ix1, iy1, ix2, iy2 = region
+    roi = image.crop((ix1, iy1, ix2, iy2))
+    
+    # 目标显示大小，+1 避免缝隙
+    target_w = int((ix2 - ix1) * scale) + 1
+    target_h = int((iy2 - iy1) * scale) + 1
+    return roi.resize((target_w, target_h), resample)
+
+
+def refine_resample(scale):
+    """高质量重采样方法：缩小时区域平均，放大时 Lanczos；1:1 显示无需重采样"""
+    if scale < 1.0:
+        return Image.Resampling.BOX
+    if scale > 1.0:
+        return Image.Resampling.LANCZOS
+    return None
+
+
 class ImageCropApp:
     """影像裁剪工具主应用"""
     
@@ -63,6 +105,14 @@ class ImageCropApp:
         self.dataset = None
         self.original_image = None   # 原始 PIL Image (完整分辨率)
         self.photo_image = None      # 当前显示的 ImageTk 对象
+        self.img_item = None         # 画布上的图像项
+        self.render_region = None    # 已渲染的影像区域 (ix1, iy1, ix2, iy2, scale)
+        
+        # 渐进式渲染: 交互时 NEAREST 快速显示，停止后后台线程高质量重采样
+        self.render_gen = 0          # 渲染代数，用于丢弃过期的重采样结果
+        self.refine_after_id = None
+        self.refine_queue = queue.Queue()
+        self.refine_pending = 0      # 尚未取回结果的后台重采样任务数
         
         # 视口变换参数 (Image coords -> Canvas coords)
         # canvas_x = (image_x * scale) + offset_x
@@ -80,6 +130,11 @@ class ImageCropApp:
         self.has_geo = False
         self.inv_geo_transform = None
         
+        # 像素探针 (读取源数据真实值)
+        self.pixel_probe = None
+        self.probe_pos = None        # 待读取的像素位置 (ix, iy)
+        self.probe_after_id = None
+        
         # 交互状态
         self.dragging_pan = False
         self.pan_start_x = 0
@@ -88,7 +143,8 @@ class ImageCropApp:
         self.dragging_crop = False
         self.crop_start_x = 0
         self.crop_start_y = 0
-        self.rect_id = None
+        self.rect_id = None          # 裁剪框画布项 (常驻，仅更新坐标)
+        self.handle_ids = {}         # 手柄画布项 {'nw': id, ...}
         
         # 裁剪框拖拽/调整状态
         self.crop_drag_mode = None   # None, 'move', 'resize'
@@ -98,6 +154,9 @@ class ImageCropApp:
         # 裁剪结果 (Image coords)
         self.crop_bounds = None     # (x, y, w, h)
         
+        # 后台保存任务 (进度队列、取消令牌、进度对话框)
+        self.save_job = None
+        
         # --- 初始化界面 ---
         self.setup_styles()
         self.create_widgets()
@@ -111,6 +170,7 @@ class ImageCropApp:
         self.root.title("影像裁剪专家 v2.0")
         self.root.geometry("1200x800")
         self.root.minsize(1000, 700)
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
         # 设置图标 (如果存在)
         # icon_path = os.path.join(os.path.dirname(__file__), 'icon.ico')
         # if os.path.exists(icon_path): self.root.iconbitmap(icon_path)
@@ -211,12 +271,21 @@ class ImageCropApp:
         pixel_row = ttk.Frame(pixel_group, style='Side.TFrame')
         pixel_row.pack(fill=limited_tk.X)
         
-        self.rgb_label = ttk.Label(pixel_row, text="R: -  G: -  B: -", style='RGB.TLabel', anchor='center')
+        self.rgb_label = ttk.Label(pixel_row, text="R: -  G: -  B: -", style='RGB.TLabel', anchor='center', wraplength=180)
         self.rgb_label.pack(side=limited_tk.LEFT, fill=limited_tk.X, expand=True, padx=(0, 3))
         
         self.pos_label = ttk.Label(pixel_row, text="X: 0, Y: 0", style='Value.TLabel', background='#f0f0f0', anchor='center', padding=5)
         self.pos_label.pack(side=limited_tk.LEFT, fill=limited_tk.X, expand=True, padx=(3, 0))
         
+        # 光谱曲线 (多波段影像)
+        self.spectrum_canvas = limited_tk.Canvas(
+            pixel_group, height=60, bg='#e8f4fd', highlightthickness=0
+        )
+        self.spectrum_canvas.pack(fill=limited_tk.X, pady=(6, 0))
+        self.spectrum_line = self.spectrum_canvas.create_line(
+            0, 0, 0, 0, fill=COLOR_ACCENT, width=1.5, state='hidden'
+        )
+        
         # -- 缩放控制 --
         zoom_group = ttk.LabelFrame(ctrl_container, text=" 视图 ", style='Side.TLabelframe', padding=8)
         zoom_group.pack(fill=limited_tk.X, pady=(0, 10))
@@ -226,6 +295,14 @@ class ImageCropApp:
         ttk.Button(zoom_btns, text="🔍 适应窗口", command=self.zoom_fit).pack(side=limited_tk.LEFT, fill=limited_tk.X, expand=True, padx=(0, 5))
         ttk.Button(zoom_btns, text="100%", command=self.zoom_100).pack(side=limited_tk.LEFT, fill=limited_tk.X, expand=True, padx=(5, 0))
         
+        # 显示质量
+        quality_frame = ttk.Frame(zoom_group, style='Side.TFrame')
+        quality_frame.pack(fill=limited_tk.X, pady=(8, 0))
+        ttk.Label(quality_frame, text="质量:", style='Info.TLabel', background=COLOR_BG_SIDE).pack(side=limited_tk.LEFT)
+        self.render_quality = limited_tk.StringVar(value="high")
+        ttk.Radiobutton(quality_frame, text="快速", variable=self.render_quality, value="fast", command=self.redraw).pack(side=limited_tk.LEFT, padx=10)
+        ttk.Radiobutton(quality_frame, text="高质量", variable=self.render_quality, value="high", command=self.redraw).pack(side=limited_tk.LEFT)
+        
         # -- 裁剪设置 --
         crop_group = ttk.LabelFrame(ctrl_container, text=" 裁剪参数 ", style='Side.TLabelframe', padding=8)
         crop_group.pack(fill=limited_tk.X, pady=(0, 10))
@@ -358,7 +435,8 @@ class ImageCropApp:
 
     def open_image(self):
         filename = filedialog.askopenfilename(
-            filetypes=[("图像文件", "*.tif *.jpg *.png *.img *.bmp"), ("所有文件", "*.*")]
+            filetypes=[("图像文件", "*.tif *.jpg *.png *.img *.bmp"),
+                       ("压缩包", "*.zip *.tar *.tar.gz *.tgz *.gz"), ("所有文件", "*.*")]
         )
         if not filename: return
         
@@ -369,12 +447,35 @@ class ImageCropApp:
         except Exception as e:
             messagebox.showerror("错误", f"无法打开文件: {e}")
 
+    def _close_dataset(self):
+        """关闭当前影像，释放文件句柄（之后可在外部移动或删除该文件）"""
+        if self.pixel_probe:
+            self.pixel_probe.clear()
+            self.pixel_probe = None
+        if self.dataset is not None:
+            from .image_io import close_raster
+            close_raster(self.dataset)
+            self.dataset = None
+
+    def on_close(self):
+        """关闭窗口"""
+        self._close_dataset()
+        self.root.destroy()
+
     def _load_file(self, filepath):
+        # 先释放上一幅影像的句柄
+        self._close_dataset()
         self.current_file = filepath
+        self.render_region = None
         
-        # 1. 尝试 GDAL 加载元数据
+        # 1. 尝试 GDAL 加载元数据（压缩包、URL 由 open_raster 解析）
         if GDAL_AVAILABLE:
-            self.dataset = gdal.Open(filepath)
+            from .image_io import open_raster
+            from .utils import ImageCropError
+            try:
+                self.dataset = open_raster(filepath)
+            except ImageCropError:
+                self.dataset = None
             if self.dataset:
                 self.img_width = self.dataset.RasterXSize
                 self.img_height = self.dataset.RasterYSize
@@ -382,6 +483,11 @@ class ImageCropApp:
                 self.geo_transform = self.dataset.GetGeoTransform()
                 self.projection = self.dataset.GetProjection()
                 
+                # 像素探针: 按块缓存读取源数据真实值
+                if self.img_bands > 0:
+                    from .pixel_probe import PixelProbe
+                    self.pixel_probe = PixelProbe(self.dataset)
+                
                 # 判断是否有有效地理坐标
                 self.has_geo = (self.geo_transform and self.geo_transform != (0,1,0,0,0,1))
                 
@@ -456,7 +562,7 @@ class ImageCropApp:
         self.img_width, self.img_height = self.original_image.size
         self.img_bands = len(self.original_image.getbands())
         self.has_geo = False
-        self.dataset = None
+        self._close_dataset()
         self.inv_geo_transform = None
 
     def zoom_fit(self):
@@ -520,70 +626,66 @@ class ImageCropApp:
         
         self.redraw()
 
-    def redraw(self):
-        """重绘图像 (基于视口裁剪优化)"""
-        if not self.original_image: return
-        
-        # 1. 计算可视区域 (Image Coords)
+    def _view_region(self, margin=0):
+        """视口 (向外扩展 margin 画布像素) 对应的影像区域，已约束到影像范围内"""
         cw = self.canvas.winfo_width()
         ch = self.canvas.winfo_height()
         
-        # 视口在图像上的四个角点（反解坐标）
-        # 只要有一部分在画布内，就绘制
-        
-        # 简单策略：总是全屏重绘可能会卡，但 PIL crop+resize 很快
-        # 让我们计算需要 crop 的原始图像区域
-        
-        # visible: (0,0) -> (cw, ch) in canvas
-        # -> image coords
-        ix1, iy1 = self.canvas_to_image(0, 0)
-        ix2, iy2 = self.canvas_to_image(cw, ch)
+        ix1, iy1 = self.canvas_to_image(-margin, -margin)
+        ix2, iy2 = self.canvas_to_image(cw + margin, ch + margin)
         
         # 取整并约束
         ix1 = max(0, int(ix1))
         iy1 = max(0, int(iy1))
         ix2 = min(self.img_width, int(ix2) + 1)
         iy2 = min(self.img_height, int(iy2) + 1)
+        return ix1, iy1, ix2, iy2
+
+    def _render_covers_view(self):
+        """已渲染区域是否仍覆盖当前视口 (仅平移、未缩放时成立)"""
+        if not self.render_region: return False
+        rx1, ry1, rx2, ry2, rscale = self.render_region
+        if rscale != self.scale: return False
+        
+        ix1, iy1, ix2, iy2 = self._view_region()
+        if ix2 <= ix1 or iy2 <= iy1:
+            # 影像已移出视口，无需渲染
+            return True
+        return rx1 <= ix1 and ry1 <= iy1 and ix2 <= rx2 and iy2 <= ry2
+
+    def redraw(self):
+        """重绘图像 (基于视口裁剪优化)"""
+        if not self.original_image: return
+        
+        # 1. 计算需要渲染的影像区域 (Image Coords)
+        # 在可视区域外多渲染 RENDER_MARGIN 像素，平移时只需移动图像项
+        ix1, iy1, ix2, iy2 = self._view_region(RENDER_MARGIN)
         
         if ix2 <= ix1 or iy2 <= iy1:
-            self.canvas.delete("img") 
             # 图像完全不可见
+            self.canvas.delete("img")
+            self.img_item = None
+            self.render_region = None
             return
 
-        # 2. Crop
+        # 2. Crop -> Resize (快速: NEAREST)
         try:
-            # 只有当缩放比例很大时（查看细节），Crop 才有意义
-            # 如果缩放比例很小（查看全图），全图 Resize
-            
-            # 为了平滑，我们简单地总是:
-            # - 如果 scale < 1.0 (缩小): Resize 全图 (缓存?) -> Crop (其实不用 crop，直接放)
-            # - 如果 scale >= 1.0 (放大): Crop ROI -> Resize -> Put
-            
-            # 但这里为了代码简单且健壮：
-            # 总是 Crop visible ROI -> Resize to target screen size
-            
-            roi = self.original_image.crop((ix1, iy1, ix2, iy2))
-            
-            # 目标显示大小
-            # ROI width in image = (ix2 - ix1)
-            # ROI width in screen = (ix2 - ix1) * scale
-            # 但要注意 pixel alignment，可能会有细微抖动
-            
-            target_w = int((ix2 - ix1) * self.scale) + 1 # +1 避免缝隙
-            target_h = int((iy2 - iy1) * self.scale) + 1
-            
-            # 避免 target 尺寸过大 (比如极度放大)
-            # PIL resize limite check? usually fine.
-            
-            disp_img = roi.resize((target_w, target_h), Image.Resampling.NEAREST)
+            disp_img = render_region(self.original_image, (ix1, iy1, ix2, iy2), self.scale)
             self.photo_image = ImageTk.PhotoImage(disp_img)
             
-            # 放置位置
-            # image (ix1, iy1) -> canvas ? 
+            # 放置位置: image (ix1, iy1) -> canvas
             dest_x, dest_y = self.image_to_canvas(ix1, iy1)
             
-            self.canvas.delete("img")
-            self.canvas.create_image(dest_x, dest_y, anchor='nw', image=self.photo_image, tags="img")
+            if self.img_item is None:
+                self.img_item = self.canvas.create_image(
+                    dest_x, dest_y, anchor='nw', image=self.photo_image, tags="img"
+                )
+            else:
+                self.canvas.coords(self.img_item, dest_x, dest_y)
+                self.canvas.itemconfig(self.img_item, image=self.photo_image)
+            self.render_region = (ix1, iy1, ix2, iy2, self.scale)
+            self.render_gen += 1
+            self._schedule_refine()
             
             # 将图像置于底层
             self.canvas.tag_lower("img")
@@ -598,11 +700,81 @@ class ImageCropApp:
         except Exception as e:
             print(f"Redraw error: {e}")
 
+    def _schedule_refine(self):
+        """交互停止 REFINE_DELAY_MS 后进行高质量重采样 (重复调用会推迟)"""
+        if self.refine_after_id is not None:
+            self.root.after_cancel(self.refine_after_id)
+            self.refine_after_id = None
+        if self.render_quality.get() != 'high': return
+        if refine_resample(self.scale) is None: return
+        self.refine_after_id = self.root.after(REFINE_DELAY_MS, self._start_refine)
+
+    def _start_refine(self):
+        """在后台线程中执行高质量重采样"""
+        self.refine_after_id = None
+        if not self.render_region: return
+        
+        gen = self.render_gen
+        ix1, iy1, ix2, iy2, scale = self.render_region
+        image = self.original_image
+        resample = refine_resample(scale)
+        
+        def worker():
+            try:
+                result = render_region(image, (ix1, iy1, ix2, iy2), scale, resample)
+            except Exception as e:
+                print(f"Refine error: {e}")
+                result = None
+            self.refine_queue.put((gen, result))
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.refine_pending += 1
+        if self.refine_pending == 1:
+            self.root.after(REFINE_POLL_MS, self._poll_refine)
+
+    def _poll_refine(self):
+        """在主线程中取回重采样结果 (Tk 对象只能在主线程创建)"""
+        while True:
+            try:
+                gen, result = self.refine_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.refine_pending -= 1
+            
+            # 渲染已更新 (缩放/重新渲染/切换文件) 时丢弃过期结果
+            if result is None or gen != self.render_gen or self.img_item is None:
+                continue
+            self.photo_image = ImageTk.PhotoImage(result)
+            self.canvas.itemconfig(self.img_item, image=self.photo_image)
+        
+        if self.refine_pending > 0:
+            self.root.after(REFINE_POLL_MS, self._poll_refine)
+
+    def _ensure_crop_items(self):
+        """创建常驻的裁剪框和手柄画布项 (初始隐藏)"""
+        if self.rect_id is not None: return
+        self.rect_id = self.canvas.create_rectangle(
+            0, 0, 0, 0, outline='#00FF00', width=2,
+            state='hidden', tags="crop_rect"
+        )
+        for name in ('nw', 'ne', 'sw', 'se'):
+            self.handle_ids[name] = self.canvas.create_rectangle(
+                0, 0, 0, 0, fill='#00FF00', outline='#FFFFFF', width=1,
+                state='hidden', tags="crop_handle"
+            )
+
+    def _hide_crop_overlay(self):
+        """隐藏裁剪框、手柄和尺寸标签"""
+        self.canvas.itemconfig("crop_rect", state='hidden')
+        self.canvas.itemconfig("crop_handle", state='hidden')
+        self.dim_label.place_forget()
+
     def draw_crop_rect(self):
-        """绘制裁剪框和手柄"""
-        self.canvas.delete("crop_rect")
-        self.canvas.delete("crop_handle")
-        if not self.crop_bounds: return
+        """更新裁剪框和手柄 (仅修改覆盖层坐标，不触碰图像层)"""
+        self._ensure_crop_items()
+        if not self.crop_bounds:
+            self._hide_crop_overlay()
+            return
         
         bx, by, bw, bh = self.crop_bounds
         
@@ -611,22 +783,19 @@ class ImageCropApp:
         cx2, cy2 = self.image_to_canvas(bx + bw, by + bh)
         
         # 主框
-        self.rect_id = self.canvas.create_rectangle(
-            cx1, cy1, cx2, cy2, 
-            outline='#00FF00', width=2, tags="crop_rect"
-        )
+        self.canvas.coords(self.rect_id, cx1, cy1, cx2, cy2)
+        self.canvas.itemconfig(self.rect_id, state='normal')
         
-        # 绘制四角手柄
+        # 四角手柄
         hs = HANDLE_SIZE
-        handles = [
-            ('nw', cx1, cy1), ('ne', cx2, cy1),
-            ('sw', cx1, cy2), ('se', cx2, cy2)
-        ]
-        for name, hx, hy in handles:
-            self.canvas.create_rectangle(
-                hx - hs, hy - hs, hx + hs, hy + hs,
-                fill='#00FF00', outline='#FFFFFF', width=1, tags="crop_handle"
-            )
+        handles = {
+            'nw': (cx1, cy1), 'ne': (cx2, cy1),
+            'sw': (cx1, cy2), 'se': (cx2, cy2)
+        }
+        for name, (hx, hy) in handles.items():
+            item = self.handle_ids[name]
+            self.canvas.coords(item, hx - hs, hy - hs, hx + hs, hy + hs)
+            self.canvas.itemconfig(item, state='normal')
         
         # 绘制尺寸信息标签 (智能定位)
         dim_text = f"{bw} × {bh}"
@@ -687,20 +856,10 @@ class ImageCropApp:
         ix, iy = int(ix), int(iy)
         
         if 0 <= ix < self.img_width and 0 <= iy < self.img_height:
-            # RGB 取值
-            try:
-                # 为了性能，不应该每次 move 都去 crop original，但对于单个像素还可以
-                pixel = self.original_image.getpixel((ix, iy))
-                if isinstance(pixel, int): # Grayscale
-                    self.rgb_label.config(text=f"Gray: {pixel}")
-                    self.canvas.config(cursor='crosshair')
-                else:
-                    if len(pixel) >= 3:
-                        self.rgb_label.config(text=f"R: {pixel[0]:<3} G: {pixel[1]:<3} B: {pixel[2]:<3}")
-                    else:
-                        self.rgb_label.config(text=f"Val: {pixel}")
-            except Exception:
-                self.rgb_label.config(text="R: -  G: -  B: -")
+            # 像素取值 (节流: 每个显示帧最多读取一次)
+            self.probe_pos = (ix, iy)
+            if self.probe_after_id is None:
+                self.probe_after_id = self.root.after(PROBE_INTERVAL_MS, self._update_pixel_value)
             
             # 光标反馈：检测手柄/裁剪框
             handle = self._get_handle_at(mx, my)
@@ -719,10 +878,49 @@ class ImageCropApp:
                 gx, gy = self._pixel_to_geo(ix, iy)
                 self.pos_label.config(text=f"Lon: {gx:.6f}\nLat: {gy:.6f}")
         else:
+            self.probe_pos = None
             self.rgb_label.config(text="R: -  G: -  B: -")
+            self.spectrum_canvas.itemconfig(self.spectrum_line, state='hidden')
             self.pos_label.config(text="超出范围")
             self.canvas.config(cursor='arrow')
 
+    def _update_pixel_value(self):
+        """显示光标处的像素值 (有 GDAL 数据集时读取源数据所有波段)"""
+        self.probe_after_id = None
+        if self.probe_pos is None: return
+        ix, iy = self.probe_pos
+        
+        try:
+            if self.pixel_probe:
+                from .pixel_probe import format_pixel_values, spectrum_coords
+                values = self.pixel_probe.probe(ix, iy)
+                if values is None: return
+                self.rgb_label.config(text=format_pixel_values(values))
+                
+                coords = spectrum_coords(
+                    values, self.spectrum_canvas.winfo_width(),
+                    self.spectrum_canvas.winfo_height(),
+                    nodata=self.pixel_probe.nodata[0]
+                )
+                if coords:
+                    self.spectrum_canvas.coords(self.spectrum_line, *coords)
+                    self.spectrum_canvas.itemconfig(self.spectrum_line, state='normal')
+                else:
+                    self.spectrum_canvas.itemconfig(self.spectrum_line, state='hidden')
+                return
+            
+            # PIL 回退: 显示值
+            self.spectrum_canvas.itemconfig(self.spectrum_line, state='hidden')
+            pixel = self.original_image.getpixel((ix, iy))
+            if isinstance(pixel, int): # Grayscale
+                self.rgb_label.config(text=f"Gray: {pixel}")
+            elif len(pixel) >= 3:
+                self.rgb_label.config(text=f"R: {pixel[0]:<3} G: {pixel[1]:<3} B: {pixel[2]:<3}")
+            else:
+                self.rgb_label.config(text=f"Val: {pixel}")
+        except Exception:
+            self.rgb_label.config(text="R: -  G: -  B: -")
+
     # --- 平移 ---
     def on_pan_start(self, event):
         self.dragging_pan = True
@@ -738,7 +936,13 @@ class ImageCropApp:
         self.offset_y += dy
         self.pan_start_x = event.x
         self.pan_start_y = event.y
-        self.redraw()
+        
+        # 缩放比例不变：直接移动已渲染的图像项，超出渲染边距时才重新渲染
+        if self._render_covers_view():
+            self.canvas.move("img", dx, dy)
+            self.draw_crop_rect()
+        else:
+            self.redraw()
 
     def on_pan_end(self, event):
         self.dragging_pan = False
@@ -804,11 +1008,9 @@ class ImageCropApp:
         self.crop_start_x = cx
         self.crop_start_y = cy
         
-        # 移除旧框和尺寸标签
+        # 隐藏旧框和尺寸标签
         self.crop_bounds = None
-        self.canvas.delete("crop_rect")
-        self.canvas.delete("crop_handle")
-        self.dim_label.place_forget()
+        self._hide_crop_overlay()
 
     def on_crop_drag(self, event):
         cx, cy = event.x, event.y
@@ -831,7 +1033,7 @@ class ImageCropApp:
             new_y = max(0, min(new_y, self.img_height - oh))
             
             self.crop_bounds = (new_x, new_y, ow, oh)
-            self.redraw()
+            self.draw_crop_rect()
             return
             
         if self.crop_drag_mode == 'resize' and self.drag_start_bounds:
@@ -855,18 +1057,15 @@ class ImageCropApp:
                 nh = max(10, oh - dy)
             
             self.crop_bounds = (int(nx), int(ny), int(nw), int(nh))
-            self.redraw()
+            self.draw_crop_rect()
             return
         
         if not self.dragging_crop: return
         
-        # 绘制临时框 (Canvas coords)
-        self.canvas.delete("crop_rect")
-        self.canvas.delete("crop_handle")
-        self.canvas.create_rectangle(
-            self.crop_start_x, self.crop_start_y, cx, cy,
-            outline='#00FF00', width=2, tags="crop_rect"
-        )
+        # 绘制临时框 (Canvas coords)，复用常驻的裁剪框画布项
+        self._ensure_crop_items()
+        self.canvas.coords(self.rect_id, self.crop_start_x, self.crop_start_y, cx, cy)
+        self.canvas.itemconfig(self.rect_id, state='normal')
         
         # 实时显示尺寸 (智能定位)
         ix1, iy1 = self.canvas_to_image(self.crop_start_x, self.crop_start_y)
@@ -916,13 +1115,12 @@ class ImageCropApp:
         # 约束有效性
         if w < 1 or h < 1:
             self.crop_bounds = None
-            self.canvas.delete("crop_rect")
-            self.dim_label.place_forget()
+            self._hide_crop_overlay()
             return
             
         # 存为整数像素
         self.crop_bounds = (int(x), int(y), int(w), int(h))
-        self.redraw() # 重绘以修正框的位置到整数像素网格
+        self.draw_crop_rect() # 修正框的位置到整数像素网格
         self.update_crop_inputs()
 
     def update_crop_inputs(self):
@@ -1014,7 +1212,7 @@ class ImageCropApp:
                 h = abs(p2_y - p1_y)
                 self.crop_bounds = (int(x), int(y), int(w), int(h))
             
-            self.redraw()
+            self.draw_crop_rect()
             
         except ValueError:
             messagebox.showwarning("错误", "请输入有效的数字")
@@ -1033,15 +1231,18 @@ class ImageCropApp:
         ny = max(0, min(ny, self.img_height - h))
         
         self.crop_bounds = (nx, ny, w, h)
-        self.redraw()
+        self.draw_crop_rect()
         self.update_crop_inputs()
 
     def reset_crop(self):
         self.crop_bounds = None
-        self.redraw()
+        self.draw_crop_rect()
         for v in self.entries.values(): v.delete(0, limited_tk.END)
 
     def save_crop(self):
+        if self.save_job is not None:
+            messagebox.showinfo("提示", "正在保存，请稍候")
+            return
         if not self.crop_bounds:
             messagebox.showinfo("提示", "请先选择裁剪区域")
             return
@@ -1052,22 +1253,112 @@ class ImageCropApp:
         )
         if not out_path: return
         
+        # 优先使用 GDAL 裁剪以保留元数据，在后台线程执行避免界面卡死
+        from .crop_core import crop_by_pixel
+        from .utils import CancelToken, CropCancelledError
+        
         x, y, w, h = self.crop_bounds
+        input_path = self.current_file
+        token = CancelToken()
+        events = queue.Queue()
         
-        try:
-            # 优先使用 GDAL 裁剪以保留元数据
-            from .crop_core import crop_by_pixel
-            if crop_by_pixel(self.current_file, out_path, x, y, w, h):
+        def worker():
+            try:
+                ok = crop_by_pixel(
+                    input_path, out_path, x, y, w, h,
+                    progress_callback=lambda done, total: events.put(('progress', done, total)),
+                    cancel_token=token
+                )
+                events.put(('done', ok))
+            except CropCancelledError:
+                events.put(('cancelled',))
+            except Exception as e:
+                events.put(('error', e))
+        
+        self.save_job = {
+            'token': token, 'events': events,
+            'out_path': out_path, 'bounds': (x, y, w, h),
+        }
+        self._show_save_progress()
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(SAVE_POLL_MS, self._poll_save)
+
+    def _show_save_progress(self):
+        """显示保存进度对话框 (进度条 + 取消按钮)"""
+        dlg = limited_tk.Toplevel(self.root)
+        dlg.title("保存裁剪")
+        dlg.transient(self.root)
+        dlg.resizable(False, False)
+        dlg.protocol('WM_DELETE_WINDOW', self._cancel_save)
+        
+        frame = ttk.Frame(dlg, padding=12)
+        frame.pack(fill=limited_tk.BOTH, expand=True)
+        
+        label = ttk.Label(frame, text=f"正在保存: {os.path.basename(self.save_job['out_path'])}")
+        label.pack(anchor='w', pady=(0, 8))
+        bar = ttk.Progressbar(frame, orient=limited_tk.HORIZONTAL, length=320, mode='determinate', maximum=100)
+        bar.pack(fill=limited_tk.X)
+        cancel_btn = ttk.Button(frame, text="取消", command=self._cancel_save)
+        cancel_btn.pack(anchor='e', pady=(10, 0))
+        
+        self.save_job.update(dialog=dlg, label=label, bar=bar, cancel_btn=cancel_btn)
+
+    def _cancel_save(self):
+        """请求取消后台保存 (在下一个数据块之间生效)"""
+        if self.save_job is None: return
+        self.save_job['token'].cancel()
+        self.save_job['label'].config(text="正在取消...")
+        self.save_job['cancel_btn'].config(state='disabled')
+
+    def _poll_save(self):
+        """在主线程中处理后台保存的进度与结果"""
+        job = self.save_job
+        if job is None: return
+        
+        result = None
+        while True:
+            try:
+                event = job['events'].get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                _, done, total = event
+                job['bar']['value'] = done * 100.0 / total if total else 0
+            else:
+                result = event
+        
+        if result is None:
+            self.root.after(SAVE_POLL_MS, self._poll_save)
+            return
+        
+        job['dialog'].destroy()
+        self.save_job = None
+        out_path = job['out_path']
+        
+        if result[0] == 'done':
+            if result[1]:
                 messagebox.showinfo("成功", "裁剪并保存成功！")
             else:
                 # Fallback
-                crp = self.original_image.crop((x, y, x+w, y+h))
-                crp.save(out_path)
-                messagebox.showinfo("成功", f"保存成功 (PIL模式)\n{out_path}")
-        except Exception as e:
-            messagebox.showerror("失败", f"保存出错: {e}")
+                x, y, w, h = job['bounds']
+                try:
+                    crp = self.original_image.crop((x, y, x+w, y+h))
+                    crp.save(out_path)
+                    messagebox.showinfo("成功", f"保存成功 (PIL模式)\n{out_path}")
+                except Exception as e:
+                    messagebox.showerror("失败", f"保存出错: {e}")
+        elif result[0] == 'cancelled':
+            self.status_var.set("保存已取消")
+        else:
+            messagebox.showerror("失败", f"保存出错: {result[1]}")
 
 def main():
+    from .utils import setup_logging, ensure_gdal_configured
+    setup_logging()
+    if GDAL_AVAILABLE:
+        # 打开第一幅影像前完成GDAL配置（中文路径、异常模式、运行参数配置）
+        ensure_gdal_configured()
+    
     root = limited_tk.Tk()
     app = ImageCropApp(root)
     root.mainloop()
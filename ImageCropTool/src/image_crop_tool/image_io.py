@@ -6,14 +6,20 @@
 提供影像打开、读取、创建和保存功能。
 """
 
-from typing import Dict, Any, Optional, Tuple, List
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple, List, NamedTuple, Sequence, Iterator
 from osgeo import gdal, osr
 import numpy as np
 
 from .utils import (
-    logger, normalize_path, validate_file_exists, ensure_dir,
-    GDALError, FileNotFoundError
+    logger, normalize_path, validate_file_exists, ensure_dir, is_vsi_path,
+    ensure_gdal_configured, GDALError, FileNotFoundError
 )
+from .vsi import resolve_input_path, vsi_exists, vsi_open_options
 
 
 # 支持的数据类型映射
@@ -32,6 +38,10 @@ def open_raster(file_path: str, mode: int = gdal.GA_ReadOnly) -> gdal.Dataset:
     """
     打开栅格文件
     
+    支持GDAL虚拟路径（/vsizip/、/vsitar/、/vsigzip/、/vsimem/ 等）；本地或URL上的
+    压缩包（.zip、.tar、.tar.gz、.tgz、.gz）按 vsi.resolve_input_path 转换为虚拟路径，
+    压缩包中只有一个影像文件时自动选择，否则需先用 resolve_input_path 指定成员。
+    
     Args:
         file_path: 影像文件路径
         mode: 打开模式，gdal.GA_ReadOnly 或 gdal.GA_Update
@@ -41,13 +51,22 @@ def open_raster(file_path: str, mode: int = gdal.GA_ReadOnly) -> gdal.Dataset:
     
     Raises:
         FileNotFoundError: 文件不存在
+        ImageCropError: 压缩包成员无法确定
         GDALError: GDAL打开失败
     """
-    path = normalize_path(file_path)
-    validate_file_exists(path)
+    ensure_gdal_configured()
+    # 先按原始输入识别压缩包（URL 上的压缩包需在转换为 /vsicurl/ 前识别）；
+    # 网络读取选项由 resolve_input_path 在首次访问网络前设置
+    path = normalize_path(resolve_input_path(file_path))
+    if is_vsi_path(path):
+        if not vsi_exists(path):
+            raise FileNotFoundError(f"文件不存在: {path}")
+    else:
+        validate_file_exists(path)
     
     try:
-        dataset = gdal.Open(path, mode)
+        with vsi_open_options(path):
+            dataset = gdal.Open(path, mode)
         if dataset is None:
             raise GDALError(f"GDAL无法打开文件: {path}")
         logger.info(f"成功打开影像: {path}")
@@ -123,6 +142,7 @@ def create_raster(
     Raises:
         GDALError: 创建失败
     """
+    ensure_gdal_configured()
     path = normalize_path(output_path)
     ensure_dir(path)
     
@@ -162,6 +182,67 @@ def create_raster(
         raise GDALError(f"创建影像失败: {e}")
 
 
+def write_raster(
+    output_path: str,
+    data: np.ndarray,
+    dtype: int,
+    driver_name: str = 'GTiff',
+    geotransform: Optional[Tuple] = None,
+    projection: Optional[str] = None,
+    nodata: Optional[float] = None,
+    options: Optional[List[str]] = None
+) -> None:
+    """
+    将内存中的数组一次写出为栅格文件
+    
+    不支持直接创建的驱动（如PNG、JPEG）先写入MEM数据集，再用 CreateCopy 输出。
+    
+    Args:
+        output_path: 输出文件路径
+        data: 形状为 (波段数, 行数, 列数) 的数组
+        dtype: GDAL数据类型
+        driver_name: 驱动名称（默认GeoTIFF）
+        geotransform: 仿射变换参数
+        projection: 投影信息
+        nodata: NoData值
+        options: 创建选项（None时使用 create_raster 的默认选项）
+    
+    Raises:
+        GDALError: 写出失败
+    """
+    driver = gdal.GetDriverByName(driver_name)
+    if driver is None:
+        raise GDALError(f"不支持的驱动类型: {driver_name}")
+    
+    bands, height, width = data.shape
+    
+    if driver.GetMetadataItem(gdal.DCAP_CREATE) == 'YES':
+        with created_raster(output_path, width, height, bands, dtype, driver_name,
+                            geotransform, projection, nodata, options) as dataset:
+            for i in range(bands):
+                write_band_data(dataset, i + 1, data[i])
+        return
+    
+    mem_ds = gdal.GetDriverByName('MEM').Create('', width, height, bands, dtype)
+    if geotransform:
+        mem_ds.SetGeoTransform(geotransform)
+    if projection:
+        mem_ds.SetProjection(projection)
+    for i in range(bands):
+        band = mem_ds.GetRasterBand(i + 1)
+        if nodata is not None:
+            band.SetNoDataValue(nodata)
+        band.WriteArray(data[i])
+    
+    path = normalize_path(output_path)
+    ensure_dir(path)
+    dataset = driver.CreateCopy(path, mem_ds, 0, options or [])
+    if dataset is None:
+        raise GDALError(f"无法创建文件: {path}")
+    close_raster(dataset)
+    logger.debug(f"成功写出影像: {path}")
+
+
 def read_band_data(
     dataset: gdal.Dataset,
     band_index: int,
@@ -218,17 +299,148 @@ def write_band_data(
 
 def close_raster(dataset: gdal.Dataset) -> None:
     """
-    安全关闭数据集
+    关闭数据集，释放文件句柄和缓存的数据块
+    
+    GDAL 3.8 及以上调用 Close() 立即释放，之后再使用该对象（包括其波段对象）会抛出异常；
+    较低版本只能刷新缓存，句柄在最后一个引用被回收时才关闭，调用方须同时丢弃自己的引用
+    （使用 opened_raster / created_raster 时由上下文管理器负责）。
     
     Args:
         dataset: GDAL Dataset对象
     """
     if dataset:
-        dataset.FlushCache()
-        dataset = None
+        close = getattr(dataset, 'Close', None)
+        if close is not None:
+            close()
+        else:
+            dataset.FlushCache()
         logger.debug("数据集已关闭")
 
 
+@contextmanager
+def raster_closing(dataset: gdal.Dataset) -> Iterator[gdal.Dataset]:
+    """
+    在 with 块结束时关闭已打开的数据集（类似 contextlib.closing）
+    
+    Args:
+        dataset: GDAL Dataset对象
+    
+    Yields:
+        同一个数据集
+    """
+    try:
+        yield dataset
+    finally:
+        close_raster(dataset)
+        del dataset
+
+
+@contextmanager
+def opened_raster(file_path: str, mode: int = gdal.GA_ReadOnly) -> Iterator[gdal.Dataset]:
+    """
+    打开栅格文件，with 块结束时关闭
+    
+    Args:
+        file_path: 影像文件路径
+        mode: 打开模式，gdal.GA_ReadOnly 或 gdal.GA_Update
+    
+    Yields:
+        GDAL Dataset对象
+    
+    Raises:
+        FileNotFoundError: 文件不存在
+        GDALError: GDAL打开失败
+    """
+    with raster_closing(open_raster(file_path, mode)) as dataset:
+        yield dataset
+
+
+@contextmanager
+def created_raster(output_path: str, *args, **kwargs) -> Iterator[gdal.Dataset]:
+    """
+    创建栅格文件，with 块结束时写出并关闭
+    
+    Args:
+        output_path: 输出文件路径
+        *args, **kwargs: 其余参数同 create_raster
+    
+    Yields:
+        GDAL Dataset对象
+    
+    Raises:
+        GDALError: 创建失败
+    """
+    with raster_closing(create_raster(output_path, *args, **kwargs)) as dataset:
+        yield dataset
+
+
+def delete_raster(file_path: str, driver_name: str = 'GTiff') -> None:
+    """
+    删除栅格文件（包括驱动生成的附属文件）
+    
+    Args:
+        file_path: 影像文件路径
+        driver_name: 驱动名称
+    """
+    path = normalize_path(file_path)
+    driver = gdal.GetDriverByName(driver_name)
+    try:
+        if driver is not None:
+            driver.Delete(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        logger.debug(f"已删除影像: {path}")
+    except Exception as e:
+        logger.warning(f"删除影像失败: {path}, {e}")
+
+
+def read_vsi_file(path: str, unlink: bool = True) -> bytes:
+    """
+    读取GDAL虚拟文件（如 /vsimem/）的全部内容
+    
+    Args:
+        path: 虚拟文件路径
+        unlink: 读取后是否删除该文件（释放内存）
+    
+    Returns:
+        文件内容
+    
+    Raises:
+        GDALError: 读取失败
+    """
+    stat = gdal.VSIStatL(path)
+    if stat is None:
+        raise GDALError(f"虚拟文件不存在: {path}")
+    
+    f = gdal.VSIFOpenL(path, 'rb')
+    if f is None:
+        raise GDALError(f"无法打开虚拟文件: {path}")
+    try:
+        data = gdal.VSIFReadL(1, stat.size, f)
+    finally:
+        gdal.VSIFCloseL(f)
+        if unlink:
+            gdal.Unlink(path)
+    return data
+
+
+def copy_band_metadata(src_band: gdal.Band, dst_band: gdal.Band) -> None:
+    """
+    复制单个波段的元数据（NoData值、描述、颜色解释）
+    
+    Args:
+        src_band: 源波段
+        dst_band: 目标波段
+    """
+    nodata = src_band.GetNoDataValue()
+    if nodata is not None:
+        dst_band.SetNoDataValue(nodata)
+    description = src_band.GetDescription()
+    if description:
+        dst_band.SetDescription(description)
+    dst_band.SetColorInterpretation(src_band.GetColorInterpretation())
+
+
 def copy_raster_metadata(
     src_dataset: gdal.Dataset,
     dst_dataset: gdal.Dataset,
@@ -255,3 +467,271 @@ def copy_raster_metadata(
                 dst_band.SetNoDataValue(nodata)
     
     logger.debug("元数据复制完成")
+
+
+# ============== 内存映射读取（未压缩影像） ==============
+
+class RawBandLayout(NamedTuple):
+    """未压缩波段在文件中的布局"""
+    offset: int         # 首像素的字节偏移
+    pixel_stride: int   # 相邻像素的字节间隔
+    line_stride: int    # 相邻行的字节间隔
+
+
+class MappedRaster:
+    """
+    未压缩影像的内存映射
+    
+    裁剪窗口以 NumPy 只读视图的形式返回，数据直接来自操作系统页缓存，不经过GDAL块缓存、不复制。
+    视图引用映射本身，close() 之后已返回的视图仍然有效。
+    """
+    
+    def __init__(self, path: str, dtype: np.dtype, width: int, height: int,
+                 layouts: Sequence[RawBandLayout]):
+        """
+        Args:
+            path: 数据文件路径
+            dtype: 像素类型（本机字节序）
+            width: 影像宽度
+            height: 影像高度
+            layouts: 各波段布局（按波段号顺序）
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.height = height
+        self.layouts = list(layouts)
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+    
+    def window(self, band_index: int, x_off: int, y_off: int, x_size: int, y_size: int) -> np.ndarray:
+        """
+        单个波段窗口的只读视图
+        
+        Args:
+            band_index: 波段号（从1开始）
+            x_off: X方向偏移
+            y_off: Y方向偏移
+            x_size: 宽度
+            y_size: 高度
+        
+        Returns:
+            形状为 (y_size, x_size) 的只读视图
+        """
+        layout = self.layouts[band_index - 1]
+        offset = layout.offset + y_off * layout.line_stride + x_off * layout.pixel_stride
+        return np.ndarray((y_size, x_size), self.dtype, buffer=self._map, offset=offset,
+                          strides=(layout.line_stride, layout.pixel_stride))
+    
+    def window_bands(self, band_list: Sequence[int], x_off: int, y_off: int,
+                     x_size: int, y_size: int) -> np.ndarray:
+        """
+        多个波段窗口，形状为 (波段数, 行数, 列数)
+        
+        波段在文件中等间隔排列时（像素交错、按行交错、按波段顺序存储，且波段号递增）返回视图，否则复制。
+        """
+        layouts = [self.layouts[b - 1] for b in band_list]
+        steps = {b.offset - a.offset for a, b in zip(layouts, layouts[1:])}
+        first = layouts[0]
+        uniform = all((l.pixel_stride, l.line_stride) == (first.pixel_stride, first.line_stride)
+                      for l in layouts)
+        if uniform and (len(layouts) == 1 or (len(steps) == 1 and min(steps) > 0)):
+            band_step = steps.pop() if steps else 0
+            offset = first.offset + y_off * first.line_stride + x_off * first.pixel_stride
+            return np.ndarray((len(band_list), y_size, x_size), self.dtype, buffer=self._map,
+                              offset=offset, strides=(band_step, first.line_stride, first.pixel_stride))
+        return np.stack([self.window(b, x_off, y_off, x_size, y_size) for b in band_list])
+    
+    def close(self) -> None:
+        """释放映射（已返回的视图仍持有引用，直到被回收）"""
+        self._map = None
+    
+    def __enter__(self) -> 'MappedRaster':
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _native_order(little_endian: bool) -> bool:
+    """文件字节序是否与本机一致（不一致时无法零拷贝交给GDAL写出）"""
+    return little_endian == (sys.byteorder == 'little')
+
+
+def _gtiff_layouts(dataset: gdal.Dataset, item_size: int) -> Optional[List[RawBandLayout]]:
+    """未压缩、条带存储且条带连续的GeoTIFF的波段布局"""
+    if dataset.GetMetadataItem('COMPRESSION', 'IMAGE_STRUCTURE') not in (None, 'NONE'):
+        return None
+    band1 = dataset.GetRasterBand(1)
+    if band1.GetMetadataItem('NBITS', 'IMAGE_STRUCTURE'):
+        return None
+    block_w, block_h = band1.GetBlockSize()
+    width, height, count = dataset.RasterXSize, dataset.RasterYSize, dataset.RasterCount
+    if block_w != width:
+        return None
+    
+    path = dataset.GetFileList()[0]
+    with open(path, 'rb') as f:
+        order = f.read(2)
+    if order not in (b'II', b'MM') or not _native_order(order == b'II'):
+        return None
+    
+    interleave = dataset.GetMetadataItem('INTERLEAVE', 'IMAGE_STRUCTURE') or 'BAND'
+    pixel_interleaved = count > 1 and interleave == 'PIXEL'
+    samples = count if pixel_interleaved else 1
+    row_bytes = width * samples * item_size
+    strips = (height + block_h - 1) // block_h
+    
+    def first_offset(band: gdal.Band) -> Optional[int]:
+        """条带首尾相接时返回首个条带的偏移"""
+        expected = None
+        first = None
+        for i in range(strips):
+            offset = band.GetMetadataItem(f'BLOCK_OFFSET_0_{i}', 'TIFF')
+            size = band.GetMetadataItem(f'BLOCK_SIZE_0_{i}', 'TIFF')
+            rows = min(block_h, height - i * block_h)
+            if not offset or not size or int(size) != rows * row_bytes:
+                return None
+            if expected is not None and int(offset) != expected:
+                return None
+            first = int(offset) if first is None else first
+            expected = int(offset) + int(size)
+        return first
+    
+    if pixel_interleaved:
+        base = first_offset(band1)
+        if base is None:
+            return None
+        return [RawBandLayout(base + i * item_size, samples * item_size, row_bytes)
+                for i in range(count)]
+    
+    layouts = []
+    for i in range(1, count + 1):
+        base = first_offset(dataset.GetRasterBand(i))
+        if base is None:
+            return None
+        layouts.append(RawBandLayout(base, item_size, row_bytes))
+    return layouts
+
+
+def _envi_layouts(dataset: gdal.Dataset, item_size: int) -> Optional[List[RawBandLayout]]:
+    """ENVI 原始格式的波段布局（按 .hdr 中的偏移、交错方式和字节序）"""
+    files = dataset.GetFileList()
+    headers = [f for f in files if f.lower().endswith('.hdr')]
+    if not headers:
+        return None
+    
+    header = {}
+    with open(headers[0], 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if '=' in line:
+                key, value = line.split('=', 1)
+                header[key.strip().lower()] = value.strip().lower()
+    if header.get('file compression', '0') != '0':
+        return None
+    if not _native_order(header.get('byte order', '0') == '0'):
+        return None
+    
+    width, height, count = dataset.RasterXSize, dataset.RasterYSize, dataset.RasterCount
+    base = int(header.get('header offset', '0'))
+    interleave = header.get('interleave', 'bsq')
+    if interleave == 'bsq':
+        return [RawBandLayout(base + i * width * height * item_size, item_size, width * item_size)
+                for i in range(count)]
+    if interleave == 'bil':
+        return [RawBandLayout(base + i * width * item_size, item_size, count * width * item_size)
+                for i in range(count)]
+    if interleave == 'bip':
+        return [RawBandLayout(base + i * item_size, count * item_size, count * width * item_size)
+                for i in range(count)]
+    return None
+
+
+# 支持内存映射的驱动及其布局解析函数
+RAW_LAYOUT_DRIVERS = {
+    'GTiff': _gtiff_layouts,
+    'ENVI': _envi_layouts,
+}
+
+# 布局解析结果缓存（按文件路径、修改时间和大小），常驻服务反复裁剪同一文件时无需重新校验条带
+LAYOUT_CACHE_SIZE = 64
+_layout_cache: 'OrderedDict[Tuple, Optional[List[RawBandLayout]]]' = OrderedDict()
+_layout_cache_lock = threading.Lock()
+
+
+def raw_layouts(dataset: gdal.Dataset) -> Optional[Tuple[str, np.dtype, List[RawBandLayout]]]:
+    """
+    检测未压缩的原始布局影像，返回数据文件、像素类型和各波段布局（不建立映射）
+    
+    只读取判断布局所需的元数据（TIFF条带偏移和字节序标记、ENVI .hdr），结果按文件缓存。
+    
+    Args:
+        dataset: 只读打开的GDAL Dataset对象
+    
+    Returns:
+        (数据文件路径, 像素类型, 各波段布局)，不支持内存映射时返回None
+    """
+    parse = RAW_LAYOUT_DRIVERS.get(dataset.GetDriver().ShortName)
+    if parse is None or dataset.RasterCount == 0:
+        return None
+    
+    dtypes = {dataset.GetRasterBand(i).DataType for i in range(1, dataset.RasterCount + 1)}
+    if len(dtypes) != 1 or next(iter(dtypes)) not in GDAL_DTYPE_MAP:
+        return None
+    dtype = np.dtype(GDAL_DTYPE_MAP[dtypes.pop()])
+    
+    files = dataset.GetFileList() or []
+    if not files or files[0].startswith('/vsi') or not os.path.isfile(files[0]):
+        return None
+    
+    try:
+        stat = os.stat(files[0])
+        width, height = dataset.RasterXSize, dataset.RasterYSize
+        key = (files[0], stat.st_mtime_ns, stat.st_size, width, height, dataset.RasterCount)
+        with _layout_cache_lock:
+            cached = key in _layout_cache
+            layouts = _layout_cache.get(key)
+        if not cached:
+            layouts = parse(dataset, dtype.itemsize)
+            with _layout_cache_lock:
+                _layout_cache[key] = layouts
+                while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+                    _layout_cache.popitem(last=False)
+    except (OSError, ValueError) as e:
+        logger.debug(f"无法解析原始布局: {files[0]}, {e}")
+        return None
+    if not layouts:
+        return None
+    # 最后一个像素必须位于文件内
+    end = max(l.offset + (height - 1) * l.line_stride + (width - 1) * l.pixel_stride
+              for l in layouts) + dtype.itemsize
+    if end > stat.st_size:
+        return None
+    return files[0], dtype, layouts
+
+
+def map_raster(dataset: gdal.Dataset) -> Optional[MappedRaster]:
+    """
+    检测未压缩的原始布局影像并建立内存映射
+    
+    支持未压缩、条带连续的GeoTIFF（像素交错或按波段存储）和 ENVI 原始格式（bsq/bil/bip）。
+    压缩、分块、位深非标准、字节序与本机不同或位于虚拟文件系统中的影像返回None，调用方按常规方式读取。
+    只需判断能否映射时使用 raw_layouts。
+    
+    Args:
+        dataset: 只读打开的GDAL Dataset对象
+    
+    Returns:
+        MappedRaster，不支持时返回None
+    """
+    layout = raw_layouts(dataset)
+    if layout is None:
+        return None
+    path, dtype, layouts = layout
+    try:
+        mapped = MappedRaster(path, dtype, dataset.RasterXSize, dataset.RasterYSize, layouts)
+    except (OSError, ValueError) as e:
+        logger.debug(f"无法建立内存映射: {path}, {e}")
+        return None
+    
+    logger.debug(f"使用内存映射读取: {path}")
+    return mapped
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 裁剪计时与I/O统计模块
+
+记录裁剪各阶段的耗时（打开、元数据、读取、转换、写入、刷新、关闭等）和I/O计数
+（读写字节数、涉及的源数据块数、GDAL块缓存占用峰值），
+每个阶段结束时把事件交给可插拔的回调，结束后可汇总为表格或JSON。
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from osgeo import gdal
+
+from .utils import logger
+
+
+# 事件回调: callback({'stage': 阶段名, 'seconds': 耗时, ...附加字段})
+MetricsCallback = Callable[[Dict[str, Any]], None]
+
+# 阶段的显示顺序与说明（写入阶段包含缓存换出块的压缩，剩余块在刷新/关闭时压缩）
+STAGES = {
+    'open': '打开影像',
+    'metadata': '读取元数据',
+    'trim': '查找有效范围',
+    'stats': '统计拉伸范围',
+    'create': '创建输出',
+    'prefetch': '预取数据块',
+    'read': '读取数据',
+    'convert': '数据转换',
+    'write': '写入数据',
+    'flush': '刷新缓存',
+    'close': '关闭数据集',
+}
+
+
+def count_blocks(band: gdal.Band, x_off: int, y_off: int, x_size: int, y_size: int) -> int:
+    """窗口涉及的源数据块数（每块需解码一次，除非已在块缓存中）"""
+    block_w, block_h = band.GetBlockSize()
+    cols = (x_off + x_size - 1) // block_w - x_off // block_w + 1
+    rows = (y_off + y_size - 1) // block_h - y_off // block_h + 1
+    return cols * rows
+
+
+class CropMetrics:
+    """
+    一次裁剪的计时与计数
+
+    阶段耗时按名称累加（如各行块的读取时间合计为 read）；
+    计数器按名称累加，峰值类指标取最大值。
+    """
+
+    def __init__(self, callback: Optional[MetricsCallback] = None):
+        """
+        Args:
+            callback: 每个阶段结束时调用的回调函数，None表示只汇总
+        """
+        self.callback = callback
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.peaks: Dict[str, int] = {}
+        self.total_seconds: Optional[float] = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[None]:
+        """
+        计时一个阶段
+
+        Args:
+            name: 阶段名称
+            **fields: 随事件传给回调的附加字段（如 band、rows、bytes）
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            if self.callback:
+                self.callback(dict(fields, stage=name, seconds=elapsed))
+
+    def count(self, **counters: int) -> None:
+        """累加计数器"""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def peak(self, **values: int) -> None:
+        """记录峰值"""
+        for key, value in values.items():
+            self.peaks[key] = max(self.peaks.get(key, 0), value)
+
+    def sample_gdal_cache(self) -> None:
+        """记录GDAL块缓存占用峰值（GDAL不提供缓存命中数，以占用量近似反映缓存压力）"""
+        self.peak(gdal_cache_peak_bytes=gdal.GetCacheUsed())
+
+    def finish(self) -> Dict[str, Any]:
+        """结束计时并返回汇总"""
+        self.total_seconds = time.perf_counter() - self._start
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        汇总为可JSON序列化的字典
+
+        Returns:
+            {'total_seconds': ..., 'stages': {阶段: 秒}, 'counters': {...}}
+        """
+        total = self.total_seconds
+        if total is None:
+            total = time.perf_counter() - self._start
+        counters = dict(self.counters)
+        counters.update(self.peaks)
+        counters['gdal_cache_max_bytes'] = gdal.GetCacheMax()
+        return {
+            'total_seconds': total,
+            'stages': dict(self.stages),
+            'counters': counters,
+        }
+
+    def format_report(self) -> str:
+        """按阶段输出耗时分解表"""
+        summary = self.summary()
+        total = summary['total_seconds'] or 1e-9
+        names = [n for n in STAGES if n in self.stages] + \
+                [n for n in self.stages if n not in STAGES]
+
+        lines = [f"{'stage':<10}{'ms':>12}{'%':>8}", '-' * 30]
+        for name in names:
+            seconds = self.stages[name]
+            lines.append(f"{name:<10}{seconds * 1000:>12.1f}{seconds / total:>8.1%}  {STAGES.get(name, '')}")
+        other = max(total - sum(self.stages.values()), 0.0)
+        lines.append(f"{'other':<10}{other * 1000:>12.1f}{other / total:>8.1%}  其他")
+        lines.append('-' * 30)
+        lines.append(f"{'total':<10}{total * 1000:>12.1f}")
+
+        counters = summary['counters']
+        lines.append('')
+        for key in sorted(counters):
+            value = counters[key]
+            if key.endswith('_bytes'):
+                lines.append(f"{key:<24}{value / 1024 / 1024:>12.2f} MB")
+            else:
+                lines.append(f"{key:<24}{value:>12}")
+        return '\n'.join(lines)
+
+
+def append_metrics_record(path: str, record: Dict[str, Any]) -> None:
+    """
+    将一条统计记录追加写入 JSON Lines 文件（--metrics-json，每次裁剪一行）
+
+    写入失败只记录警告，不影响裁剪结果。
+
+    Args:
+        path: 记录文件路径
+        record: CropMetrics.finish() 的汇总加上附加字段（如 input、output、success、error）
+    """
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError as e:
+        logger.warning(f"无法写入统计记录 {path}: {e}")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 像素探针模块
+
+读取光标处所有波段的原始像素值（16位/浮点等真实数据，而非拉伸后的显示值）。
+按块读取并缓存解码后的数据，鼠标在同一块内移动时无需再次访问GDAL。
+"""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from osgeo import gdal
+
+
+# 块缓存的默认上限（字节）；按字节而非块数限制，波段很多的影像也只占用较小的内存
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class PixelProbe:
+    """
+    基于块缓存的像素值读取器
+
+    以影像的自然块大小（不超过 tile_size）为单位读取全部波段，
+    最近使用的块保存在LRU缓存中，缓存总字节数超过上限时淘汰最久未用的块。
+    """
+
+    def __init__(
+        self,
+        dataset: gdal.Dataset,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        tile_size: int = 128
+    ):
+        """
+        Args:
+            dataset: GDAL Dataset对象
+            max_bytes: 块缓存的字节数上限（至少保留最近读取的一个块）
+            tile_size: 单个缓存块的最大边长（像素）
+        """
+        self.dataset = dataset
+        self.width = dataset.RasterXSize
+        self.height = dataset.RasterYSize
+        self.bands = dataset.RasterCount
+        self.max_bytes = max_bytes
+
+        # 与GDAL自然块对齐，避免一次读取跨越多个块
+        block_w, block_h = dataset.GetRasterBand(1).GetBlockSize()
+        self.block_w = max(1, min(block_w, tile_size))
+        self.block_h = max(1, min(block_h, tile_size))
+
+        self.nodata = [dataset.GetRasterBand(i).GetNoDataValue()
+                       for i in range(1, self.bands + 1)]
+
+        self._cache = OrderedDict()
+        self.cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _read_block(self, col: int, row: int) -> np.ndarray:
+        """读取一个块的全部波段，返回 (bands, h, w) 数组"""
+        x_off = col * self.block_w
+        y_off = row * self.block_h
+        x_size = min(self.block_w, self.width - x_off)
+        y_size = min(self.block_h, self.height - y_off)
+
+        data = self.dataset.ReadAsArray(x_off, y_off, x_size, y_size)
+        if data.ndim == 2:
+            data = data[np.newaxis, :, :]
+        return data
+
+    def probe(self, x: int, y: int) -> Optional[np.ndarray]:
+        """
+        读取像素 (x, y) 处所有波段的值
+
+        Args:
+            x: 像素列号
+            y: 像素行号
+
+        Returns:
+            长度为波段数的一维数组，超出影像范围时返回None
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+
+        key = (x // self.block_w, y // self.block_h)
+        block = self._cache.get(key)
+        if block is None:
+            self.misses += 1
+            block = self._read_block(*key)
+            self._cache[key] = block
+            self.cache_bytes += block.nbytes
+            while self.cache_bytes > self.max_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self.cache_bytes -= evicted.nbytes
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        return block[:, y % self.block_h, x % self.block_w]
+
+    def clear(self) -> None:
+        """清空块缓存"""
+        self._cache.clear()
+        self.cache_bytes = 0
+
+
+def format_pixel_values(values: np.ndarray, max_items: int = 3) -> str:
+    """
+    格式化像素值用于显示
+
+    Args:
+        values: 各波段像素值
+        max_items: 最多列出的波段数，其余以波段总数概括
+
+    Returns:
+        显示文本，如 "B1: 1024  B2: 873  B3: 652"
+    """
+    def fmt(v):
+        if np.issubdtype(values.dtype, np.floating):
+            return f"{v:.4g}"
+        return str(v)
+
+    if len(values) == 1:
+        return f"Val: {fmt(values[0])}"
+
+    text = "  ".join(f"B{i + 1}: {fmt(v)}" for i, v in enumerate(values[:max_items]))
+    if len(values) > max_items:
+        text += f"  … ({len(values)}波段)"
+    return text
+
+
+def spectrum_coords(
+    values: np.ndarray,
+    width: int,
+    height: int,
+    padding: int = 4,
+    nodata: Optional[float] = None
+) -> Tuple[float, ...]:
+    """
+    计算光谱曲线的画布坐标（按当前像素的最小/最大值自动缩放）
+
+    Args:
+        values: 各波段像素值
+        width: 画布宽度
+        height: 画布高度
+        padding: 内边距
+        nodata: NoData值，该值按最小值绘制
+
+    Returns:
+        展平的坐标序列 (x1, y1, x2, y2, ...)，波段数不足2时返回空元组
+    """
+    n = len(values)
+    if n < 2:
+        return ()
+
+    v = values.astype(np.float64)
+    valid = np.isfinite(v)
+    if nodata is not None:
+        valid &= v != nodata
+    if not valid.any():
+        return ()
+
+    v_min = v[valid].min()
+    v_max = v[valid].max()
+    span = v_max - v_min if v_max > v_min else 1.0
+    v = np.where(valid, v, v_min)
+
+    xs = padding + np.arange(n) * (width - 2 * padding) / (n - 1)
+    ys = height - padding - (v - v_min) / span * (height - 2 * padding)
+    return tuple(np.column_stack((xs, ys)).ravel().tolist())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 裁剪计划与开销估算模块
+
+在不读取像素、不写出文件的前提下，根据影像头信息估算一次裁剪的工作量：
+涉及的源数据块、需要解码的字节数、从存储读取的字节数、输出文件大小和内存峰值，
+供调度器在提交批量任务前分配工作节点。
+
+估算方法:
+    - 解码字节数: 涉及的数据块按未压缩大小计（GDAL按整块解码）；像素交错存储时每块包含全部波段
+    - 读取字节数: 解码字节数 × 源文件压缩比（文件大小 / 未压缩大小）
+    - 输出大小: 输出未压缩大小 × 压缩比；源影像与输出使用同一无损压缩时取源文件的实际压缩比，
+      否则取 COMPRESSION_RATIOS 中的经验值
+    - 内存峰值: 单个行块的数据缓冲（类型转换时含中间数组）+ GDAL块缓存中的源数据块（不超过缓存上限）
+
+--trim 的实际范围需要读取掩膜才能确定，计划按未收缩的范围给出上限。
+"""
+
+import math
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from osgeo import gdal
+
+from .utils import is_vsi_path
+from .image_io import opened_raster, raw_layouts
+from .crop_core import resolve_pixel_window, resolve_bands, plan_row_chunks
+from .metrics import count_blocks
+from .scaling import DtypeConversion
+
+
+# 输出格式对应的压缩方式（与 create_raster 的默认创建选项一致）
+OUTPUT_COMPRESSION = {
+    'GTiff': 'LZW',
+    'PNG': 'DEFLATE',
+    'JPEG': 'JPEG',
+}
+
+# 各压缩方式的经验压缩比（压缩后 / 未压缩），遥感影像的典型值
+COMPRESSION_RATIOS = {
+    'NONE': 1.0,
+    'LZW': 0.7,
+    'DEFLATE': 0.6,
+    'ZSTD': 0.6,
+    'LZMA': 0.5,
+    'LERC': 0.5,
+    'PACKBITS': 0.9,
+    'JPEG': 0.15,
+    'WEBP': 0.15,
+}
+
+# 无损压缩（源影像的实际压缩比可直接用于估算输出）
+LOSSLESS_COMPRESSION = {'NONE', 'LZW', 'DEFLATE', 'ZSTD', 'LZMA', 'PACKBITS'}
+
+
+class CropPlan(NamedTuple):
+    """一次裁剪的计划与开销估算（字节数均为估算值）"""
+    window: Tuple[int, int, int, int]         # 像素窗口 (x_off, y_off, x_size, y_size)
+    bands: List[int]                          # 源波段号
+    block_size: Tuple[int, int]               # 源数据块尺寸 (宽, 高)
+    block_range: Tuple[int, int, int, int]    # 涉及的数据块 (起始列, 起始行, 列数, 行数)
+    blocks_touched: int                       # 需要解码的数据块数（所有波段合计）
+    decode_bytes: int                         # 解码的未压缩字节数
+    fetch_bytes: int                          # 从存储读取的字节数
+    source_compression: str                   # 源影像压缩方式
+    mapped: bool                              # 是否通过内存映射读取（无需解码）
+    chunks: int                               # 行块数（每个波段）
+    output_format: str                        # 输出格式
+    output_compression: str                   # 输出压缩方式
+    output_raw_bytes: int                     # 输出未压缩大小
+    output_bytes: int                         # 估算的输出文件大小
+    output_ratio_basis: str                   # 输出压缩比来源: 'source' 或 'typical'
+    memory_peak_bytes: int                    # 估算的内存峰值
+
+    def blocks(self) -> List[Tuple[int, int]]:
+        """涉及的数据块 (列号, 行号) 列表（每个波段相同）"""
+        col, row, cols, rows = self.block_range
+        return [(c, r) for r in range(row, row + rows) for c in range(col, col + cols)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """可JSON序列化的字典"""
+        return {key: list(value) if isinstance(value, tuple) else value
+                for key, value in self._asdict().items()}
+
+
+def _source_ratio(src_ds: gdal.Dataset, raw_bytes: int) -> Optional[float]:
+    """源文件大小 / 未压缩大小，无法确定时返回None"""
+    files = src_ds.GetFileList() or []
+    if not files or raw_bytes <= 0:
+        return None
+    if is_vsi_path(files[0]):
+        stat = gdal.VSIStatL(files[0])
+        size = stat.size if stat is not None else None
+    else:
+        size = os.path.getsize(files[0]) if os.path.isfile(files[0]) else None
+    if not size:
+        return None
+    return min(1.0, size / raw_bytes)
+
+
+def plan_dataset(
+    src_ds: gdal.Dataset,
+    x_off: int,
+    y_off: int,
+    x_size: int,
+    y_size: int,
+    output_format: str = 'GTiff',
+    bands: Optional[Sequence[int]] = None,
+    convert: Optional[DtypeConversion] = None
+) -> CropPlan:
+    """
+    估算从已打开的数据集裁剪的开销（不读取像素）
+
+    Args:
+        src_ds: 源数据集
+        x_off: X方向偏移（像素）
+        y_off: Y方向偏移（像素）
+        x_size: 裁剪宽度（像素）
+        y_size: 裁剪高度（像素）
+        output_format: 输出格式
+        bands: 输出波段列表（从1开始），None表示全部波段
+        convert: 输出数据类型转换设置（只用到目标类型）
+
+    Returns:
+        CropPlan
+
+    Raises:
+        ImageCropError: 波段号无效
+    """
+    band_list = resolve_bands(src_ds, bands)
+    band = src_ds.GetRasterBand(band_list[0])
+    block_w, block_h = band.GetBlockSize()
+    src_item = gdal.GetDataTypeSize(band.DataType) // 8
+    dst_item = convert.dtype.itemsize if convert else src_item
+
+    col0, row0 = x_off // block_w, y_off // block_h
+    cols = (x_off + x_size - 1) // block_w - col0 + 1
+    rows = (y_off + y_size - 1) // block_h - row0 + 1
+    per_band = count_blocks(band, x_off, y_off, x_size, y_size)
+    block_bytes = block_w * block_h * src_item
+
+    # 像素交错存储时一个数据块包含全部波段，只解码一次
+    compression = src_ds.GetMetadataItem('COMPRESSION', 'IMAGE_STRUCTURE') or 'NONE'
+    interleave = src_ds.GetMetadataItem('INTERLEAVE', 'IMAGE_STRUCTURE') or 'BAND'
+    if interleave == 'PIXEL' and src_ds.RasterCount > 1:
+        blocks_touched = per_band
+        decode_bytes = per_band * block_bytes * src_ds.RasterCount
+    else:
+        blocks_touched = per_band * len(set(band_list))
+        decode_bytes = per_band * block_bytes * len(set(band_list))
+
+    # 只根据布局元数据判断能否内存映射，不映射文件
+    mapped = raw_layouts(src_ds) is not None
+    if mapped:
+        # 只访问窗口所在的行，按页读入，不经过块缓存
+        decode_bytes = y_size * src_ds.RasterXSize * src_item * (
+            src_ds.RasterCount if interleave == 'PIXEL' else len(set(band_list)))
+
+    raw_size = src_ds.RasterXSize * src_ds.RasterYSize * src_ds.RasterCount * src_item
+    src_ratio = _source_ratio(src_ds, raw_size)
+    fetch_bytes = int(decode_bytes * (src_ratio if src_ratio is not None else 1.0))
+
+    # 输出大小
+    out_compression = OUTPUT_COMPRESSION.get(output_format, 'NONE')
+    output_raw = x_size * y_size * len(band_list) * dst_item
+    if (src_ratio is not None and compression == out_compression
+            and compression in LOSSLESS_COMPRESSION and dst_item == src_item):
+        ratio, basis = src_ratio, 'source'
+    else:
+        ratio, basis = COMPRESSION_RATIOS.get(out_compression, 1.0), 'typical'
+
+    # 内存峰值: 行块缓冲 + 类型转换的 float64 中间数组 + 块缓存中的源数据块
+    chunk_list = plan_row_chunks(src_ds, x_size, y_size)
+    chunk_pixels = x_size * max(r for _, r in chunk_list)
+    buffers = 0 if mapped else chunk_pixels * src_item
+    if convert:
+        buffers += chunk_pixels * (2 * 8 + 1 + dst_item)
+    chunk_block_rows = math.ceil(max(r for _, r in chunk_list) / block_h) + 1
+    cached = 0 if mapped else min(gdal.GetCacheMax(), chunk_block_rows * cols * block_bytes * (
+        src_ds.RasterCount if interleave == 'PIXEL' else 1))
+
+    return CropPlan(
+        window=(x_off, y_off, x_size, y_size),
+        bands=band_list,
+        block_size=(block_w, block_h),
+        block_range=(col0, row0, cols, rows),
+        blocks_touched=blocks_touched,
+        decode_bytes=decode_bytes,
+        fetch_bytes=fetch_bytes,
+        source_compression=compression,
+        mapped=mapped,
+        chunks=len(chunk_list),
+        output_format=output_format,
+        output_compression=out_compression,
+        output_raw_bytes=output_raw,
+        output_bytes=int(output_raw * ratio),
+        output_ratio_basis=basis,
+        memory_peak_bytes=buffers + cached,
+    )
+
+
+def plan_crop(
+    input_path: str,
+    bounds: Tuple[float, float, float, float],
+    coord_type: str = 'pixel',
+    output_format: str = 'GTiff',
+    bands: Optional[Sequence[int]] = None,
+    convert: Optional[DtypeConversion] = None
+) -> CropPlan:
+    """
+    估算裁剪的开销（只读取影像头，不读取像素、不写出文件）
+
+    Args:
+        input_path: 输入影像路径
+        bounds: 裁剪范围，含义同 crop_raster（geo 模式经 geo_bounds_to_pixel_bounds 转换）
+        coord_type: 坐标类型，'pixel' 或 'geo'
+        output_format: 输出格式
+        bands: 输出波段列表（从1开始），None表示全部波段
+        convert: 输出数据类型转换设置
+
+    Returns:
+        CropPlan
+
+    Raises:
+        InvalidBoundsError: 裁剪范围无效
+        ImageCropError: 波段号无效
+        GDALError: 无法打开影像
+    """
+    with opened_raster(input_path) as src_ds:
+        window = resolve_pixel_window(src_ds, bounds, coord_type)
+        return plan_dataset(src_ds, *window, output_format, bands, convert)
+
+
+def format_plan(plan: CropPlan) -> str:
+    """--plan 的输出文本"""
+    mb = 1024 * 1024
+    col, row, cols, rows = plan.block_range
+    lines = [
+        f"裁剪窗口: {plan.window}",
+        f"波段: {plan.bands}",
+        f"源数据块: {plan.block_size[0]}x{plan.block_size[1]}，"
+        f"列 {col}-{col + cols - 1}，行 {row}-{row + rows - 1}，共解码 {plan.blocks_touched} 块",
+        f"源压缩: {plan.source_compression}{'（内存映射读取）' if plan.mapped else ''}",
+        f"解码数据量: {plan.decode_bytes / mb:.2f} MB",
+        f"读取数据量: {plan.fetch_bytes / mb:.2f} MB",
+        f"行块数: {plan.chunks}/波段",
+        f"输出: {plan.output_format} ({plan.output_compression})，"
+        f"未压缩 {plan.output_raw_bytes / mb:.2f} MB，"
+        f"估计 {plan.output_bytes / mb:.2f} MB "
+        f"[{'按源影像压缩比' if plan.output_ratio_basis == 'source' else '经验压缩比'}]",
+        f"内存峰值: {plan.memory_peak_bytes / mb:.2f} MB",
+    ]
+    return '\n'.join(lines)
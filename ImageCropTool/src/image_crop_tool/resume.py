@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 断点续裁模块
+
+长时间裁剪时在输出文件旁写一个日志文件（<输出路径>.journal），每个行块（输出波段、行偏移）
+写出并刷新到输出文件后追加一条记录。进程中断后以相同参数再次运行，以更新模式打开未完成的输出，
+跳过已记录的行块继续裁剪；全部完成并校验后删除日志文件。
+
+日志文件为 JSON Lines:
+    第一行: {"version": 1, "signature": {...}}    源文件、裁剪窗口、波段、数据类型、转换范围等
+    其余行: {"band": 输出波段号, "row": 行偏移, "crc": 写出数据的CRC32}
+
+日志中的参数与本次不一致（源文件已修改或裁剪参数改变）时丢弃旧输出，重新裁剪。
+输出文件存在且没有日志文件，即视为已完成（批量任务据此跳过）。
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from osgeo import gdal
+
+from .utils import logger, is_vsi_path, ImageCropError
+from .image_io import opened_raster
+
+
+# 日志文件后缀
+JOURNAL_SUFFIX = '.journal'
+
+# 日志格式版本
+JOURNAL_VERSION = 1
+
+
+def journal_path(output_path: str) -> str:
+    """输出文件对应的日志文件路径"""
+    return output_path + JOURNAL_SUFFIX
+
+
+def output_complete(output_path: str) -> bool:
+    """输出文件已存在且没有未完成的日志"""
+    return os.path.exists(output_path) and not os.path.exists(journal_path(output_path))
+
+
+def chunk_crc(data: np.ndarray) -> int:
+    """行块数据的CRC32"""
+    return zlib.crc32(np.ascontiguousarray(data).data)
+
+
+def source_signature(src_ds: gdal.Dataset) -> Dict[str, Any]:
+    """源文件标识（路径、大小、修改时间），文件变化后续裁失效"""
+    files = src_ds.GetFileList() or [src_ds.GetDescription()]
+    path = files[0]
+    if is_vsi_path(path):
+        stat = gdal.VSIStatL(path)
+        if stat is None:
+            return {'path': path}
+        return {'path': path, 'size': stat.size, 'mtime': stat.mtime}
+    if not os.path.exists(path):
+        return {'path': path}
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class CropJournal:
+    """单个输出文件的续裁日志"""
+
+    def __init__(self, output_path: str, signature: Dict[str, Any]):
+        """
+        Args:
+            output_path: 输出影像路径
+            signature: 本次裁剪参数（须可JSON序列化），与已有日志不一致时不续裁
+
+        Raises:
+            ImageCropError: 输出路径为GDAL虚拟路径
+        """
+        if is_vsi_path(output_path):
+            raise ImageCropError(f"断点续裁不支持虚拟路径输出: {output_path}")
+        self.output_path = output_path
+        self.path = journal_path(output_path)
+        # 与 json 往返后比较，避免元组/列表差异
+        self.signature = json.loads(json.dumps(signature))
+        self.completed: Dict[Tuple[int, int], int] = {}
+        self.last: Optional[Tuple[int, int]] = None
+        self._file = None
+
+    def load(self) -> bool:
+        """
+        读取已有日志
+
+        末尾不完整的记录（写入时中断）被忽略。
+
+        Returns:
+            日志存在、参数一致且输出文件存在时返回True
+        """
+        if not (os.path.exists(self.path) and os.path.exists(self.output_path)):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return False
+        if header.get('version') != JOURNAL_VERSION or header.get('signature') != self.signature:
+            logger.warning(f"续裁日志与本次参数不一致，重新裁剪: {self.path}")
+            return False
+
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+                key = (int(entry['band']), int(entry['row']))
+                self.completed[key] = int(entry['crc'])
+            except (ValueError, KeyError, TypeError):
+                break
+            self.last = key
+        return True
+
+    def start(self) -> None:
+        """新建日志（覆盖旧日志）"""
+        self.completed.clear()
+        self.last = None
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({'version': JOURNAL_VERSION, 'signature': self.signature})
+
+    def reopen(self) -> None:
+        """续写已加载的日志（重写有效记录，去掉末尾不完整的记录）"""
+        entries = [{'version': JOURNAL_VERSION, 'signature': self.signature}]
+        entries += [{'band': band, 'row': row, 'crc': crc}
+                    for (band, row), crc in self.completed.items()]
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        self._sync()
+
+    def discard(self, key: Tuple[int, int]) -> None:
+        """校验不通过的行块重新裁剪"""
+        self.completed.pop(key, None)
+
+    def record(self, band: int, row: int, crc: int) -> None:
+        """记录一个已写出并刷新的行块"""
+        self.completed[(band, row)] = crc
+        self.last = (band, row)
+        self._append({'band': band, 'row': row, 'crc': crc})
+
+    def missing(self, keys: Iterable[Tuple[int, int]]) -> list:
+        """尚未记录的行块"""
+        return [key for key in keys if key not in self.completed]
+
+    def finish(self, keys: Iterable[Tuple[int, int]], width: int, height: int, bands: int) -> None:
+        """
+        校验全部行块均已记录、输出文件可以正常打开且尺寸一致，然后删除日志
+
+        Args:
+            keys: 全部行块 (输出波段号, 行偏移)
+            width: 输出宽度
+            height: 输出高度
+            bands: 输出波段数
+
+        Raises:
+            ImageCropError: 校验失败（保留日志，可再次续裁）
+        """
+        missing = self.missing(keys)
+        if missing:
+            raise ImageCropError(f"续裁校验失败，缺少 {len(missing)} 个行块: {self.output_path}")
+        with opened_raster(self.output_path) as ds:
+            shape = (ds.RasterXSize, ds.RasterYSize, ds.RasterCount)
+        if shape != (width, height, bands):
+            raise ImageCropError(f"续裁校验失败，输出尺寸 {shape} 与预期不符: {self.output_path}")
+        self.remove()
+        logger.debug(f"续裁日志已删除: {self.path}")
+
+    def close(self) -> None:
+        """关闭日志文件（保留在磁盘上）"""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """裁剪完成后删除日志"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry) + '\n')
+        self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 数据类型转换模块
+
+裁剪时将数据转换为指定类型（如 16 位转 8 位），支持线性/百分比拉伸、截断和NoData重映射。
+缩放参数在裁剪前确定（统计基于降采样读取），之后逐块应用，无需第二遍处理。
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from osgeo import gdal
+
+from .utils import logger, ImageCropError
+from .image_io import GDAL_DTYPE_MAP
+
+
+# 缩放方式: none 仅截断转换, linear 按最小/最大值拉伸, percentile 按百分位拉伸
+SCALE_MODES = ('none', 'linear', 'percentile')
+
+# 统计时降采样读取的最大边长（像素）
+SAMPLE_SIZE = 1024
+
+
+def sample_band_range(
+    band: gdal.Band,
+    x_off: int,
+    y_off: int,
+    x_size: int,
+    y_size: int,
+    percentiles: Optional[Tuple[float, float]] = None,
+    sample_size: int = SAMPLE_SIZE
+) -> Optional[Tuple[float, float]]:
+    """
+    基于降采样读取（自动使用概视图）统计窗口内有效像素的取值范围
+
+    Args:
+        band: 波段
+        x_off: 窗口X偏移
+        y_off: 窗口Y偏移
+        x_size: 窗口宽度
+        y_size: 窗口高度
+        percentiles: (低, 高) 百分位，None表示最小/最大值
+        sample_size: 降采样后的最大边长
+
+    Returns:
+        (low, high)，窗口内没有有效像素时返回None
+    """
+    ratio = max(1.0, max(x_size, y_size) / sample_size)
+    buf_w = max(1, int(x_size / ratio))
+    buf_h = max(1, int(y_size / ratio))
+
+    arr = band.ReadAsArray(x_off, y_off, x_size, y_size, buf_xsize=buf_w, buf_ysize=buf_h)
+    valid = np.isfinite(arr)
+    nodata = band.GetNoDataValue()
+    if nodata is not None:
+        valid &= arr != nodata
+    if not valid.any():
+        return None
+
+    values = arr[valid]
+    if percentiles is None:
+        return float(values.min()), float(values.max())
+    low, high = np.percentile(values, percentiles)
+    return float(low), float(high)
+
+
+class BandScaler:
+    """单个波段的转换参数，逐块应用"""
+
+    def __init__(
+        self,
+        dtype: np.dtype,
+        src_range: Optional[Tuple[float, float]],
+        dst_range: Tuple[float, float],
+        src_nodata: Optional[float] = None,
+        dst_nodata: Optional[float] = None
+    ):
+        """
+        Args:
+            dtype: 输出NumPy类型
+            src_range: 源数据拉伸范围，None表示不拉伸（仅截断）
+            dst_range: 输出取值范围
+            src_nodata: 源NoData值
+            dst_nodata: 输出NoData值
+        """
+        self.dtype = np.dtype(dtype)
+        self.src_range = src_range
+        self.dst_range = dst_range
+        self.src_nodata = src_nodata
+        self.dst_nodata = dst_nodata
+
+    def apply(self, data: np.ndarray) -> np.ndarray:
+        """转换一个数据块"""
+        values = data.astype(np.float64)
+        valid = np.isfinite(values)
+        if self.src_nodata is not None and not np.isnan(self.src_nodata):
+            valid &= data != self.src_nodata
+
+        if self.src_range is not None:
+            src_min, src_max = self.src_range
+            dst_min, dst_max = self.dst_range
+            span = src_max - src_min if src_max > src_min else 1.0
+            values = (values - src_min) * ((dst_max - dst_min) / span) + dst_min
+
+        if np.issubdtype(self.dtype, np.integer):
+            values = np.rint(np.clip(np.nan_to_num(values), *self.dst_range))
+        elif self.src_range is not None:
+            values = np.clip(values, *self.dst_range)
+
+        out = values.astype(self.dtype)
+        if self.dst_nodata is not None:
+            out[~valid] = self.dst_nodata
+        return out
+
+
+class DtypeConversion:
+    """
+    裁剪输出的数据类型转换设置
+
+    整数输出的取值范围为该类型的全部范围（保留NoData值所占的端点）；
+    浮点输出在拉伸时映射到 0-1，不拉伸时原样转换。
+    源影像有NoData时，输出NoData默认为 0（整数）或 NaN（浮点）。
+    """
+
+    def __init__(
+        self,
+        dtype: str,
+        scale: str = 'none',
+        scale_range: Optional[Tuple[float, float]] = None,
+        percentiles: Tuple[float, float] = (2.0, 98.0),
+        nodata: Optional[float] = None
+    ):
+        """
+        Args:
+            dtype: 输出数据类型名称（GDAL类型名，如 Byte、UInt16、Float32）
+            scale: 缩放方式，'none'、'linear' 或 'percentile'
+            scale_range: 源数据拉伸范围 (min, max)；指定时按该范围线性拉伸，不做统计
+            percentiles: percentile 模式的 (低, 高) 百分位
+            nodata: 输出NoData值
+
+        Raises:
+            ImageCropError: 数据类型或缩放方式无效
+        """
+        self.gdal_dtype = gdal.GetDataTypeByName(dtype)
+        if self.gdal_dtype not in GDAL_DTYPE_MAP:
+            raise ImageCropError(f"不支持的输出数据类型: {dtype}")
+        if scale not in SCALE_MODES:
+            raise ImageCropError(f"不支持的缩放方式: {scale}，请使用 {', '.join(SCALE_MODES)}")
+
+        self.dtype = np.dtype(GDAL_DTYPE_MAP[self.gdal_dtype])
+        self.scale = scale
+        self.scale_range = tuple(scale_range) if scale_range else None
+        self.percentiles = tuple(percentiles)
+        self.nodata = nodata
+
+    def output_range(self, nodata: Optional[float]) -> Tuple[float, float]:
+        """输出取值范围（整数类型避开NoData所在的端点）"""
+        if not np.issubdtype(self.dtype, np.integer):
+            return 0.0, 1.0
+        info = np.iinfo(self.dtype)
+        low, high = float(info.min), float(info.max)
+        if nodata == low:
+            low += 1
+        elif nodata == high:
+            high -= 1
+        return low, high
+
+    def build_scalers(
+        self,
+        src_ds: gdal.Dataset,
+        band_list: Sequence[int],
+        window: Tuple[int, int, int, int]
+    ) -> List[BandScaler]:
+        """
+        为各输出波段确定转换参数
+
+        Args:
+            src_ds: 源数据集
+            band_list: 源波段号列表
+            window: 裁剪窗口 (x_off, y_off, x_size, y_size)
+
+        Returns:
+            与 band_list 对应的转换器列表
+        """
+        scalers = []
+        for band_idx in band_list:
+            band = src_ds.GetRasterBand(band_idx)
+            src_nodata = band.GetNoDataValue()
+            dst_nodata = self.nodata
+            if dst_nodata is None and src_nodata is not None:
+                dst_nodata = 0 if np.issubdtype(self.dtype, np.integer) else float('nan')
+
+            src_range = None
+            if self.scale_range:
+                src_range = self.scale_range
+            elif self.scale != 'none':
+                percentiles = self.percentiles if self.scale == 'percentile' else None
+                src_range = sample_band_range(band, *window, percentiles=percentiles)
+                if src_range is None:
+                    logger.warning(f"波段 {band_idx} 裁剪范围内没有有效像素，不做拉伸")
+
+            scaler = BandScaler(self.dtype, src_range, self.output_range(dst_nodata),
+                                src_nodata, dst_nodata)
+            logger.debug(f"波段 {band_idx} 转换: {src_range} -> {scaler.dst_range}, "
+                         f"NoData {src_nodata} -> {dst_nodata}")
+            scalers.append(scaler)
+        return scalers
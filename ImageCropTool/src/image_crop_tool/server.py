@@ -0,0 +1,513 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 裁剪服务模块
+
+常驻进程，通过 Unix socket 或本地 HTTP 接收裁剪任务，在线程池中执行。
+工作线程复用已打开的数据集，所有线程共享进程内的GDAL块缓存，
+避免每个小裁剪任务都重新启动进程、导入GDAL和打开影像。
+
+任务格式 (JSON):
+    {
+        "input": "scene.tif",
+        "bounds": [100, 100, 500, 500],
+        "coord_type": "pixel",          # 可选，pixel 或 geo
+        "format": "GTiff",              # 可选，输出格式
+        "bands": [4, 3, 2],             # 可选，输出波段及顺序
+        "output": "out.tif"             # 可选，省略时直接返回文件内容
+    }
+
+output 相对于输出根目录（默认为启动服务时的当前目录）解析，解析后（含符号链接）
+不在该目录内的路径被拒绝，避免能访问服务端口的进程覆盖任意文件。
+
+Unix socket 协议:
+    每行一个JSON任务；每个任务返回一行JSON响应头，
+    若返回文件内容，响应头中 size 字段给出随后的字节数。
+
+HTTP 接口:
+    POST /crop    请求体为JSON任务，返回文件内容或JSON；
+                  输出路径不允许时返回403，输入文件不存在时返回404，其他错误返回400
+    GET  /health  服务状态
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from osgeo import gdal
+
+from .utils import (
+    logger, is_vsi_path, is_url, ensure_gdal_configured, ImageCropError, FileNotFoundError,
+    OutputPathError
+)
+from .image_io import open_raster, close_raster
+from .crop_core import crop_dataset, crop_dataset_to_bytes, resolve_pixel_window
+
+
+# 输出格式 -> Content-Type
+CONTENT_TYPES = {
+    'GTiff': 'image/tiff',
+    'PNG': 'image/png',
+    'JPEG': 'image/jpeg',
+}
+
+# 流式返回文件内容时每次写入的字节数
+STREAM_CHUNK = 1024 * 1024
+
+# HTTP 请求正文（JSON任务）的大小上限（字节）
+MAX_REQUEST_BODY = 1024 * 1024
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+                405: 'Method Not Allowed', 411: 'Length Required',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    """本地文件的修改时间（虚拟路径、URL和不存在的文件返回None，后者由 open_raster 报告）"""
+    if is_vsi_path(path) or is_url(path) or not os.path.isfile(path):
+        return None
+    return os.path.getmtime(path)
+
+
+class DatasetPool:
+    """
+    已打开数据集的缓存
+
+    GDAL数据集不能跨线程共享，因此每个工作线程各自维护一个LRU缓存。
+    文件修改时间变化时重新打开。
+    """
+
+    def __init__(self, max_datasets: int = 32):
+        self.max_datasets = max_datasets
+        self._local = threading.local()
+
+    def get(self, path: str) -> gdal.Dataset:
+        """获取（必要时打开）当前线程的数据集"""
+        cache = getattr(self._local, 'cache', None)
+        if cache is None:
+            cache = self._local.cache = OrderedDict()
+
+        mtime = _file_mtime(path)
+        entry = cache.get(path)
+        if entry is not None and entry[0] == mtime:
+            cache.move_to_end(path)
+            return entry[1]
+
+        if entry is not None:
+            # 文件已变化，释放旧句柄
+            del cache[path]
+            close_raster(entry[1])
+
+        dataset = open_raster(path)
+        cache[path] = (mtime, dataset)
+        cache.move_to_end(path)
+        while len(cache) > self.max_datasets:
+            _, (_, evicted) = cache.popitem(last=False)
+            close_raster(evicted)
+        return dataset
+
+    def clear(self) -> None:
+        """关闭当前线程缓存的全部数据集"""
+        cache = getattr(self._local, 'cache', None)
+        while cache:
+            _, (_, dataset) = cache.popitem(last=False)
+            close_raster(dataset)
+
+    def size(self) -> int:
+        """当前线程缓存的数据集数量"""
+        return len(getattr(self._local, 'cache', ()))
+
+
+class SharedDatasetPool:
+    """
+    跨线程复用的已打开数据集池
+
+    GDAL数据集不能被多个线程同时使用，处理线程按路径借出数据集，用完归还；
+    空闲的数据集留在池中，供之后任意线程的请求复用（适用于每个连接一个线程的HTTP服务）。
+    文件修改时间变化时丢弃旧句柄。
+    """
+
+    def __init__(self, max_idle: int = 8):
+        """
+        Args:
+            max_idle: 每个路径最多保留的空闲数据集数
+        """
+        self.max_idle = max_idle
+        self._idle: Dict[str, List[Tuple[Optional[float], gdal.Dataset]]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self, path: str) -> Iterator[gdal.Dataset]:
+        """借出（必要时打开）一个数据集，退出时归还"""
+        mtime = _file_mtime(path)
+        dataset = None
+        stale = []
+        with self._lock:
+            idle = self._idle.get(path, [])
+            while idle and dataset is None:
+                entry_mtime, candidate = idle.pop()
+                if entry_mtime == mtime:
+                    dataset = candidate
+                else:
+                    stale.append(candidate)
+        # 文件已变化，释放旧句柄
+        for candidate in stale:
+            close_raster(candidate)
+        if dataset is None:
+            dataset = open_raster(path)
+
+        try:
+            yield dataset
+        finally:
+            with self._lock:
+                idle = self._idle.setdefault(path, [])
+                if len(idle) < self.max_idle:
+                    idle.append((mtime, dataset))
+                    dataset = None
+            if dataset is not None:
+                close_raster(dataset)
+
+    def clear(self) -> None:
+        """关闭全部空闲数据集"""
+        with self._lock:
+            datasets = [ds for idle in self._idle.values() for _, ds in idle]
+            self._idle.clear()
+        for dataset in datasets:
+            close_raster(dataset)
+
+    def size(self) -> int:
+        """空闲数据集数量"""
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+
+class CropServer:
+    """常驻裁剪服务"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache_mb: Optional[int] = None,
+        max_datasets: int = 32,
+        output_root: Optional[str] = None
+    ):
+        """
+        Args:
+            workers: 工作线程数（默认CPU核数）
+            cache_mb: GDAL块缓存大小（MB），所有工作线程共享
+            max_datasets: 每个工作线程最多保持打开的数据集数
+            output_root: 任务 output 允许写入的目录（默认当前目录）
+        """
+        self.workers = workers or os.cpu_count() or 4
+        self.output_root = os.path.realpath(output_root or os.getcwd())
+        self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                           thread_name_prefix='crop-worker')
+        self.pool = DatasetPool(max_datasets)
+        self.stats = {'jobs': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+        if cache_mb:
+            # 先完成GDAL配置，避免之后应用运行参数配置时覆盖指定的缓存大小
+            ensure_gdal_configured()
+            gdal.SetCacheMax(cache_mb * 1024 * 1024)
+
+    # ===== 任务执行 (工作线程) =====
+
+    def resolve_output(self, output_path: str) -> str:
+        """
+        将任务的输出路径解析到输出根目录下
+
+        Args:
+            output_path: 任务中的输出路径（相对路径相对于输出根目录）
+
+        Returns:
+            解析后的绝对路径
+
+        Raises:
+            OutputPathError: 路径（含符号链接）解析后不在输出根目录内
+        """
+        path = os.path.realpath(os.path.join(self.output_root, output_path))
+        try:
+            inside = os.path.commonpath([self.output_root, path]) == self.output_root
+        except ValueError:
+            # Windows 上位于不同盘符
+            inside = False
+        if not inside:
+            raise OutputPathError(f"输出路径不在输出根目录 {self.output_root} 内: {output_path}")
+        return path
+
+    def run_job(self, job: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """
+        执行一个裁剪任务
+
+        Args:
+            job: 任务字典，见模块说明
+
+        Returns:
+            (响应字典, 文件内容)；指定了 output 时文件内容为None
+
+        Raises:
+            ImageCropError: 任务参数或裁剪失败
+        """
+        try:
+            input_path = job['input']
+            bounds = [float(b) for b in job['bounds']]
+        except (KeyError, TypeError, ValueError):
+            raise ImageCropError("任务需要 input 和 bounds 字段")
+        if len(bounds) != 4:
+            raise ImageCropError("bounds 需要4个数值")
+
+        output_format = job.get('format', 'GTiff')
+        output_path = self.resolve_output(job['output']) if job.get('output') else None
+        bands = job.get('bands')
+
+        src_ds = self.pool.get(input_path)
+        try:
+            window = resolve_pixel_window(src_ds, bounds, job.get('coord_type', 'pixel'))
+        except ValueError as e:
+            raise ImageCropError(str(e))
+
+        if output_path:
+            crop_dataset(src_ds, output_path, *window, output_format, bands=bands)
+            return {'status': 'ok', 'output': output_path}, None
+
+        # 未指定输出路径: 经内存文件返回内容
+        data = crop_dataset_to_bytes(src_ds, *window, output_format, bands=bands)
+        return {'status': 'ok', 'size': len(data)}, data
+
+    async def submit(self, job: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """在线程池中执行任务，错误转换为响应字典"""
+        loop = asyncio.get_running_loop()
+        try:
+            header, data = await loop.run_in_executor(self.executor, self.run_job, job)
+            with self._stats_lock:
+                self.stats['jobs'] += 1
+            return header, data
+        except Exception as e:
+            with self._stats_lock:
+                self.stats['errors'] += 1
+            logger.error(f"任务失败: {e}")
+            return {'status': 'error', 'error': str(e), 'code': self._error_status(e)}, None
+
+    @staticmethod
+    def _error_status(error: Exception) -> int:
+        """任务错误对应的HTTP状态码"""
+        if isinstance(error, OutputPathError):
+            return 403
+        if isinstance(error, FileNotFoundError):
+            return 404
+        return 400
+
+    # ===== Unix socket =====
+
+    async def handle_socket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理 Unix socket 连接：逐行读取JSON任务"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    job = json.loads(line)
+                except ValueError as e:
+                    job = None
+                    header, data = {'status': 'error', 'error': f"无效的JSON: {e}"}, None
+                else:
+                    header, data = await self.submit(job)
+
+                # 回传客户端的任务ID，便于匹配响应
+                if isinstance(job, dict) and 'id' in job:
+                    header['id'] = job['id']
+                writer.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+                if data is not None:
+                    await self._stream(writer, data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # ===== HTTP =====
+
+    async def handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理 HTTP/1.1 连接（支持 keep-alive）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._http_response(writer, 400, self._json_body({'error': '无效的请求行'}))
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                # 正文长度无效时无法确定下一个请求的起点，回复错误后关闭连接
+                error = self._check_content_length(headers)
+                if error:
+                    await self._http_response(writer, error[0], self._json_body({'error': error[1]}))
+                    break
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+
+                await self._route(writer, method, target.split('?', 1)[0], body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _check_content_length(headers: Dict[str, str]) -> Optional[Tuple[int, str]]:
+        """校验请求正文长度，无效时返回 (状态码, 错误信息)"""
+        if 'transfer-encoding' in headers:
+            return 411, '不支持分块传输，请指定 Content-Length'
+        value = headers.get('content-length', '0')
+        if not value.isdecimal():
+            return 400, f"无效的 Content-Length: {value}"
+        if int(value) > MAX_REQUEST_BODY:
+            return 413, f"请求正文超过 {MAX_REQUEST_BODY} 字节"
+        return None
+
+    async def _route(self, writer, method: str, path: str, body: bytes, keep_alive: bool) -> None:
+        """分发 HTTP 请求"""
+        if path == '/health':
+            with self._stats_lock:
+                stats = dict(self.stats)
+            stats.update(status='ok', workers=self.workers,
+                         gdal_cache_used=gdal.GetCacheUsed())
+            await self._http_response(writer, 200, self._json_body(stats), keep_alive=keep_alive)
+            return
+
+        if path != '/crop':
+            await self._http_response(writer, 404, self._json_body({'error': '未找到'}), keep_alive=keep_alive)
+            return
+        if method != 'POST':
+            await self._http_response(writer, 405, self._json_body({'error': '请使用POST'}), keep_alive=keep_alive)
+            return
+
+        try:
+            job = json.loads(body.decode('utf-8'))
+        except ValueError as e:
+            await self._http_response(writer, 400, self._json_body({'error': f"无效的JSON: {e}"}), keep_alive=keep_alive)
+            return
+
+        header, data = await self.submit(job)
+        if header['status'] != 'ok':
+            await self._http_response(writer, header['code'], self._json_body(header), keep_alive=keep_alive)
+        elif data is None:
+            await self._http_response(writer, 200, self._json_body(header), keep_alive=keep_alive)
+        else:
+            content_type = CONTENT_TYPES.get(job.get('format', 'GTiff'), 'application/octet-stream')
+            await self._http_response(writer, 200, data, content_type, keep_alive)
+
+    @staticmethod
+    def _json_body(obj: Dict[str, Any]) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    async def _http_response(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str = 'application/json; charset=utf-8',
+        keep_alive: bool = False
+    ) -> None:
+        """写出 HTTP 响应，正文分块写入"""
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1'))
+        await self._stream(writer, body)
+
+    @staticmethod
+    async def _stream(writer: asyncio.StreamWriter, data: bytes) -> None:
+        """分块写出数据，避免大文件一次性堆积在发送缓冲区"""
+        view = memoryview(data)
+        for start in range(0, len(view), STREAM_CHUNK):
+            writer.write(view[start:start + STREAM_CHUNK])
+            await writer.drain()
+
+    # ===== 启动 =====
+
+    async def serve(
+        self,
+        socket_path: Optional[str] = None,
+        host: str = '127.0.0.1',
+        port: Optional[int] = None
+    ) -> None:
+        """
+        启动服务并一直运行
+
+        Args:
+            socket_path: Unix socket 路径
+            host: HTTP 监听地址（默认仅本机）
+            port: HTTP 端口
+        """
+        servers = []
+        if socket_path:
+            if not hasattr(asyncio, 'start_unix_server'):
+                raise ImageCropError("当前平台不支持 Unix socket，请使用 --port")
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            servers.append(await asyncio.start_unix_server(self.handle_socket, path=socket_path))
+            logger.info(f"裁剪服务监听 Unix socket: {socket_path}")
+        if port is not None:
+            servers.append(await asyncio.start_server(self.handle_http, host=host, port=port))
+            logger.info(f"裁剪服务监听 HTTP: http://{host}:{port}")
+        if not servers:
+            raise ImageCropError("请至少指定 Unix socket 路径或 HTTP 端口")
+
+        logger.info(f"工作线程数: {self.workers}")
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            for server in servers:
+                server.close()
+            self.executor.shutdown(wait=False)
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def run_server(
+    socket_path: Optional[str] = None,
+    host: str = '127.0.0.1',
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+    cache_mb: Optional[int] = None,
+    output_root: Optional[str] = None
+) -> None:
+    """
+    启动裁剪服务（阻塞直到中断）
+
+    Args:
+        socket_path: Unix socket 路径
+        host: HTTP 监听地址
+        port: HTTP 端口
+        workers: 工作线程数
+        cache_mb: GDAL块缓存大小（MB）
+        output_root: 任务 output 允许写入的目录（默认当前目录）
+    """
+    server = CropServer(workers=workers, cache_mb=cache_mb, output_root=output_root)
+    asyncio.run(server.serve(socket_path, host, port))
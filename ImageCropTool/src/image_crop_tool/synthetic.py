@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 合成影像生成模块
+
+按行块向量化生成测试影像，内存占用与影像大小无关，可生成数GB的分块/压缩影像。
+支持配置块大小、压缩方式、波段数、数据类型、NoData区域和坐标系，并可并行生成多个文件。
+供测试和基准脚本使用。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from osgeo import gdal, osr
+
+from .utils import logger, ImageCropError
+from .image_io import GDAL_DTYPE_MAP, create_raster, write_band_data, close_raster, delete_raster
+from .crop_core import CHUNK_BYTES, ProgressCallback, plan_row_chunks
+
+
+# 填充方式: gradient 渐变, noise 随机噪声, mixed 渐变叠加少量噪声（接近真实影像的压缩率）
+PATTERNS = ('gradient', 'noise', 'mixed')
+
+# 默认地理变换（未指定时按坐标系类型选择）
+GEOGRAPHIC_GEOTRANSFORM = (116.0, 0.001, 0, 40.0, 0, -0.001)
+PROJECTED_GEOTRANSFORM = (400000, 30, 0, 4400000, 0, -30)
+
+# 生成时单个行块的数据量上限（字节）
+GENERATE_CHUNK_BYTES = CHUNK_BYTES // 4
+
+
+def _default_max_value(dtype: np.dtype) -> float:
+    """数据类型的默认最大值（浮点为1.0）"""
+    if np.issubdtype(dtype, np.integer):
+        return float(np.iinfo(dtype).max)
+    return 1.0
+
+
+def generate_chunk(
+    band_index: int,
+    y_off: int,
+    rows: int,
+    width: int,
+    height: int,
+    dtype: np.dtype,
+    pattern: str = 'gradient',
+    max_value: Optional[float] = None,
+    grid: int = 0,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    生成一个行块的数据
+
+    渐变按波段循环: 水平、垂直、对角。噪声由 (seed, 波段, 行偏移) 决定，
+    与生成顺序和并行方式无关，结果可复现。
+
+    Args:
+        band_index: 波段号（从1开始）
+        y_off: 行偏移
+        rows: 行数
+        width: 影像宽度
+        height: 影像高度
+        dtype: 输出NumPy类型
+        pattern: 填充方式
+        max_value: 最大值，None时取数据类型最大值（浮点为1.0）
+        grid: 第1波段每隔多少像素绘制一条最大值网格线，0表示不绘制
+        seed: 随机种子
+
+    Returns:
+        形状为 (rows, width) 的数组
+    """
+    dtype = np.dtype(dtype)
+    if max_value is None:
+        max_value = _default_max_value(dtype)
+    integer = np.issubdtype(dtype, np.integer)
+
+    x = np.arange(width, dtype=np.float64)[np.newaxis, :]
+    y = np.arange(y_off, y_off + rows, dtype=np.float64)[:, np.newaxis]
+
+    if pattern == 'noise':
+        rng = np.random.default_rng((seed, band_index, y_off))
+        if integer:
+            values = rng.integers(0, int(max_value), (rows, width), endpoint=True).astype(np.float64)
+        else:
+            values = rng.random((rows, width)) * max_value
+    else:
+        kind = (band_index - 1) % 3
+        if kind == 0:
+            frac = x / width
+        elif kind == 1:
+            frac = y / height
+        else:
+            frac = (x + y) / (width + height)
+        values = np.broadcast_to(frac * max_value, (rows, width))
+        if integer:
+            values = np.floor(values)
+        if pattern == 'mixed':
+            rng = np.random.default_rng((seed, band_index, y_off))
+            values = np.clip(values + rng.normal(0, max_value / 64, (rows, width)), 0, max_value)
+            if integer:
+                values = np.rint(values)
+
+    data = values.astype(dtype)
+    if grid and band_index == 1:
+        data[(y[:, 0] % grid) == 0, :] = max_value
+        data[:, (x[0] % grid) == 0] = max_value
+    return data
+
+
+def _fill_nodata_regions(
+    data: np.ndarray,
+    y_off: int,
+    regions: Sequence[Tuple[int, int, int, int]],
+    nodata: float
+) -> None:
+    """将与当前行块相交的NoData区域 (x_off, y_off, x_size, y_size) 填为NoData值"""
+    rows = data.shape[0]
+    for rx, ry, rw, rh in regions:
+        top = max(ry, y_off)
+        bottom = min(ry + rh, y_off + rows)
+        if top < bottom:
+            data[top - y_off:bottom - y_off, max(rx, 0):rx + rw] = nodata
+
+
+def _creation_options(
+    driver_name: str,
+    bands: int,
+    block_size: Optional[int],
+    compress: Optional[str],
+    options: Optional[List[str]]
+) -> List[str]:
+    """GeoTIFF 的分块/压缩选项，加上额外选项"""
+    result = []
+    if driver_name == 'GTiff':
+        result.append('BIGTIFF=IF_SAFER')
+        if compress:
+            result.append(f'COMPRESS={compress}')
+        if block_size:
+            result += ['TILED=YES', f'BLOCKXSIZE={block_size}', f'BLOCKYSIZE={block_size}']
+        if bands > 1:
+            result.append('INTERLEAVE=PIXEL')
+    return result + list(options or [])
+
+
+def generate_raster(
+    output_path: str,
+    width: int,
+    height: int,
+    bands: int = 3,
+    dtype: str = 'Byte',
+    driver_name: str = 'GTiff',
+    block_size: Optional[int] = 256,
+    compress: Optional[str] = 'LZW',
+    crs: Optional[str] = 'EPSG:4326',
+    geotransform: Optional[Tuple] = None,
+    pattern: str = 'gradient',
+    max_value: Optional[float] = None,
+    nodata: Optional[float] = None,
+    nodata_regions: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+    grid: int = 0,
+    seed: int = 0,
+    options: Optional[List[str]] = None,
+    progress_callback: Optional[ProgressCallback] = None
+) -> str:
+    """
+    按行块生成合成影像
+
+    每个行块按输出块高度对齐、不超过 GENERATE_CHUNK_BYTES，逐块生成后立即写出。
+    不支持直接创建的驱动（如PNG、JPEG）先生成临时GeoTIFF，再用 CreateCopy 输出。
+
+    Args:
+        output_path: 输出文件路径
+        width: 影像宽度
+        height: 影像高度
+        bands: 波段数
+        dtype: 数据类型名称（GDAL类型名，如 Byte、UInt16、Float32）
+        driver_name: 驱动名称
+        block_size: GeoTIFF 分块边长，None表示条带存储
+        compress: GeoTIFF 压缩方式（LZW、DEFLATE、ZSTD等），None或'NONE'表示不压缩
+        crs: 坐标系（EPSG代码或WKT），None表示无地理坐标
+        geotransform: 仿射变换参数，None时按坐标系类型取默认值
+        pattern: 填充方式，'gradient'、'noise' 或 'mixed'
+        max_value: 最大值，None时取数据类型最大值（浮点为1.0）
+        nodata: NoData值
+        nodata_regions: 填充为NoData的区域列表 [(x_off, y_off, x_size, y_size), ...]
+        grid: 第1波段每隔多少像素绘制一条网格线，0表示不绘制
+        seed: 随机种子
+        options: 额外的创建选项
+        progress_callback: 进度回调函数 callback(已完成块数, 总块数)
+
+    Returns:
+        输出文件路径
+
+    Raises:
+        ImageCropError: 参数无效
+    """
+    if pattern not in PATTERNS:
+        raise ImageCropError(f"不支持的填充方式: {pattern}，请使用 {', '.join(PATTERNS)}")
+    gdal_dtype = gdal.GetDataTypeByName(dtype)
+    if gdal_dtype not in GDAL_DTYPE_MAP:
+        raise ImageCropError(f"不支持的数据类型: {dtype}")
+    if nodata_regions and nodata is None:
+        raise ImageCropError("指定NoData区域时必须同时指定NoData值")
+    np_dtype = np.dtype(GDAL_DTYPE_MAP[gdal_dtype])
+
+    projection = None
+    if crs:
+        srs = osr.SpatialReference()
+        if srs.SetFromUserInput(crs) != 0:
+            raise ImageCropError(f"无法识别的坐标系: {crs}")
+        projection = srs.ExportToWkt()
+        if geotransform is None:
+            geotransform = GEOGRAPHIC_GEOTRANSFORM if srs.IsGeographic() else PROJECTED_GEOTRANSFORM
+
+    driver = gdal.GetDriverByName(driver_name)
+    if driver is None:
+        raise ImageCropError(f"不支持的驱动类型: {driver_name}")
+    direct = driver.GetMetadataItem(gdal.DCAP_CREATE) == 'YES'
+    target = output_path if direct else output_path + '.tmp.tif'
+    target_driver = driver_name if direct else 'GTiff'
+
+    create_options = _creation_options(
+        target_driver, bands, block_size,
+        None if compress in (None, 'NONE') or not direct else compress,
+        options if direct else None
+    )
+    dataset = create_raster(target, width, height, bands, gdal_dtype, target_driver,
+                            geotransform, projection, nodata, create_options)
+    try:
+        chunks = plan_row_chunks(dataset, width, height, GENERATE_CHUNK_BYTES)
+        total = len(chunks) * bands
+        done = 0
+        for y_off, rows in chunks:
+            for b in range(1, bands + 1):
+                data = generate_chunk(b, y_off, rows, width, height, np_dtype,
+                                      pattern, max_value, grid, seed)
+                if nodata_regions:
+                    _fill_nodata_regions(data, y_off, nodata_regions, nodata)
+                write_band_data(dataset, b, data, 0, y_off)
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+    finally:
+        close_raster(dataset)
+        dataset = None
+
+    if not direct:
+        src = gdal.Open(target)
+        try:
+            out = driver.CreateCopy(output_path, src, 0, list(options or []))
+            if out is None:
+                raise ImageCropError(f"无法创建文件: {output_path}")
+            out = None
+        finally:
+            src = None
+            delete_raster(target)
+
+    logger.info(f"已生成合成影像: {output_path} ({width}x{height}x{bands}, {dtype})")
+    return output_path
+
+
+def generate_rasters(
+    jobs: Sequence[Dict[str, Any]],
+    workers: Optional[int] = None
+) -> List[str]:
+    """
+    并行生成多个合成影像
+
+    GDAL 写出和压缩时会释放 GIL，多个文件可在线程池中同时生成。
+
+    Args:
+        jobs: 参数字典列表，每项为 generate_raster 的关键字参数（须包含 output_path、width、height）
+        workers: 并行线程数，默认为 CPU 核数与任务数的较小值
+
+    Returns:
+        与 jobs 对应的输出路径列表
+    """
+    if not jobs:
+        return []
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(generate_raster, **job) for job in jobs]
+        return [future.result() for future in futures]
@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 瓦片服务模块
+
+在本机提供 XYZ 瓦片服务，供 Web 客户端浏览影像（内部质检用）。
+
+瓦片按影像像素坐标划分（与 gdal2tiles 的 raster 配置相同，不做重投影）：
+最大级别下一个瓦片对应 256x256 原始像素，每降低一级覆盖范围扩大一倍。
+读取时选择分辨率最接近的概视图，渲染结果缓存在内存和磁盘中。
+
+接口:
+    GET /                           已发布的影像列表
+    GET /{name}.json                TileJSON 描述
+    GET /{name}/{z}/{x}/{y}.{ext}   瓦片，ext 为 png/jpg/webp
+"""
+
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from osgeo import gdal
+from PIL import Image
+
+from .utils import logger, normalize_path, is_vsi_path, is_url, ImageCropError
+from .server import SharedDatasetPool
+from .scaling import sample_band_range
+
+
+TILE_SIZE = 256
+
+# 扩展名 -> (PIL格式, Content-Type)
+TILE_FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'jpg': ('JPEG', 'image/jpeg'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+TILE_PATH = re.compile(r'^/([^/]+)/(\d+)/(\d+)/(\d+)\.(\w+)$')
+
+
+def compute_stretch(
+    dataset: gdal.Dataset,
+    bands: List[int]
+) -> List[Optional[Tuple[float, float]]]:
+    """
+    计算各显示波段的 2% - 98% 拉伸范围（8位波段无需拉伸）
+
+    统计基于降采样读取（自动使用概视图），不读取全分辨率数据。
+
+    Args:
+        dataset: GDAL Dataset对象
+        bands: 显示波段列表
+
+    Returns:
+        每个波段的 (low, high)，8位波段为None
+    """
+    width, height = dataset.RasterXSize, dataset.RasterYSize
+    stretch = []
+    for b in bands:
+        band = dataset.GetRasterBand(b)
+        if band.DataType == gdal.GDT_Byte:
+            stretch.append(None)
+            continue
+        low, high = sample_band_range(band, 0, 0, width, height, (2, 98)) or (0.0, 1.0)
+        stretch.append((low, high if high > low else low + 1.0))
+    return stretch
+
+
+def to_uint8(arr: np.ndarray, stretch: Optional[Tuple[float, float]]) -> np.ndarray:
+    """按拉伸范围线性转换为 uint8"""
+    if stretch is None:
+        return arr.astype(np.uint8, copy=False)
+    low, high = stretch
+    scaled = (arr.astype(np.float32) - low) * (255.0 / (high - low))
+    return np.clip(np.nan_to_num(scaled), 0, 255).astype(np.uint8)
+
+
+def select_overview(band: gdal.Band, factor: float) -> Tuple[gdal.Band, float]:
+    """
+    选择降采样倍数不超过 factor 的最粗概视图
+
+    Args:
+        band: 全分辨率波段
+        factor: 目标降采样倍数（源像素 / 瓦片像素）
+
+    Returns:
+        (波段或概视图, 该层的降采样倍数)
+    """
+    best, best_factor = band, 1.0
+    for i in range(band.GetOverviewCount()):
+        ovr = band.GetOverview(i)
+        ovr_factor = band.XSize / ovr.XSize
+        if best_factor < ovr_factor <= factor * 1.001:
+            best, best_factor = ovr, ovr_factor
+    return best, best_factor
+
+
+class TileSource:
+    """单个影像的瓦片参数"""
+
+    def __init__(self, name: str, path: str, dataset: gdal.Dataset):
+        self.name = name
+        self.path = path
+        self.width = dataset.RasterXSize
+        self.height = dataset.RasterYSize
+        self.max_zoom = max(0, math.ceil(math.log2(max(self.width, self.height) / TILE_SIZE)))
+        self.display_bands = [1, 2, 3] if dataset.RasterCount >= 3 else [1]
+        self.stretch = compute_stretch(dataset, self.display_bands)
+
+        # 磁盘缓存目录名: 路径 + 修改时间，文件变化后旧缓存自动失效
+        if is_vsi_path(path) or is_url(path):
+            stat = gdal.VSIStatL(normalize_path(path))
+            mtime = stat.mtime if stat is not None else ''
+        else:
+            mtime = os.path.getmtime(path)
+        stamp = f"{normalize_path(path)}:{mtime}"
+        self.cache_key = f"{name}-{hashlib.sha1(stamp.encode('utf-8')).hexdigest()[:12]}"
+
+    def tile_count(self, z: int) -> Tuple[int, int]:
+        """第 z 级的瓦片列数、行数"""
+        span = TILE_SIZE * 2 ** (self.max_zoom - z)
+        return math.ceil(self.width / span), math.ceil(self.height / span)
+
+    def tilejson(self, base_url: str) -> Dict:
+        """TileJSON 描述"""
+        return {
+            'tilejson': '2.2.0',
+            'name': self.name,
+            'tiles': [f"{base_url}/{self.name}/{{z}}/{{x}}/{{y}}.png"],
+            'minzoom': 0,
+            'maxzoom': self.max_zoom,
+            'tileSize': TILE_SIZE,
+            'width': self.width,
+            'height': self.height,
+        }
+
+
+def render_tile(
+    dataset: gdal.Dataset,
+    source: TileSource,
+    z: int,
+    x: int,
+    y: int,
+    ext: str = 'png'
+) -> Optional[bytes]:
+    """
+    渲染一个瓦片
+
+    Args:
+        dataset: GDAL Dataset对象
+        source: 瓦片参数
+        z: 级别
+        x: 列号
+        y: 行号
+        ext: 瓦片格式扩展名
+
+    Returns:
+        编码后的瓦片，超出范围时返回None
+    """
+    if not 0 <= z <= source.max_zoom:
+        return None
+    cols, rows = source.tile_count(z)
+    if not (0 <= x < cols and 0 <= y < rows):
+        return None
+
+    # 瓦片对应的源像素窗口（边缘瓦片只有部分有数据）
+    span = TILE_SIZE * 2 ** (source.max_zoom - z)
+    factor = span / TILE_SIZE
+    x0, y0 = x * span, y * span
+    x1 = min(x0 + span, source.width)
+    y1 = min(y0 + span, source.height)
+    out_w = max(1, round((x1 - x0) / factor))
+    out_h = max(1, round((y1 - y0) / factor))
+
+    rgba = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    for i, b in enumerate(source.display_bands):
+        band, ovr_factor = select_overview(dataset.GetRasterBand(b), factor)
+        ox0, oy0 = int(x0 / ovr_factor), int(y0 / ovr_factor)
+        ox1 = min(band.XSize, max(ox0 + 1, math.ceil(x1 / ovr_factor)))
+        oy1 = min(band.YSize, max(oy0 + 1, math.ceil(y1 / ovr_factor)))
+        arr = band.ReadAsArray(ox0, oy0, ox1 - ox0, oy1 - oy0,
+                               buf_xsize=out_w, buf_ysize=out_h)
+        channel = to_uint8(arr, source.stretch[i])
+        if len(source.display_bands) == 1:
+            rgba[:out_h, :out_w, :3] = channel[:, :, np.newaxis]
+        else:
+            rgba[:out_h, :out_w, i] = channel
+
+    # 透明度: 掩膜波段（NoData/Alpha），降采样读取时GDAL自动使用概视图
+    mask = dataset.GetRasterBand(source.display_bands[0]).GetMaskBand()
+    rgba[:out_h, :out_w, 3] = mask.ReadAsArray(x0, y0, x1 - x0, y1 - y0,
+                                               buf_xsize=out_w, buf_ysize=out_h)
+
+    pil_format = TILE_FORMATS[ext][0]
+    image = Image.fromarray(rgba, mode='RGBA')
+    if pil_format == 'JPEG':
+        image = image.convert('RGB')
+
+    buf = io.BytesIO()
+    image.save(buf, format=pil_format)
+    return buf.getvalue()
+
+
+class TileCache:
+    """按字节数限制的内存LRU瓦片缓存，可选磁盘缓存"""
+
+    def __init__(self, max_bytes: int, cache_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key: Tuple) -> str:
+        cache_key, z, x, y, ext = key
+        return os.path.join(self.cache_dir, cache_key, str(z), str(x), f"{y}.{ext}")
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                return data
+
+        if self.cache_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self._put_memory(key, data)
+                return data
+        return None
+
+    def put(self, key: Tuple, data: bytes) -> None:
+        self._put_memory(key, data)
+        if self.cache_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def _put_memory(self, key: Tuple, data: bytes) -> None:
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._items:
+                _, old = self._items.popitem(last=False)
+                self._bytes -= len(old)
+
+
+class TileServer:
+    """瓦片服务：管理影像、缓存与并发渲染"""
+
+    def __init__(
+        self,
+        inputs: Dict[str, str],
+        cache_dir: Optional[str] = None,
+        memory_cache_mb: int = 256
+    ):
+        """
+        Args:
+            inputs: 影像名称 -> 路径
+            cache_dir: 磁盘缓存目录（None表示不使用磁盘缓存）
+            memory_cache_mb: 内存缓存大小（MB）
+        """
+        self.inputs = dict(inputs)
+        # 每个连接由独立线程处理，数据集按路径借出、归还，跨连接复用
+        self.pool = SharedDatasetPool()
+        self.cache = TileCache(memory_cache_mb * 1024 * 1024, cache_dir)
+        self._sources = {}
+        self._source_lock = threading.Lock()
+        self._tile_locks = {}
+        self._tile_locks_lock = threading.Lock()
+
+    def get_source(self, name: str) -> Optional[TileSource]:
+        """获取（首次访问时初始化）影像的瓦片参数"""
+        if name not in self.inputs:
+            return None
+        with self._source_lock:
+            source = self._sources.get(name)
+            if source is None:
+                path = self.inputs[name]
+                with self.pool.checkout(path) as dataset:
+                    source = TileSource(name, path, dataset)
+                self._sources[name] = source
+                logger.info(f"发布影像 {name}: {source.width}x{source.height}, "
+                            f"级别 0-{source.max_zoom}")
+            return source
+
+    def get_tile(self, name: str, z: int, x: int, y: int, ext: str) -> Optional[bytes]:
+        """
+        获取瓦片（内存缓存 -> 磁盘缓存 -> 渲染）
+
+        同一瓦片的并发请求只渲染一次。
+
+        Returns:
+            编码后的瓦片，不存在时返回None
+        """
+        source = self.get_source(name)
+        if source is None or ext not in TILE_FORMATS:
+            return None
+
+        key = (source.cache_key, z, x, y, ext)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        with self._tile_locks_lock:
+            lock = self._tile_locks.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                data = self.cache.get(key)
+                if data is None:
+                    with self.pool.checkout(source.path) as dataset:
+                        data = render_tile(dataset, source, z, x, y, ext)
+                    if data is not None:
+                        self.cache.put(key, data)
+                return data
+        finally:
+            with self._tile_locks_lock:
+                self._tile_locks.pop(key, None)
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """瓦片服务 HTTP 请求处理"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        tiles = self.server.tile_server
+        path = self.path.split('?', 1)[0]
+
+        try:
+            if path == '/':
+                self._send(200, json.dumps(sorted(tiles.inputs)).encode('utf-8'), 'application/json')
+                return
+
+            if path.endswith('.json'):
+                source = tiles.get_source(path[1:-len('.json')])
+                if source is None:
+                    self._send(404, b'Not Found', 'text/plain')
+                    return
+                host = self.headers.get('Host', f"{self.server.server_address[0]}:{self.server.server_address[1]}")
+                body = json.dumps(source.tilejson(f"http://{host}"), ensure_ascii=False)
+                self._send(200, body.encode('utf-8'), 'application/json')
+                return
+
+            match = TILE_PATH.match(path)
+            if match is None:
+                self._send(404, b'Not Found', 'text/plain')
+                return
+            name, z, x, y, ext = match.groups()
+            ext = ext.lower()
+            data = tiles.get_tile(name, int(z), int(x), int(y), ext)
+            if data is None:
+                self._send(404, b'Not Found', 'text/plain')
+                return
+            self._send(200, data, TILE_FORMATS[ext][1], cacheable=True)
+
+        except Exception as e:
+            logger.error(f"瓦片请求失败 {path}: {e}")
+            self._send(500, str(e).encode('utf-8'), 'text/plain; charset=utf-8')
+
+    def _send(self, status: int, body: bytes, content_type: str, cacheable: bool = False) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if cacheable:
+            self.send_header('Cache-Control', 'max-age=3600')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def run_tile_server(
+    inputs: Dict[str, str],
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    cache_dir: Optional[str] = None,
+    memory_cache_mb: int = 256
+) -> None:
+    """
+    启动瓦片服务（阻塞直到中断）
+
+    Args:
+        inputs: 影像名称 -> 路径
+        host: 监听地址
+        port: 端口
+        cache_dir: 磁盘缓存目录
+        memory_cache_mb: 内存缓存大小（MB）
+    """
+    if not inputs:
+        raise ImageCropError("请至少指定一个影像")
+
+    httpd = ThreadingHTTPServer((host, port), TileRequestHandler)
+    httpd.daemon_threads = True
+    httpd.tile_server = TileServer(inputs, cache_dir, memory_cache_mb)
+
+    for name in sorted(inputs):
+        logger.info(f"瓦片地址: http://{host}:{port}/{name}/{{z}}/{{x}}/{{y}}.png")
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+        httpd.tile_server.pool.clear()
@@ -0,0 +1,508 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - 规则分块模块
+
+将影像按规则网格切分为多个小块（如机器学习样本切片）。
+
+源影像只打开一次，按条带读取：同一行的切片共享一次条带读取，
+再由线程池并行写出各切片，避免逐个调用 crop_by_pixel 反复打开源影像。
+
+切片可写为影像文件，也可直接写入 NumPy 分片（npy/npz）并附带JSON索引，
+训练数据加载时无需逐个解码GeoTIFF。
+"""
+
+import csv
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .utils import logger, ImageCropError, CancelToken
+from .image_io import (
+    open_raster, get_raster_info, read_band_data, write_raster, close_raster,
+    GDAL_DTYPE_MAP
+)
+from .coord_transform import get_geotransform, calculate_crop_geotransform
+from .crop_core import ProgressCallback, CHUNK_BYTES, FORMAT_EXTENSIONS
+
+
+# 边缘处理方式: pad 用NoData（或0）填充到完整尺寸, drop 丢弃不完整的切片
+EDGE_MODES = ('pad', 'drop')
+
+DEFAULT_NAME_TEMPLATE = '{stem}_r{row:04d}_c{col:04d}'
+
+# NumPy 分片格式；每个分片包含的切片数
+ARRAY_FORMATS = ('npy', 'npz')
+DEFAULT_SHARD_SIZE = 256
+
+
+class Chip(NamedTuple):
+    """一个切片在源影像中的位置"""
+    index: int
+    row: int
+    col: int
+    x_off: int
+    y_off: int
+
+
+def grid_offsets(length: int, size: int, stride: int, edge: str = 'pad') -> List[int]:
+    """
+    计算一个方向上的切片起点
+
+    Args:
+        length: 影像在该方向上的像素数
+        size: 切片尺寸
+        stride: 步长（小于 size 时相邻切片重叠）
+        edge: 边缘处理方式，'pad' 或 'drop'
+
+    Returns:
+        切片起点列表
+    """
+    if edge == 'drop':
+        return list(range(0, length - size + 1, stride))
+    # pad: 保留起点在影像内、且上一个切片尚未覆盖到影像末端的切片
+    return [off for off in range(0, length, stride)
+            if off == 0 or off - stride + size < length]
+
+
+def plan_grid(
+    width: int,
+    height: int,
+    size: int,
+    stride: Optional[int] = None,
+    edge: str = 'pad'
+) -> List[Chip]:
+    """
+    生成切片网格
+
+    Args:
+        width: 影像宽度
+        height: 影像高度
+        size: 切片尺寸（正方形）
+        stride: 步长，默认等于 size（无重叠）
+        edge: 边缘处理方式，'pad' 或 'drop'
+
+    Returns:
+        按行优先排列的切片列表
+
+    Raises:
+        ValueError: 参数无效
+    """
+    stride = stride or size
+    if size <= 0 or stride <= 0:
+        raise ValueError(f"切片尺寸和步长必须为正数: size={size}, stride={stride}")
+    if edge not in EDGE_MODES:
+        raise ValueError(f"不支持的边缘处理方式: {edge}，请使用 'pad' 或 'drop'")
+
+    xs = grid_offsets(width, size, stride, edge)
+    ys = grid_offsets(height, size, stride, edge)
+    return [Chip(r * len(xs) + c, r, c, x, y)
+            for r, y in enumerate(ys) for c, x in enumerate(xs)]
+
+
+def chip_footprint(gt: tuple, x_off: int, y_off: int, size: int) -> List[List[float]]:
+    """切片四角的地理坐标（闭合环，左上角起，北向上影像中为逆时针，符合GeoJSON约定）"""
+    corners = [(x_off, y_off), (x_off, y_off + size),
+               (x_off + size, y_off + size), (x_off + size, y_off), (x_off, y_off)]
+    return [[gt[0] + px * gt[1] + py * gt[2], gt[3] + px * gt[4] + py * gt[5]]
+            for px, py in corners]
+
+
+def write_index(index_path: str, records: List[Dict[str, Any]], projection: str = '') -> None:
+    """
+    写出切片索引文件
+
+    扩展名为 .geojson/.json 时写出 GeoJSON（坐标为源影像坐标系），否则写出 CSV。
+
+    Args:
+        index_path: 索引文件路径
+        records: 切片记录（含 footprint 字段）
+        projection: 源影像投影WKT（写入GeoJSON的说明字段）
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    fields = [k for k in records[0] if k != 'footprint'] if records else []
+
+    if index_path.lower().endswith(('.geojson', '.json')):
+        features = [{
+            'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [rec['footprint']]},
+            'properties': {k: rec[k] for k in fields},
+        } for rec in records]
+        collection = {'type': 'FeatureCollection', 'features': features}
+        if projection:
+            collection['crs_wkt'] = projection
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(collection, f, ensure_ascii=False)
+        return
+
+    with open(index_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields + ['min_x', 'min_y', 'max_x', 'max_y'])
+        for rec in records:
+            xs = [p[0] for p in rec['footprint']]
+            ys = [p[1] for p in rec['footprint']]
+            writer.writerow([rec[k] for k in fields] + [min(xs), min(ys), max(xs), max(ys)])
+
+
+class ShardWriter:
+    """
+    将切片写入 NumPy 分片文件
+
+    npy: 每个分片为形状 (切片数, 波段数, size, size) 的 .npy 文件，写出时直接内存映射，
+         读取端可用 np.load(path, mmap_mode='r') 零拷贝访问。
+    npz: 每个分片在内存中攒满后一次写出（含 chips 和 geotransforms 数组），不可内存映射。
+
+    多个写出线程可同时写入不同的切片位置。
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        stem: str,
+        fmt: str,
+        total: int,
+        chip_shape: Tuple[int, int, int],
+        dtype: np.dtype,
+        shard_size: int = DEFAULT_SHARD_SIZE
+    ):
+        """
+        Args:
+            output_dir: 输出目录
+            stem: 分片文件名前缀
+            fmt: 'npy' 或 'npz'
+            total: 切片总数（上限；实际写入较少时最后一个分片在 close 时截断）
+            chip_shape: 单个切片的形状 (波段数, 行数, 列数)
+            dtype: 数据类型
+            shard_size: 每个分片包含的切片数
+        """
+        self.output_dir = output_dir
+        self.stem = stem
+        self.fmt = fmt
+        self.total = total
+        self.chip_shape = tuple(chip_shape)
+        self.dtype = np.dtype(dtype)
+        self.shard_size = max(1, shard_size)
+        self._arrays = {}
+        self._geotransforms = {}
+        self._filled = {}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def shard_path(self, shard: int) -> str:
+        """分片文件路径"""
+        return os.path.join(self.output_dir, f"{self.stem}_{shard:05d}.{self.fmt}")
+
+    def _open_shard(self, shard: int) -> np.ndarray:
+        count = min(self.shard_size, self.total - shard * self.shard_size)
+        shape = (count,) + self.chip_shape
+        if self.fmt == 'npy':
+            return np.lib.format.open_memmap(self.shard_path(shard), mode='w+',
+                                             dtype=self.dtype, shape=shape)
+        self._geotransforms[shard] = np.zeros((count, 6), dtype=np.float64)
+        return np.empty(shape, dtype=self.dtype)
+
+    def write(self, position: int, data: np.ndarray, geotransform: tuple) -> Tuple[str, int]:
+        """
+        写入一个切片
+
+        Args:
+            position: 切片序号（从0开始连续编号）
+            data: 切片数据 (波段数, 行数, 列数)
+            geotransform: 切片的仿射变换参数
+
+        Returns:
+            (分片文件路径, 在分片中的位置)
+        """
+        shard, slot = divmod(position, self.shard_size)
+        with self._lock:
+            array = self._arrays.get(shard)
+            if array is None:
+                array = self._arrays[shard] = self._open_shard(shard)
+                self._filled[shard] = 0
+
+        array[slot] = data
+        if self.fmt == 'npz':
+            self._geotransforms[shard][slot] = geotransform
+
+        with self._lock:
+            self._filled[shard] += 1
+            count = self._filled[shard]
+            finished = count == len(array)
+        if finished:
+            self._finish(shard, count)
+        return self.shard_path(shard), slot
+
+    def _finish(self, shard: int, count: int) -> None:
+        with self._lock:
+            array = self._arrays.pop(shard)
+        geotransforms = self._geotransforms.pop(shard, None)
+        path = self.shard_path(shard)
+        if self.fmt == 'npz':
+            np.savez(path, chips=array[:count], geotransforms=geotransforms[:count])
+        elif count == len(array):
+            array.flush()
+        else:
+            # 未写满（跳过了空切片，只在 close 时出现）: 复制实际切片并关闭内存映射，
+            # 再写到临时文件后替换；Windows 上不能截断或替换仍被映射的文件
+            chips = np.array(array[:count])
+            mapping = array._mmap
+            del array
+            mapping.close()
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, chips)
+            os.replace(tmp_path, path)
+        logger.debug(f"分片已写出: {path}")
+
+    def close(self) -> None:
+        """写出尚未写满的分片"""
+        with self._lock:
+            remaining = [(shard, self._filled[shard]) for shard in self._arrays]
+        for shard, count in remaining:
+            self._finish(shard, count)
+
+
+def write_shard_index(
+    index_path: str,
+    records: List[Dict[str, Any]],
+    writer: ShardWriter,
+    src_gt: tuple,
+    projection: str = '',
+    nodata: Optional[float] = None
+) -> None:
+    """
+    写出 NumPy 分片的JSON索引（分片文件、数组形状、各切片的仿射变换参数）
+
+    分片路径相对于索引文件所在目录保存。
+
+    Args:
+        index_path: 索引文件路径
+        records: 切片记录（含 path、slot 字段）
+        writer: 分片写出器
+        src_gt: 源影像仿射变换参数
+        projection: 投影WKT
+        nodata: NoData值
+    """
+    base_dir = os.path.dirname(os.path.abspath(index_path))
+    shards = sorted({rec['path'] for rec in records})
+    shard_ids = {path: i for i, path in enumerate(shards)}
+    index = {
+        'format': writer.fmt,
+        'dtype': writer.dtype.str,
+        'chip_shape': list(writer.chip_shape),
+        'projection': projection,
+        'nodata': nodata,
+        'shards': [os.path.relpath(p, base_dir) for p in shards],
+        'chips': [{
+            'index': rec['index'], 'row': rec['row'], 'col': rec['col'],
+            'x_off': rec['x_off'], 'y_off': rec['y_off'],
+            'shard': shard_ids[rec['path']], 'slot': rec['slot'],
+            'geotransform': list(calculate_crop_geotransform(src_gt, rec['x_off'], rec['y_off'])),
+        } for rec in sorted(records, key=lambda r: r['index'])],
+    }
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+
+
+def load_shards(index_path: str, mmap_mode: Optional[str] = 'r') -> Tuple[Dict[str, Any], List[np.ndarray]]:
+    """
+    读取 NumPy 分片
+
+    Args:
+        index_path: write_shard_index 写出的索引文件
+        mmap_mode: npy 分片的内存映射模式（None表示读入内存）；npz 分片总是读入内存
+
+    Returns:
+        (索引字典, 各分片数组列表)；第 i 个切片为 arrays[chip['shard']][chip['slot']]
+    """
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(index_path))
+    arrays = []
+    for rel_path in index['shards']:
+        path = os.path.join(base_dir, rel_path)
+        if index['format'] == 'npy':
+            arrays.append(np.load(path, mmap_mode=mmap_mode))
+        else:
+            with np.load(path) as npz:
+                arrays.append(npz['chips'])
+    return index, arrays
+
+
+def tile_raster(
+    input_path: str,
+    output_dir: str,
+    size: int,
+    stride: Optional[int] = None,
+    edge: str = 'pad',
+    output_format: str = 'GTiff',
+    name_template: str = DEFAULT_NAME_TEMPLATE,
+    index_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancelToken] = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    skip_empty: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    将影像切分为规则网格切片
+
+    Args:
+        input_path: 输入影像路径
+        output_dir: 输出目录
+        size: 切片尺寸（像素，正方形）
+        stride: 步长，默认等于 size；小于 size 时切片重叠
+        edge: 边缘处理方式，'pad'（填充NoData或0）或 'drop'（丢弃）
+        output_format: 输出格式（默认GeoTIFF）；'npy'/'npz' 表示写入 NumPy 分片，
+            并在输出目录写出 {stem}_index.json 索引
+        name_template: 文件名模板（不含扩展名），可用字段
+            {stem} {index} {row} {col} {x} {y}，可包含子目录（NumPy 分片不使用）
+        index_path: 索引文件路径（.csv 或 .geojson），None表示不写索引
+        workers: 写出线程数（默认CPU核数）
+        progress_callback: 进度回调 (已完成切片数, 总切片数)
+        cancel_token: 取消令牌
+        shard_size: NumPy 分片包含的切片数
+        skip_empty: 是否跳过没有有效像素的切片（按第一个波段的掩膜判断；
+            整个条带无有效像素时不读取影像数据）
+
+    Returns:
+        切片记录列表（index, row, col, x_off, y_off, path, footprint；NumPy 分片另含 slot）
+
+    Raises:
+        ValueError: 参数无效
+        GDALError: GDAL操作失败
+        CropCancelledError: 被取消
+    """
+    src_ds = None
+    try:
+        src_ds = open_raster(input_path)
+        info = get_raster_info(src_ds)
+        width, height, bands = info['width'], info['height'], info['bands']
+        chips = plan_grid(width, height, size, stride, edge)
+        if not chips:
+            raise ImageCropError(f"影像尺寸 {width}x{height} 小于切片尺寸 {size}，没有完整切片")
+
+        src_gt = get_geotransform(src_ds)
+        projection = info['projection']
+        nodata = info['nodata']
+        fill = nodata if nodata is not None else 0
+        if info['dtype'] not in GDAL_DTYPE_MAP:
+            raise ImageCropError(f"不支持的数据类型: {info['dtype_name']}")
+        np_dtype = np.dtype(GDAL_DTYPE_MAP[info['dtype']])
+
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        ext = FORMAT_EXTENSIONS.get(output_format, '')
+        logger.info(f"切片: {len(chips)} 个, 尺寸 {size}, 步长 {stride or size}, 边缘 {edge}")
+
+        # 同一行的切片按列分组，每组读取一次条带，单次读取不超过 CHUNK_BYTES
+        row_bytes = size * bands * np_dtype.itemsize
+        max_cols = max(size, CHUNK_BYTES // max(1, row_bytes))
+        strips = []
+        for chip in chips:
+            if (strips and strips[-1][0].row == chip.row
+                    and chip.x_off + size - strips[-1][0].x_off <= max_cols):
+                strips[-1].append(chip)
+            else:
+                strips.append([chip])
+
+        records = []
+        done = 0
+        workers = workers or os.cpu_count() or 4
+
+        shard_writer = None
+        if output_format.lower() in ARRAY_FORMATS:
+            shard_writer = ShardWriter(output_dir, stem, output_format.lower(), len(chips),
+                                       (bands, size, size), np_dtype, shard_size)
+
+        mask_band = src_ds.GetRasterBand(1).GetMaskBand() if skip_empty else None
+        position = 0
+        skipped = 0
+
+        def write_chip(chip: Chip, data: np.ndarray, position: int) -> Dict[str, Any]:
+            chip_gt = calculate_crop_geotransform(src_gt, chip.x_off, chip.y_off)
+            record = {
+                'index': chip.index, 'row': chip.row, 'col': chip.col,
+                'x_off': chip.x_off, 'y_off': chip.y_off, 'size': size,
+            }
+            if shard_writer:
+                record['path'], record['slot'] = shard_writer.write(position, data, chip_gt)
+            else:
+                name = name_template.format(stem=stem, index=chip.index, row=chip.row,
+                                            col=chip.col, x=chip.x_off, y=chip.y_off)
+                record['path'] = os.path.join(output_dir, name + ext)
+                write_raster(record['path'], data, info['dtype'], output_format,
+                             chip_gt, projection, nodata)
+            record['footprint'] = chip_footprint(src_gt, chip.x_off, chip.y_off, size)
+            return record
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tile-writer') as executor:
+            pending = []
+            for strip in strips:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+
+                x0, y0 = strip[0].x_off, strip[0].y_off
+                x1 = strip[-1].x_off + size
+                read_w = min(x1, width) - x0
+                read_h = min(y0 + size, height) - y0
+
+                # 先读掩膜，整个条带无有效像素时不读影像数据
+                valid = None
+                if mask_band is not None:
+                    valid = np.zeros((size, x1 - x0), dtype=bool)
+                    valid[:read_h, :read_w] = mask_band.ReadAsArray(x0, y0, read_w, read_h) > 0
+                    if not valid.any():
+                        skipped += len(strip)
+                        continue
+
+                # 读取条带（超出影像的部分用 fill 填充）
+                block = np.full((bands, size, x1 - x0), fill, dtype=np_dtype)
+                for b in range(bands):
+                    block[b, :read_h, :read_w] = read_band_data(src_ds, b + 1, x0, y0, read_w, read_h)
+
+                for chip in strip:
+                    offset = chip.x_off - x0
+                    if valid is not None and not valid[:, offset:offset + size].any():
+                        skipped += 1
+                        continue
+                    data = block[:, :, offset:offset + size]
+                    pending.append(executor.submit(write_chip, chip, data, position))
+                    position += 1
+
+                # 限制排队的切片数，避免读取远快于写出时内存持续增长
+                while len(pending) > workers * 4:
+                    records.append(pending.pop(0).result())
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done + skipped, len(chips))
+
+            for future in pending:
+                records.append(future.result())
+                done += 1
+                if progress_callback:
+                    progress_callback(done + skipped, len(chips))
+
+        if skipped:
+            logger.info(f"跳过无有效像素的切片: {skipped} 个")
+
+        if shard_writer and records:
+            shard_writer.close()
+            shard_index = os.path.join(output_dir, f"{stem}_index.json")
+            write_shard_index(shard_index, records, shard_writer, src_gt, projection, nodata)
+            logger.info(f"分片索引: {shard_index}")
+
+        if index_path:
+            write_index(index_path, records, projection)
+            logger.info(f"索引文件: {index_path}")
+
+        logger.info(f"切片完成: {len(records)} 个 -> {output_dir}")
+        return records
+
+    finally:
+        if src_ds:
+            close_raster(src_ds)
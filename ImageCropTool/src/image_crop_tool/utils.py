@@ -9,6 +9,7 @@
 import os
 import sys
 import logging
+import threading
 from typing import Tuple, Optional
 
 
@@ -39,6 +40,48 @@ class GDALError(ImageCropError):
     pass
 
 
+class CropCancelledError(ImageCropError):
+    """裁剪被取消异常"""
+    pass
+
+
+class OutputPathError(ImageCropError):
+    """输出路径不在允许的目录内异常"""
+    pass
+
+
+# ============== 取消令牌 ==============
+
+class CancelToken:
+    """
+    线程安全的取消令牌
+    
+    由调用方（如GUI线程）调用 cancel()，裁剪流程在每个数据块之间检查并中止。
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self) -> None:
+        """请求取消"""
+        self._event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._event.is_set()
+    
+    def raise_if_cancelled(self) -> None:
+        """
+        已请求取消时抛出异常
+        
+        Raises:
+            CropCancelledError: 已请求取消
+        """
+        if self._event.is_set():
+            raise CropCancelledError("裁剪已取消")
+
+
 # ============== 日志配置 ==============
 
 def setup_logging(level: int = logging.INFO, log_file: Optional[str] = None) -> logging.Logger:
@@ -80,12 +123,38 @@ def setup_logging(level: int = logging.INFO, log_file: Optional[str] = None) ->
     return logger
 
 
-# 默认日志器
-logger = setup_logging()
+# 默认日志器（处理器由程序入口通过 setup_logging 配置，导入时不产生副作用）
+logger = logging.getLogger('image_crop_tool')
 
 
 # ============== 路径处理 ==============
 
+def is_vsi_path(path: str) -> bool:
+    """
+    判断是否为GDAL虚拟文件系统路径（/vsimem/、/vsizip/ 等）
+    
+    Args:
+        path: 输入路径
+    
+    Returns:
+        是否为虚拟路径
+    """
+    return path.startswith('/vsi')
+
+
+def is_url(path: str) -> bool:
+    """
+    判断是否为HTTP(S) URL
+    
+    Args:
+        path: 输入路径
+    
+    Returns:
+        是否为URL
+    """
+    return path.lower().startswith(('http://', 'https://'))
+
+
 def normalize_path(path: str) -> str:
     """
     规范化路径，处理中文路径问题
@@ -94,8 +163,13 @@ def normalize_path(path: str) -> str:
         path: 输入路径
     
     Returns:
-        规范化后的绝对路径
+        规范化后的绝对路径（GDAL虚拟路径原样返回，HTTP(S) URL转换为 /vsicurl/ 路径）
     """
+    if is_vsi_path(path):
+        return path
+    if is_url(path):
+        return '/vsicurl/' + path
+    
     # 转换为绝对路径
     abs_path = os.path.abspath(path)
     # 规范化路径分隔符
@@ -110,6 +184,8 @@ def ensure_dir(path: str) -> None:
     Args:
         path: 目录路径
     """
+    if is_vsi_path(path):
+        return
     dir_path = os.path.dirname(path) if os.path.splitext(path)[1] else path
     if dir_path and not os.path.exists(dir_path):
         os.makedirs(dir_path, exist_ok=True)
@@ -183,9 +259,12 @@ def validate_pixel_bounds(
 
 # ============== GDAL 配置 ==============
 
-def configure_gdal() -> None:
+def configure_gdal(profile: Optional[str] = None) -> None:
     """
-    配置GDAL环境，静默警告，支持中文路径
+    配置GDAL环境，静默警告，支持中文路径，并应用运行参数配置（块缓存、线程数、VSI缓存等）
+    
+    Args:
+        profile: 运行参数配置名（见 gdal_profiles），None时按环境变量/配置文件选择
     """
     try:
         from osgeo import gdal
@@ -198,13 +277,33 @@ def configure_gdal() -> None:
         gdal.SetConfigOption('GDAL_FILENAME_IS_UTF8', 'YES')
         gdal.SetConfigOption('SHAPE_ENCODING', 'UTF-8')
         
+        # 运行参数配置
+        from .gdal_profiles import apply_gdal_profile
+        apply_gdal_profile(profile)
+        
         logger.debug("GDAL配置完成")
     except ImportError:
         raise GDALError("无法导入GDAL库，请确保已正确安装")
 
 
-# 模块加载时自动配置GDAL
-try:
-    configure_gdal()
-except Exception as e:
-    logger.warning(f"GDAL配置失败: {e}")
+_gdal_configured = False
+_gdal_config_lock = threading.Lock()
+
+
+def ensure_gdal_configured() -> None:
+    """
+    首次使用GDAL时进行配置（只执行一次）
+    
+    在打开或创建影像前调用，使 --help、参数错误等路径无需加载GDAL。
+    """
+    global _gdal_configured
+    if _gdal_configured:
+        return
+    with _gdal_config_lock:
+        if _gdal_configured:
+            return
+        try:
+            configure_gdal()
+        except Exception as e:
+            logger.warning(f"GDAL配置失败: {e}")
+        _gdal_configured = True
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+影像裁剪小工具 - GDAL虚拟文件系统模块
+
+直接从压缩包或HTTP服务器读取影像，无需解压或下载整个文件:
+    scene.zip                -> /vsizip//data/scene.zip/<成员>
+    scene.tar / .tar.gz/.tgz -> /vsitar//data/scene.tar.gz/<成员>
+    dem.tif.gz               -> /vsigzip//data/dem.tif.gz
+    https://host/cog.tif     -> /vsicurl/https://host/cog.tif
+    https://host/scene.zip   -> /vsizip//vsicurl/https://host/scene.zip/<成员>
+
+压缩包中只有一个影像文件时自动选择，否则按成员名（支持 * ? 通配符）选择。
+GDAL只读取所需成员中裁剪窗口涉及的字节范围；打开压缩包内的影像时启用VSI块缓存
+（ARCHIVE_VSI_OPTIONS），减少解压流的回退重读。
+
+网络影像（/vsicurl/、/vsis3/ 等）按范围请求读取，服务器须支持 Range 请求:
+    - 打开时不列目录、不探测旁路文件，一次读入文件头和IFD（NETWORK_OPEN_OPTIONS）
+    - 下载过的区域（文件头、IFD）缓存在进程内，再次打开同一文件时不重复请求；
+      缓存由默认的16MB增大到128MB（NETWORK_READ_OPTIONS，首次打开网络影像时设置）
+    - 裁剪前按行块调用 prefetch_window，一次预取该行块涉及的全部数据块
+
+以下沿用GDAL的默认行为，本模块不作调整: 预取时相邻数据块合并为一个范围请求
+（GDAL_HTTP_MERGE_CONSECUTIVE_RANGES）、多个范围并行请求（GDAL_HTTP_MULTIRANGE）；
+每个线程复用同一个curl句柄，服务器支持HTTP keep-alive时后续请求复用已建立的连接。
+
+已通过配置文件、运行参数配置或环境变量设置的同名选项优先。
+"""
+
+import fnmatch
+import os
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+
+from osgeo import gdal
+
+from .utils import logger, is_vsi_path, is_url, normalize_path, ImageCropError, FileNotFoundError
+
+
+# 压缩包扩展名 -> 虚拟文件系统前缀（按扩展名长度优先匹配）
+ARCHIVE_PREFIXES = [
+    ('.tar.gz', '/vsitar/'),
+    ('.tgz', '/vsitar/'),
+    ('.tar', '/vsitar/'),
+    ('.zip', '/vsizip/'),
+    ('.gz', '/vsigzip/'),
+]
+
+# 可包含多个成员的压缩包前缀
+CONTAINER_PREFIXES = ('/vsizip/', '/vsitar/')
+
+# 压缩包中按扩展名识别的影像文件
+RASTER_EXTENSIONS = (
+    '.tif', '.tiff', '.img', '.jp2', '.vrt', '.ntf', '.hdf', '.h5', '.nc',
+    '.dat', '.bil', '.bsq', '.bip', '.png', '.jpg', '.jpeg', '.asc', '.dem',
+)
+
+# 打开压缩包内影像时使用的VSI缓存设置
+ARCHIVE_VSI_OPTIONS = {
+    'VSI_CACHE': 'TRUE',
+    'VSI_CACHE_SIZE': str(64 * 1024 * 1024),
+}
+
+# 按范围请求读取的网络文件系统前缀（可嵌套在压缩包前缀之后）
+NETWORK_PREFIXES = (
+    '/vsicurl/', '/vsis3/', '/vsigs/', '/vsiaz/', '/vsiadls/', '/vsioss/', '/vsiswift/',
+)
+
+# 打开网络影像时使用的设置（只在 gdal.Open 期间生效）
+NETWORK_OPEN_OPTIONS = {
+    # 不列目录、不探测 .aux.xml/.ovr 等旁路文件，每次探测都是一个HTTP请求
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    # 打开时一次读入文件头和IFD（COG的元数据都在文件开头）
+    'GDAL_INGESTED_BYTES_AT_OPEN': str(64 * 1024),
+}
+
+# 读取网络影像时使用的设置（进程级设置）
+NETWORK_READ_OPTIONS = {
+    # 已下载区域的进程内缓存（跨数据集共享，首次访问网络文件前设置才生效）
+    'CPL_VSIL_CURL_CACHE_SIZE': str(128 * 1024 * 1024),
+}
+
+
+def archive_prefix(path: str) -> Optional[str]:
+    """本地压缩包对应的虚拟文件系统前缀，不是压缩包时返回None"""
+    lower = path.lower()
+    for ext, prefix in ARCHIVE_PREFIXES:
+        if lower.endswith(ext):
+            return prefix
+    return None
+
+
+def is_archive_path(path: str) -> bool:
+    """是否为压缩包内的虚拟路径"""
+    return path.startswith(CONTAINER_PREFIXES + ('/vsigzip/',))
+
+
+def is_network_path(path: str) -> bool:
+    """是否为按范围请求读取的网络路径（包括网络上的压缩包成员）"""
+    return any(prefix in path for prefix in NETWORK_PREFIXES)
+
+
+def vsi_exists(path: str) -> bool:
+    """虚拟路径是否存在（不读取文件内容）"""
+    return gdal.VSIStatL(path) is not None
+
+
+def list_members(archive_path: str) -> List[str]:
+    """
+    列出压缩包中的文件（不含目录）
+
+    Args:
+        archive_path: 压缩包的虚拟路径（如 /vsizip//data/scene.zip）
+
+    Returns:
+        成员路径列表（相对于压缩包）
+    """
+    names = gdal.ReadDirRecursive(archive_path) or []
+    return [name for name in names if not name.endswith('/')]
+
+
+def select_member(archive_path: str, member: Optional[str] = None) -> str:
+    """
+    选择压缩包中的影像成员
+
+    Args:
+        archive_path: 压缩包的虚拟路径
+        member: 成员路径或通配符（匹配完整路径或文件名）；None时选择唯一的影像文件
+
+    Returns:
+        成员路径（相对于压缩包）
+
+    Raises:
+        ImageCropError: 没有匹配的成员，或匹配到多个
+    """
+    members = list_members(archive_path)
+    if member is None:
+        matches = [m for m in members if m.lower().endswith(RASTER_EXTENSIONS)]
+        hint = "，请用 --member 指定"
+    elif member in members:
+        return member
+    else:
+        matches = [m for m in members
+                   if fnmatch.fnmatch(m, member) or fnmatch.fnmatch(m.rsplit('/', 1)[-1], member)]
+        hint = ""
+
+    if len(matches) == 1:
+        return matches[0]
+    if not matches:
+        what = f"与 {member} 匹配的成员" if member else "影像文件"
+        raise ImageCropError(f"压缩包中没有{what}: {archive_path}")
+    shown = ', '.join(matches[:10]) + (' ...' if len(matches) > 10 else '')
+    raise ImageCropError(f"压缩包中有 {len(matches)} 个匹配的成员{hint}: {shown}")
+
+
+def resolve_input_path(path: str, member: Optional[str] = None) -> str:
+    """
+    将输入路径解析为GDAL可直接打开的路径
+
+    HTTP(S) URL 转换为 /vsicurl/ 路径；本地或网络上（URL 或 /vsicurl/ 等路径）的压缩包
+    转换为 /vsizip/、/vsitar/ 或 /vsigzip/ 虚拟路径并选择成员；指向压缩包本身的虚拟路径
+    （如 /vsizip//data/scene.zip）同样选择成员；其他路径原样返回。
+    网络路径在首次访问前设置网络读取选项（apply_network_options）。
+
+    Args:
+        path: 输入路径
+        member: 压缩包成员（路径或通配符），None表示自动选择唯一的影像文件
+
+    Returns:
+        可直接打开的路径
+
+    Raises:
+        FileNotFoundError: 压缩包不存在
+        ImageCropError: 成员选择失败，或对非压缩包指定了成员
+    """
+    if is_url(path) or is_network_path(path):
+        # 列出压缩包成员、检查文件是否存在都会访问网络，须在此之前设置
+        apply_network_options()
+    # 网络路径（URL 或 /vsicurl/ 等）上的压缩包同样按扩展名识别
+    remote = is_url(path) or path.startswith(NETWORK_PREFIXES)
+    if is_vsi_path(path) and not remote:
+        # 指向压缩包本身（目录）时选择成员
+        archive = None
+        if path.startswith(CONTAINER_PREFIXES):
+            stat = gdal.VSIStatL(path)
+            if member or (stat is not None and stat.IsDirectory()):
+                archive = path
+    else:
+        prefix = archive_prefix(path.split('?', 1)[0] if remote else path)
+        if remote:
+            path = normalize_path(path)
+        if prefix is None:
+            archive = None
+        else:
+            if not remote and not os.path.isfile(path):
+                raise FileNotFoundError(f"文件不存在: {path}")
+            archive = prefix + (path if remote else os.path.abspath(path))
+            if prefix == '/vsigzip/':
+                if member:
+                    raise ImageCropError(f"gzip 文件只包含一个文件，不能指定成员: {path}")
+                return archive
+
+    if archive is None:
+        if member:
+            raise ImageCropError(f"输入不是压缩包，不能指定成员: {path}")
+        return path
+
+    resolved = f"{archive.rstrip('/')}/{select_member(archive, member)}"
+    logger.debug(f"压缩包成员: {resolved}")
+    return resolved
+
+
+def apply_network_options() -> None:
+    """设置网络读取选项（进程级，已设置的同名选项不覆盖）"""
+    for key, value in NETWORK_READ_OPTIONS.items():
+        if gdal.GetConfigOption(key) is None:
+            gdal.SetConfigOption(key, value)
+
+
+@contextmanager
+def vsi_open_options(path: str) -> Iterator[None]:
+    """
+    打开压缩包内或网络上的影像时临时调整GDAL选项（仅当前线程，已设置的同名选项不覆盖）
+
+    VSI缓存和打开时的读取方式在打开文件句柄时生效，因此只需作用于 gdal.Open 调用；
+    网络读取选项在读取数据块时才生效，由 apply_network_options 进程级设置。
+
+    Args:
+        path: 要打开的路径
+    """
+    options = {}
+    if is_archive_path(path):
+        options.update(ARCHIVE_VSI_OPTIONS)
+    if is_network_path(path):
+        apply_network_options()
+        options.update(NETWORK_OPEN_OPTIONS)
+
+    applied = {}
+    for key, value in options.items():
+        if gdal.GetConfigOption(key) is None:
+            applied[key] = gdal.GetThreadLocalConfigOption(key, None)
+            gdal.SetThreadLocalConfigOption(key, value)
+    try:
+        yield
+    finally:
+        for key, old in applied.items():
+            gdal.SetThreadLocalConfigOption(key, old)
+
+
+def prefetch_window(
+    dataset: gdal.Dataset,
+    x_off: int,
+    y_off: int,
+    x_size: int,
+    y_size: int,
+    bands: Sequence[int]
+) -> None:
+    """
+    预取窗口涉及的数据块（网络影像）
+
+    驱动计算窗口涉及的数据块，合并为尽量少的范围请求一次下载，
+    之后的逐块读取不再单独发出请求。驱动不支持时不做任何操作。
+
+    Args:
+        dataset: 数据集
+        x_off: X方向偏移（像素）
+        y_off: Y方向偏移（像素）
+        x_size: 窗口宽度（像素）
+        y_size: 窗口高度（像素）
+        bands: 波段列表（从1开始）
+    """
+    dataset.AdviseRead(x_off, y_off, x_size, y_size, None, None, None, list(bands))
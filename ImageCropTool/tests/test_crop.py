@@ -18,39 +18,16 @@ from osgeo import gdal
 
 
 def create_test_image(output_path: str, width: int = 500, height: int = 400) -> None:
-    """创建测试影像"""
-    driver = gdal.GetDriverByName('GTiff')
-    
-    # 创建3波段RGB影像
-    ds = driver.Create(output_path, width, height, 3, gdal.GDT_Byte)
-    
-    # 设置地理变换参数（模拟北京附近区域）
-    # 左上角: 116°E, 40°N, 分辨率约0.001度
-    gt = (116.0, 0.001, 0, 40.0, 0, -0.001)
-    ds.SetGeoTransform(gt)
-    
-    # 设置投影（WGS84）
-    ds.SetProjection('GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433]]')
-    
-    # 创建渐变测试数据
-    for band_idx in range(1, 4):
-        band = ds.GetRasterBand(band_idx)
-        
-        # 生成渐变数据
-        data = np.zeros((height, width), dtype=np.uint8)
-        for y in range(height):
-            for x in range(width):
-                if band_idx == 1:  # R - 水平渐变
-                    data[y, x] = int(x / width * 255)
-                elif band_idx == 2:  # G - 垂直渐变
-                    data[y, x] = int(y / height * 255)
-                else:  # B - 对角渐变
-                    data[y, x] = int((x + y) / (width + height) * 255)
-        
-        band.WriteArray(data)
+    """创建测试影像（3波段8位，R水平渐变、G垂直渐变、B对角渐变）"""
+    from image_crop_tool.synthetic import generate_raster
+    
+    # 左上角: 116°E, 40°N, 分辨率约0.001度（模拟北京附近区域），WGS84，不分块不压缩
+    generate_raster(
+        output_path, width, height, bands=3, dtype='Byte',
+        block_size=None, compress=None, crs='EPSG:4326',
+        geotransform=(116.0, 0.001, 0, 40.0, 0, -0.001)
+    )
     
-    ds.FlushCache()
-    ds = None
     print(f"Test image created: {output_path}")
     print(f"  Size: {width} x {height}")
     print(f"  Extent: 116.0E - {116.0 + width * 0.001}E, "
@@ -124,6 +101,1011 @@ def test_geo_crop(input_path: str, output_path: str) -> bool:
         return False
 
 
+def test_pixel_probe(input_path: str) -> bool:
+    """测试像素探针读取源数据所有波段"""
+    from image_crop_tool.pixel_probe import PixelProbe
+    
+    print("\nTesting pixel probe...")
+    
+    try:
+        ds = gdal.Open(input_path)
+        # 缓存上限为两个整块
+        block_bytes = ds.RasterCount * 128 * min(128, ds.GetRasterBand(1).GetBlockSize()[1])
+        probe = PixelProbe(ds, max_bytes=2 * block_bytes)
+        expected = ds.ReadAsArray()
+        
+        for x, y in [(0, 0), (499, 399), (123, 45), (124, 45), (300, 200), (200, 300)]:
+            values = probe.probe(x, y)
+            assert list(values) == list(expected[:, y, x]), f"Value mismatch at ({x}, {y})"
+            assert probe.cache_bytes <= probe.max_bytes, "Block cache exceeds byte limit"
+        assert probe.probe(500, 0) is None, "Out of range should return None"
+        assert probe.hits > 0, "Block cache not used"
+        assert probe.cache_bytes == sum(b.nbytes for b in probe._cache.values()), \
+            "Cache size bookkeeping incorrect"
+        ds = None
+        print(f"  Cache hits/misses: {probe.hits}/{probe.misses}")
+        print("  [PASS] Pixel probe test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_progress_and_cancel(input_path: str, output_path: str) -> bool:
+    """测试进度回调与取消"""
+    from image_crop_tool.crop_core import crop_by_pixel, plan_row_chunks
+    from image_crop_tool.utils import CancelToken, CropCancelledError
+    
+    print("\nTesting progress callback and cancellation...")
+    
+    try:
+        # 小数据块上限 -> 多个行块，覆盖整个窗口
+        ds = gdal.Open(input_path)
+        chunks = plan_row_chunks(ds, 200, 150, chunk_bytes=200 * 16)
+        ds = None
+        assert sum(rows for _, rows in chunks) == 150, "Chunks do not cover window"
+        assert len(chunks) > 1, "Expected multiple chunks"
+        
+        events = []
+        crop_by_pixel(input_path, output_path, 100, 50, 200, 150,
+                      progress_callback=lambda done, total: events.append((done, total)))
+        assert events and events[-1][0] == events[-1][1], f"Progress incomplete: {events[-1:]}"
+        
+        token = CancelToken()
+        token.cancel()
+        try:
+            crop_by_pixel(input_path, output_path, 100, 50, 200, 150, cancel_token=token)
+            raise AssertionError("Cancelled crop did not raise")
+        except CropCancelledError:
+            pass
+        assert not os.path.exists(output_path), "Partial output not removed"
+        
+        print(f"  Progress events: {len(events)}")
+        print("  [PASS] Progress/cancel test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_lazy_import() -> bool:
+    """测试 main.py --help 不加载GDAL/NumPy"""
+    import subprocess
+    
+    print("\nTesting lazy imports for --help...")
+    
+    script = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'scripts', 'bench_import.py')
+    proc = subprocess.run([sys.executable, script, '-n', '1'],
+                          stdout=subprocess.PIPE, universal_newlines=True)
+    print("  " + proc.stdout.strip().replace("\n", "\n  "))
+    if proc.returncode == 0:
+        print("  [PASS] Lazy import test passed!")
+        return True
+    print("  [FAIL] Heavy modules loaded on --help")
+    return False
+
+
+def test_in_memory_crop(input_path: str) -> bool:
+    """测试内存裁剪 (返回字节 / NumPy 数组)"""
+    from image_crop_tool.crop_core import crop_to_bytes, crop_to_array
+    
+    print("\nTesting in-memory crop...")
+    
+    try:
+        data = crop_to_bytes(input_path, (100, 50, 200, 150))
+        assert data[:2] in (b'II', b'MM'), "Output is not a TIFF"
+        
+        arr, gt, proj = crop_to_array(input_path, (100, 50, 200, 150))
+        assert arr.shape == (3, 150, 200), f"Array shape incorrect: {arr.shape}"
+        assert abs(gt[0] - 116.1) < 1e-9 and abs(gt[3] - 39.95) < 1e-9, f"Geotransform incorrect: {gt}"
+        assert proj, "Projection missing"
+        
+        ds = gdal.Open(input_path)
+        expected = ds.GetRasterBand(1).ReadAsArray(100, 50, 200, 150)
+        ds = None
+        assert (arr[0] == expected).all(), "Array data mismatch"
+        
+        print(f"  Bytes: {len(data)}, array: {arr.shape}")
+        print("  [PASS] In-memory crop test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_crop_server(input_path: str, output_dir: str) -> bool:
+    """测试常驻裁剪服务 (HTTP 返回文件内容、写出到输出根目录)"""
+    import asyncio
+    import json
+    import threading
+    import time
+    import urllib.error
+    import urllib.request
+    from image_crop_tool.server import CropServer
+    
+    print("\nTesting crop server...")
+    
+    try:
+        port = 18765
+        server = CropServer(workers=2, output_root=output_dir)
+        threading.Thread(
+            target=lambda: asyncio.run(server.serve(port=port)), daemon=True
+        ).start()
+        time.sleep(0.5)
+        
+        job = {'input': input_path, 'bounds': [100, 50, 200, 150]}
+        for _ in range(2):  # 第二次复用已打开的数据集
+            request = urllib.request.Request(
+                f'http://127.0.0.1:{port}/crop', method='POST',
+                data=json.dumps(job).encode('utf-8')
+            )
+            data = urllib.request.urlopen(request).read()
+        
+        gdal.FileFromMemBuffer('/vsimem/test_server.tif', data)
+        ds = gdal.Open('/vsimem/test_server.tif')
+        assert (ds.RasterXSize, ds.RasterYSize) == (200, 150), "Output size incorrect"
+        ds = None
+        gdal.Unlink('/vsimem/test_server.tif')
+        
+        # 无效的 Content-Length 返回 400
+        import socket
+        with socket.create_connection(('127.0.0.1', port), timeout=5) as sock:
+            sock.sendall(b'POST /crop HTTP/1.1\r\nContent-Length: -5\r\n\r\n')
+            status_line = sock.recv(1024).split(b'\r\n', 1)[0]
+        assert status_line.startswith(b'HTTP/1.1 400'), f"Bad Content-Length not rejected: {status_line}"
+        
+        # output 相对于输出根目录；根目录之外的路径返回 403，输入不存在返回 404
+        def post(job):
+            request = urllib.request.Request(
+                f'http://127.0.0.1:{port}/crop', method='POST',
+                data=json.dumps(job).encode('utf-8')
+            )
+            try:
+                return urllib.request.urlopen(request).status
+            except urllib.error.HTTPError as e:
+                return e.code
+        
+        assert post(dict(job, output='server_out.tif')) == 200, "Output under root rejected"
+        assert os.path.isfile(os.path.join(output_dir, 'server_out.tif')), "Output not written under root"
+        outside = os.path.join(os.path.dirname(os.path.abspath(output_dir)), 'server_escape.tif')
+        for bad_output in ('../server_escape.tif', outside):
+            assert post(dict(job, output=bad_output)) == 403, f"Output outside root accepted: {bad_output}"
+        assert not os.path.exists(outside), "File written outside output root"
+        missing = dict(job, input=os.path.join(output_dir, 'missing.tif'))
+        assert post(missing) == 404, "Missing input should return 404"
+        
+        print(f"  Response bytes: {len(data)}, jobs: {server.stats['jobs']}")
+        print("  [PASS] Crop server test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_tile_server(input_path: str) -> bool:
+    """测试瓦片渲染与缓存"""
+    import io
+    from PIL import Image
+    from image_crop_tool.tile_server import TileServer
+    
+    print("\nTesting tile server...")
+    
+    try:
+        tiles = TileServer({'test': input_path})
+        source = tiles.get_source('test')
+        assert source.max_zoom == 1, f"Max zoom incorrect: {source.max_zoom}"
+        assert source.tile_count(1) == (2, 2), "Tile grid incorrect"
+        
+        data = tiles.get_tile('test', 0, 0, 0, 'png')
+        tile = Image.open(io.BytesIO(data))
+        assert tile.size == (256, 256) and tile.mode == 'RGBA', "Tile format incorrect"
+        # 影像 500x400 在第0级缩小一半，右下角超出部分透明
+        assert tile.getpixel((10, 10))[3] == 255, "Data area should be opaque"
+        assert tile.getpixel((255, 255))[3] == 0, "Outside area should be transparent"
+        
+        assert tiles.get_tile('test', 0, 0, 0, 'png') is data, "Tile should come from cache"
+        assert tiles.get_tile('test', 1, 2, 0, 'png') is None, "Out-of-range tile should be None"
+        assert tiles.get_tile('test', 1, 1, 1, 'jpg')[:2] == b'\xff\xd8', "JPEG tile incorrect"
+        
+        # 数据集归还到共享池，其他线程（连接）复用同一句柄
+        import threading
+        with tiles.pool.checkout(input_path) as first:
+            pass
+        reused = []
+        def worker():
+            with tiles.pool.checkout(input_path) as ds:
+                reused.append(ds is first)
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert reused == [True], "Dataset not reused across threads"
+        assert tiles.pool.size() == 1, f"Pool size incorrect: {tiles.pool.size()}"
+        tiles.pool.clear()
+        
+        print(f"  Zoom 0-{source.max_zoom}, tile bytes: {len(data)}")
+        print("  [PASS] Tile server test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_tiling(input_path: str, output_dir: str) -> bool:
+    """测试规则网格切片"""
+    import json
+    from image_crop_tool.tiling import tile_raster
+    
+    print("\nTesting tiling...")
+    
+    try:
+        index_path = os.path.join(output_dir, 'chips', 'index.geojson')
+        records = tile_raster(input_path, os.path.join(output_dir, 'chips'), 200,
+                              stride=150, edge='pad', index_path=index_path, workers=2)
+        assert len(records) == 9, f"Padded chip count incorrect: {len(records)}"
+        
+        # 右下角切片超出影像，填充部分为0
+        ds = gdal.Open(records[-1]['path'])
+        assert (ds.RasterXSize, ds.RasterYSize) == (200, 200), "Chip size incorrect"
+        data = ds.GetRasterBand(1).ReadAsArray()
+        gt = ds.GetGeoTransform()
+        ds = None
+        assert (data[100:, :] == 0).all() and data[:100, :].any(), "Padding incorrect"
+        assert abs(gt[0] - 116.3) < 1e-9 and abs(gt[3] - 39.7) < 1e-9, f"Geotransform incorrect: {gt}"
+        
+        with open(index_path, encoding='utf-8') as f:
+            assert len(json.load(f)['features']) == 9, "Index feature count incorrect"
+        
+        records = tile_raster(input_path, os.path.join(output_dir, 'chips_drop'), 200,
+                              stride=150, edge='drop')
+        assert len(records) == 6, f"Dropped chip count incorrect: {len(records)}"
+        
+        print("  [PASS] Tiling test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_chip_shards(input_path: str, output_dir: str) -> bool:
+    """测试切片写入 NumPy 分片"""
+    from image_crop_tool.tiling import tile_raster, load_shards, ShardWriter
+    
+    print("\nTesting NumPy chip shards...")
+    
+    try:
+        shard_dir = os.path.join(output_dir, 'shards')
+        tile_raster(input_path, shard_dir, 200, stride=150, output_format='npy', shard_size=4)
+        index, arrays = load_shards(os.path.join(shard_dir, 'test_index.json'))
+        assert [a.shape[0] for a in arrays] == [4, 4, 1], "Shard sizes incorrect"
+        assert isinstance(arrays[0], np.memmap), "npy shards should be memory-mapped"
+        
+        chip = index['chips'][4]
+        data = arrays[chip['shard']][chip['slot']]
+        ds = gdal.Open(input_path)
+        expected = ds.ReadAsArray(chip['x_off'], chip['y_off'], 200, 200)
+        ds = None
+        assert (data == expected).all(), "Chip data mismatch"
+        assert abs(chip['geotransform'][0] - 116.15) < 1e-9, "Chip geotransform incorrect"
+        arrays = None
+        
+        # 未写满的分片在 close 时截断（内存映射关闭后替换文件）
+        partial_dir = os.path.join(output_dir, 'shards_partial')
+        for fmt in ('npy', 'npz'):
+            writer = ShardWriter(partial_dir, 'partial', fmt, 4, (1, 2, 2), np.uint8)
+            writer.write(0, np.full((1, 2, 2), 1, np.uint8), (0, 1, 0, 0, 0, -1))
+            writer.write(1, np.full((1, 2, 2), 2, np.uint8), (2, 1, 0, 0, 0, -1))
+            writer.close()
+            path = writer.shard_path(0)
+            chips = np.load(path)['chips'] if fmt == 'npz' else np.load(path)
+            assert chips.shape == (2, 1, 2, 2), f"Partial {fmt} shard shape: {chips.shape}"
+            assert (chips[1] == 2).all(), f"Partial {fmt} shard data incorrect"
+        assert not [f for f in os.listdir(partial_dir) if f.endswith('.tmp')], "Temp shard left behind"
+        
+        print(f"  Shards: {len(index['shards'])}, chips: {len(index['chips'])}")
+        print("  [PASS] NumPy chip shards test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_cutline_crop(input_path: str, output_dir: str) -> bool:
+    """测试多边形裁剪 (NoData / Alpha 掩膜)"""
+    from image_crop_tool.cutline import crop_by_cutline
+    from image_crop_tool.utils import ImageCropError
+    
+    print("\nTesting cutline crop...")
+    
+    try:
+        # 左上角为直角的三角形，外接矩形为像素窗口 (100, 100, 200, 200)
+        wkt = 'POLYGON((116.1 39.9, 116.3 39.9, 116.1 39.7, 116.1 39.9))'
+        nodata_output = os.path.join(output_dir, 'crop_cutline.tif')
+        alpha_output = os.path.join(output_dir, 'crop_cutline_alpha.tif')
+        crop_by_cutline(input_path, nodata_output, wkt)
+        crop_by_cutline(input_path, alpha_output, wkt, mask_mode='alpha')
+        
+        ds = gdal.Open(nodata_output)
+        assert (ds.RasterXSize, ds.RasterYSize) == (200, 200), "Output size incorrect"
+        band = ds.GetRasterBand(1)
+        data = band.ReadAsArray()
+        assert band.GetNoDataValue() == 0, "NoData not set"
+        assert data[10, 10] == int(110 / 500 * 255), "Inside pixel incorrect"
+        assert data[190, 190] == 0, "Outside pixel should be NoData"
+        ds = None
+        
+        ds = gdal.Open(alpha_output)
+        assert ds.RasterCount == 4, "Alpha band missing"
+        alpha = ds.GetRasterBand(4).ReadAsArray()
+        ds = None
+        assert alpha[10, 10] == 255 and alpha[190, 190] == 0, "Alpha mask incorrect"
+        
+        # Byte 影像无法表示的 NoData 值、无效的矢量文件和坐标系报告为 ImageCropError
+        bad_vector = os.path.join(output_dir, 'bad_cutline.geojson')
+        with open(bad_vector, 'w') as f:
+            f.write('not a vector file')
+        for source, kwargs in [(wkt, {'nodata': -9999}), (wkt, {'nodata': 1.5}),
+                               (bad_vector, {}), (wkt, {'cutline_srs': 'EPSG:999999'})]:
+            try:
+                crop_by_cutline(input_path, os.path.join(output_dir, 'crop_cutline_bad.tif'),
+                                source, **kwargs)
+                raise AssertionError(f"Invalid cutline input accepted: {kwargs or source}")
+            except ImageCropError:
+                pass
+        
+        print("  [PASS] Cutline crop test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_trim_nodata(input_dir: str, output_dir: str) -> bool:
+    """测试收缩到有效数据范围与跳过空切片"""
+    from image_crop_tool.crop_core import crop_by_pixel
+    from image_crop_tool.tiling import tile_raster
+    
+    print("\nTesting nodata trim...")
+    
+    try:
+        # 300x200 单波段，NoData=0，有效数据位于 列80-199、行50-119
+        nodata_input = os.path.join(input_dir, 'test_nodata.tif')
+        ds = gdal.GetDriverByName('GTiff').Create(nodata_input, 300, 200, 1, gdal.GDT_Byte)
+        ds.SetGeoTransform((116.0, 0.001, 0, 40.0, 0, -0.001))
+        data = np.zeros((200, 300), dtype=np.uint8)
+        data[50:120, 80:200] = 7
+        ds.GetRasterBand(1).SetNoDataValue(0)
+        ds.GetRasterBand(1).WriteArray(data)
+        ds = None
+        
+        trim_output = os.path.join(output_dir, 'crop_trim.tif')
+        crop_by_pixel(nodata_input, trim_output, 0, 0, 300, 200, trim_nodata=True)
+        ds = gdal.Open(trim_output)
+        assert (ds.RasterXSize, ds.RasterYSize) == (120, 70), \
+            f"Trimmed size incorrect: {ds.RasterXSize}x{ds.RasterYSize}"
+        gt = ds.GetGeoTransform()
+        assert abs(gt[0] - 116.08) < 1e-9 and abs(gt[3] - 39.95) < 1e-9, f"Geotransform incorrect: {gt}"
+        assert (ds.GetRasterBand(1).ReadAsArray() == 7).all(), "Trimmed data incorrect"
+        ds = None
+        
+        records = tile_raster(nodata_input, os.path.join(output_dir, 'chips_nonempty'), 100,
+                              skip_empty=True)
+        assert len(records) == 4, f"Non-empty chip count incorrect: {len(records)}"
+        
+        print("  [PASS] Nodata trim test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_band_subset(input_path: str, output_dir: str) -> bool:
+    """测试波段选择与重排"""
+    from image_crop_tool.crop_core import crop_by_pixel
+    
+    print("\nTesting band subset...")
+    
+    try:
+        # 在副本上设置波段元数据，不影响其他测试
+        bands_input = os.path.join(output_dir, 'test_bands.tif')
+        ds = gdal.GetDriverByName('GTiff').CreateCopy(bands_input, gdal.Open(input_path))
+        ds.GetRasterBand(3).SetDescription('blue')
+        ds.GetRasterBand(3).SetNoDataValue(255)
+        ds = None
+        
+        bands_output = os.path.join(output_dir, 'crop_bands.tif')
+        crop_by_pixel(bands_input, bands_output, 100, 50, 200, 150, bands=[3, 1])
+        
+        src = gdal.Open(bands_input)
+        ds = gdal.Open(bands_output)
+        assert ds.RasterCount == 2, f"Band count incorrect: {ds.RasterCount}"
+        assert (ds.GetRasterBand(1).ReadAsArray() ==
+                src.GetRasterBand(3).ReadAsArray(100, 50, 200, 150)).all(), "Band order incorrect"
+        assert (ds.GetRasterBand(2).ReadAsArray() ==
+                src.GetRasterBand(1).ReadAsArray(100, 50, 200, 150)).all(), "Band order incorrect"
+        assert ds.GetRasterBand(1).GetDescription() == 'blue', "Band description not copied"
+        assert ds.GetRasterBand(1).GetNoDataValue() == 255, "Band nodata not copied"
+        # GTiff 的 NoData 值对所有波段共用，按源波段 1 的值核对
+        assert ds.GetRasterBand(2).GetNoDataValue() == src.GetRasterBand(1).GetNoDataValue(), \
+            "Band 2 nodata incorrect"
+        ds = None
+        src = None
+        
+        print("  [PASS] Band subset test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_dtype_conversion(output_dir: str) -> bool:
+    """测试裁剪时的数据类型转换"""
+    from image_crop_tool.crop_core import crop_by_pixel
+    from image_crop_tool.scaling import DtypeConversion
+    
+    print("\nTesting dtype conversion...")
+    
+    try:
+        # 创建16位单波段影像，左上角为NoData
+        uint16_input = os.path.join(output_dir, 'test_uint16.tif')
+        ds = gdal.GetDriverByName('GTiff').Create(uint16_input, 200, 100, 1, gdal.GDT_UInt16)
+        ds.SetGeoTransform((116.0, 0.001, 0, 40.0, 0, -0.001))
+        data = (np.arange(200, dtype=np.uint16)[np.newaxis, :] * 50 + 1000).repeat(100, axis=0)
+        data[:10, :10] = 0
+        band = ds.GetRasterBand(1)
+        band.SetNoDataValue(0)
+        band.WriteArray(data)
+        ds = None
+        
+        byte_output = os.path.join(output_dir, 'crop_byte.tif')
+        crop_by_pixel(uint16_input, byte_output, 0, 0, 200, 100,
+                      convert=DtypeConversion('Byte', scale='linear'))
+        
+        ds = gdal.Open(byte_output)
+        band = ds.GetRasterBand(1)
+        result = band.ReadAsArray()
+        assert band.DataType == gdal.GDT_Byte, f"Data type incorrect: {gdal.GetDataTypeName(band.DataType)}"
+        assert band.GetNoDataValue() == 0, f"Nodata incorrect: {band.GetNoDataValue()}"
+        assert (result[:10, :10] == 0).all(), "Nodata pixels not remapped"
+        valid = result[10:, :]
+        assert valid.min() == 1 and valid.max() == 255, f"Value range incorrect: {valid.min()}-{valid.max()}"
+        assert (np.diff(valid[0].astype(int)) >= 0).all(), "Scaling not monotonic"
+        ds = None
+        
+        print("  [PASS] Dtype conversion test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_synthetic_raster(output_dir: str) -> bool:
+    """测试合成影像生成（分块、压缩、NoData区域、并行生成）"""
+    from image_crop_tool.synthetic import generate_rasters
+    
+    print("\nTesting synthetic raster generation...")
+    
+    try:
+        regions = [(0, 0, 50, 300), (100, 250, 200, 50)]
+        jobs = [
+            dict(output_path=os.path.join(output_dir, f'synthetic_{i}.tif'), width=300, height=300,
+                 bands=2, dtype='UInt16', block_size=128, compress='DEFLATE', crs='EPSG:32650',
+                 pattern='mixed', nodata=0, nodata_regions=regions, seed=7)
+            for i in range(2)
+        ]
+        paths = generate_rasters(jobs, workers=2)
+        
+        first = gdal.Open(paths[0])
+        second = gdal.Open(paths[1])
+        band = first.GetRasterBand(1)
+        assert first.RasterCount == 2 and band.DataType == gdal.GDT_UInt16, "Bands or dtype incorrect"
+        assert band.GetBlockSize() == [128, 128], f"Block size incorrect: {band.GetBlockSize()}"
+        assert first.GetMetadataItem('COMPRESSION', 'IMAGE_STRUCTURE') == 'DEFLATE', "Not compressed"
+        assert first.GetGeoTransform()[1] == 30, "Default projected geotransform not used"
+        assert band.GetNoDataValue() == 0, "Nodata not set"
+        
+        data = band.ReadAsArray()
+        assert (data[:, :50] == 0).all() and (data[250:, 100:300] == 0).all(), "Nodata regions not filled"
+        assert (data[:250, 50:] > 0).mean() > 0.99, "Valid area unexpectedly empty"
+        assert (data == second.GetRasterBand(1).ReadAsArray()).all(), "Same seed not reproducible"
+        first = None
+        second = None
+        
+        print("  [PASS] Synthetic raster test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_crop_metrics(input_path: str, output_dir: str) -> bool:
+    """测试裁剪计时与I/O统计"""
+    from image_crop_tool.crop_core import crop_by_pixel
+    from image_crop_tool.metrics import CropMetrics
+    
+    print("\nTesting crop metrics...")
+    
+    try:
+        events = []
+        metrics = CropMetrics(callback=events.append)
+        crop_by_pixel(input_path, os.path.join(output_dir, 'crop_metrics.tif'),
+                      100, 50, 200, 150, metrics=metrics)
+        summary = metrics.finish()
+        
+        for stage in ('open', 'metadata', 'create', 'read', 'write', 'flush', 'close'):
+            assert stage in summary['stages'], f"Stage missing: {stage}"
+        counters = summary['counters']
+        # 测试影像未压缩，通过内存映射读取
+        read = counters.get('bytes_read', 0) + counters.get('bytes_mapped', 0)
+        assert read == 200 * 150 * 3, f"Bytes read incorrect: {read}"
+        assert counters['bytes_written'] == read, "bytes_written incorrect"
+        assert counters['chunks'] >= 3, "Chunk count incorrect"
+        assert counters['output_file_bytes'] > 0, "Output size not recorded"
+        reads = [e for e in events if e['stage'] == 'read']
+        assert len(reads) == counters['chunks'], "Read events missing"
+        assert sum(e['rows'] for e in reads) == 150 * 3, "Read event rows incorrect"
+        assert summary['total_seconds'] >= sum(summary['stages'].values()) * 0.99, "Total time incorrect"
+        assert 'read' in metrics.format_report(), "Report missing stages"
+        
+        print("  [PASS] Crop metrics test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_gdal_profiles(output_dir: str) -> bool:
+    """测试GDAL运行参数配置"""
+    import json
+    from image_crop_tool import gdal_profiles
+    
+    print("\nTesting GDAL profiles...")
+    
+    old_cache = gdal.GetCacheMax()
+    old_env = {k: os.environ.get(k) for k in ('IMAGE_CROP_GDAL_CONFIG', 'GDAL_NUM_THREADS')}
+    try:
+        # 调用方自行设置的选项不被切换配置清除
+        gdal.SetConfigOption('GDAL_SWATH_SIZE', '12345678')
+        gdal_profiles.apply_gdal_profile('low-memory')
+        assert gdal.GetCacheMax() == 64 * 1024 * 1024, f"Cache max incorrect: {gdal.GetCacheMax()}"
+        assert gdal.GetConfigOption('VSI_CACHE') == 'FALSE', "VSI_CACHE not applied"
+        
+        # 配置文件中的自定义配置和覆盖项；同名环境变量优先
+        config_path = os.path.join(output_dir, 'gdal_profiles.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump({'options': {'VSI_CACHE_SIZE': '1048576'},
+                       'profiles': {'custom': {'GDAL_CACHEMAX': '96', 'GDAL_NUM_THREADS': '3'}}}, f)
+        os.environ['IMAGE_CROP_GDAL_CONFIG'] = config_path
+        os.environ['GDAL_NUM_THREADS'] = '2'
+        
+        name, settings = gdal_profiles.resolve_settings('custom')
+        assert name == 'custom', "Profile name incorrect"
+        assert settings['VSI_CACHE_SIZE'] == ('1048576', 'config file'), "Config file option not applied"
+        assert settings['GDAL_NUM_THREADS'] == ('2', 'environment'), "Environment not preferred"
+        gdal_profiles.apply_gdal_profile('custom')
+        assert gdal.GetCacheMax() == 96 * 1024 * 1024, "Custom profile not applied"
+        assert gdal.GetConfigOption('VSI_CACHE') is None, "Previous profile option not cleared"
+        assert gdal.GetConfigOption('GDAL_SWATH_SIZE') == '12345678', "Caller option cleared"
+        assert 'custom' in gdal_profiles.format_config('custom'), "Config report incorrect"
+        
+        # 切换到未指定 GDAL_CACHEMAX 的配置时恢复原来的块缓存上限
+        gdal_profiles.apply_gdal_profile('default')
+        assert gdal.GetCacheMax() == old_cache, f"Cache max not restored: {gdal.GetCacheMax()}"
+        
+        try:
+            gdal_profiles.resolve_settings('no-such-profile')
+            print("  [FAIL] Unknown profile accepted")
+            return False
+        except Exception:
+            pass
+        
+        print("  [PASS] GDAL profiles test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+    
+    finally:
+        for key, value in old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        gdal_profiles.apply_gdal_profile('default')
+        gdal.SetConfigOption('GDAL_SWATH_SIZE', None)
+
+
+def test_mapped_read(input_path: str, output_dir: str) -> bool:
+    """测试未压缩影像的内存映射零拷贝读取"""
+    from image_crop_tool.image_io import map_raster
+    from image_crop_tool.crop_core import crop_to_array
+    
+    print("\nTesting memory-mapped read...")
+    
+    try:
+        ds = gdal.Open(input_path)
+        mapped = map_raster(ds)
+        assert mapped is not None, "Uncompressed GeoTIFF not mapped"
+        view = mapped.window(2, 100, 50, 200, 150)
+        assert (view == ds.GetRasterBand(2).ReadAsArray(100, 50, 200, 150)).all(), "Mapped window incorrect"
+        assert not view.flags.writeable, "Mapped window should be read-only"
+        mapped.close()
+        ds = None
+        
+        copied, gt, _ = crop_to_array(input_path, (100, 50, 200, 150))
+        viewed, gt_view, _ = crop_to_array(input_path, (100, 50, 200, 150), copy=False)
+        assert (copied == viewed).all() and gt == gt_view, "Zero-copy crop differs"
+        assert not viewed.flags.owndata, "Zero-copy crop was copied"
+        
+        # 压缩影像回退到常规读取
+        compressed = os.path.join(output_dir, 'test_compressed.tif')
+        gdal.Translate(compressed, input_path, creationOptions=['COMPRESS=DEFLATE'])
+        ds = gdal.Open(compressed)
+        assert map_raster(ds) is None, "Compressed GeoTIFF should not be mapped"
+        ds = None
+        
+        print("  [PASS] Memory-mapped read test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_dataset_lifecycle(input_path: str, output_dir: str) -> bool:
+    """测试数据集上下文管理器在块结束时写出并释放句柄"""
+    from image_crop_tool.image_io import opened_raster, created_raster
+    from image_crop_tool.server import DatasetPool
+    
+    print("\nTesting dataset lifecycle...")
+    
+    try:
+        # 创建的数据集在 with 块结束时写出，随后可直接读取和删除
+        output_path = os.path.join(output_dir, 'test_lifecycle.tif')
+        data = np.arange(64 * 48, dtype=np.uint8).reshape(48, 64)
+        with created_raster(output_path, 64, 48, 1, gdal.GDT_Byte) as ds:
+            ds.GetRasterBand(1).WriteArray(data)
+        with opened_raster(output_path) as ds:
+            assert (ds.GetRasterBand(1).ReadAsArray() == data).all(), "Data not flushed on close"
+        if hasattr(ds, 'Close'):
+            # GDAL 3.8+: 关闭后的对象不可再用
+            try:
+                ds.RasterXSize
+                still_open = True
+            except Exception:
+                still_open = False
+            assert not still_open, "Dataset still usable after close"
+        ds = None
+        os.remove(output_path)
+        
+        # 出错时同样关闭
+        try:
+            with opened_raster(input_path):
+                raise KeyError('boom')
+        except KeyError:
+            pass
+        
+        # 缓存淘汰的数据集被关闭
+        pool = DatasetPool(max_datasets=1)
+        pool.get(input_path)
+        copy_path = os.path.join(output_dir, 'test_lifecycle_copy.tif')
+        gdal.Translate(copy_path, input_path)
+        pool.get(copy_path)
+        assert pool.size() == 1, "Pool did not evict"
+        pool.clear()
+        assert pool.size() == 0, "Pool not cleared"
+        os.remove(copy_path)
+        
+        print("  [PASS] Dataset lifecycle test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_resumable_crop(input_path: str, output_dir: str) -> bool:
+    """测试断点续裁与批量清单跳过已完成任务"""
+    import json
+    from image_crop_tool.crop_core import crop_by_pixel
+    from image_crop_tool.batch import load_manifest, run_batch
+    from image_crop_tool.metrics import CropMetrics
+    from image_crop_tool.utils import CancelToken, CropCancelledError
+    
+    print("\nTesting resumable crop...")
+    
+    try:
+        reference = os.path.join(output_dir, 'test_resume_ref.tif')
+        output = os.path.join(output_dir, 'test_resume.tif')
+        journal = output + '.journal'
+        crop_by_pixel(input_path, reference, 50, 40, 300, 200)
+        
+        # 第一个行块完成后取消，保留未完成的输出和日志
+        token = CancelToken()
+        try:
+            crop_by_pixel(input_path, output, 50, 40, 300, 200, resume=True,
+                          cancel_token=token, progress_callback=lambda done, total: token.cancel())
+            raise AssertionError("Crop was not cancelled")
+        except CropCancelledError:
+            pass
+        assert os.path.exists(output) and os.path.exists(journal), "Partial output or journal removed"
+        
+        # 续裁只写剩余行块，结果与一次裁完相同
+        metrics = CropMetrics()
+        crop_by_pixel(input_path, output, 50, 40, 300, 200, resume=True, metrics=metrics)
+        assert metrics.counters.get('chunks_skipped') == 1, "Completed chunk not skipped"
+        assert not os.path.exists(journal), "Journal not removed after completion"
+        ref_ds, out_ds = gdal.Open(reference), gdal.Open(output)
+        assert (ref_ds.ReadAsArray() == out_ds.ReadAsArray()).all(), "Resumed output differs"
+        ref_ds = out_ds = None
+        
+        # 批量清单: 已完成的任务跳过
+        manifest = os.path.join(output_dir, 'test_manifest.jsonl')
+        second = os.path.join(output_dir, 'test_resume_2.tif')
+        if os.path.exists(second):
+            os.remove(second)
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'input': input_path, 'output': output, 'bounds': [50, 40, 300, 200]}) + '\n')
+            f.write(json.dumps({'input': input_path, 'output': second, 'bounds': [0, 0, 64, 64]}) + '\n')
+        summary = run_batch(load_manifest(manifest))
+        assert summary == {'done': 1, 'skipped': 1, 'failed': 0}, f"Unexpected batch summary: {summary}"
+        assert run_batch(load_manifest(manifest))['skipped'] == 2, "Completed jobs not skipped"
+        
+        # 统计记录: 失败的任务同样写出一行，附错误信息
+        metrics_path = os.path.join(output_dir, 'test_batch_metrics.jsonl')
+        if os.path.exists(metrics_path):
+            os.remove(metrics_path)
+        failing = [{'input': os.path.join(output_dir, 'missing.tif'),
+                    'output': os.path.join(output_dir, 'test_missing.tif'), 'bounds': [0, 0, 10, 10]}]
+        assert run_batch(failing, metrics_path=metrics_path)['failed'] == 1, "Missing input not failed"
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 1 and records[0]['success'] is False and records[0]['error'], \
+            f"Failure not recorded: {records}"
+        
+        print("  [PASS] Resumable crop test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_crop_plan(input_path: str, output_dir: str) -> bool:
+    """测试裁剪计划估算（不读取像素、不写出文件）"""
+    from image_crop_tool import image_io
+    from image_crop_tool.planning import plan_crop
+    from image_crop_tool.crop_core import resolve_pixel_window
+    
+    print("\nTesting crop plan...")
+    
+    try:
+        # 只根据布局元数据判断能否内存映射，不映射文件
+        mapped_class = image_io.MappedRaster
+        image_io.MappedRaster = None
+        try:
+            plan = plan_crop(input_path, (100, 50, 200, 150), 'pixel')
+        finally:
+            image_io.MappedRaster = mapped_class
+        assert plan.window == (100, 50, 200, 150), "Plan window incorrect"
+        assert plan.mapped, "Uncompressed test image should be mapped"
+        assert plan.output_raw_bytes == 200 * 150 * 3, "Output size incorrect"
+        
+        # 地理坐标经 geo_bounds_to_pixel_bounds 转换，与实际裁剪的窗口一致
+        bounds = (116.1, 39.8, 116.3, 39.95)
+        geo = plan_crop(input_path, bounds, 'geo', bands=[3, 1])
+        ds = gdal.Open(input_path)
+        expected = resolve_pixel_window(ds, bounds, 'geo')
+        ds = None
+        assert geo.window == expected, f"Geo plan window incorrect: {geo.window}"
+        assert geo.bands == [3, 1], "Plan bands incorrect"
+        
+        # 分块压缩影像: 只统计窗口涉及的数据块
+        tiled = os.path.join(output_dir, 'test_plan_tiled.tif')
+        gdal.Translate(tiled, input_path, creationOptions=['TILED=YES', 'BLOCKXSIZE=128',
+                                                           'BLOCKYSIZE=128', 'COMPRESS=DEFLATE'])
+        plan = plan_crop(tiled, (100, 50, 200, 150), 'pixel')
+        assert not plan.mapped and plan.source_compression == 'DEFLATE', "Compression not detected"
+        assert plan.block_range == (0, 0, 3, 2), f"Block range incorrect: {plan.block_range}"
+        assert plan.blocks_touched == 6, f"Blocks touched incorrect: {plan.blocks_touched}"
+        assert plan.decode_bytes == 6 * 128 * 128 * 3, "Decode bytes incorrect"
+        assert 0 < plan.output_bytes <= plan.output_raw_bytes, "Output estimate out of range"
+        
+        print("  [PASS] Crop plan test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_archive_input(input_path: str, output_dir: str) -> bool:
+    """测试直接从 zip / tar.gz / gz 压缩包裁剪"""
+    import gzip
+    import shutil
+    import tarfile
+    import zipfile
+    from image_crop_tool.crop_core import crop_to_array
+    from image_crop_tool.vsi import resolve_input_path
+    from image_crop_tool.utils import ImageCropError
+    
+    print("\nTesting archive input...")
+    
+    try:
+        expected, _, _ = crop_to_array(input_path, (100, 50, 200, 150))
+        
+        # zip 中只有一个影像: 直接打开
+        zip_path = os.path.join(output_dir, 'test_archive.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.write(input_path, 'scene/test.tif')
+            zf.writestr('scene/README.txt', 'metadata')
+        data, _, _ = crop_to_array(zip_path, (100, 50, 200, 150))
+        assert (data == expected).all(), "Zip crop incorrect"
+        
+        # tar.gz 中有多个影像: 需要指定成员（支持通配符）
+        tar_path = os.path.join(output_dir, 'test_archive.tar.gz')
+        with tarfile.open(tar_path, 'w:gz') as tf:
+            tf.add(input_path, 'bundle/scene_B1.tif')
+            tf.add(input_path, 'bundle/scene_B2.tif')
+        try:
+            resolve_input_path(tar_path)
+            raise AssertionError("Ambiguous archive accepted")
+        except ImageCropError:
+            pass
+        member_path = resolve_input_path(tar_path, '*_B2.tif')
+        assert member_path.startswith('/vsitar/') and member_path.endswith('bundle/scene_B2.tif'), \
+            f"Member path incorrect: {member_path}"
+        data, _, _ = crop_to_array(member_path, (100, 50, 200, 150))
+        assert (data == expected).all(), "Tar.gz crop incorrect"
+        
+        # 单文件 gzip
+        gz_path = os.path.join(output_dir, 'test_archive.tif.gz')
+        with open(input_path, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        data, _, _ = crop_to_array(gz_path, (100, 50, 200, 150))
+        assert (data == expected).all(), "Gzip crop incorrect"
+        
+        print("  [PASS] Archive input test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+
+
+def test_http_input(input_path: str, output_dir: str) -> bool:
+    """测试从支持 Range 请求的HTTP服务器裁剪（统计请求数）"""
+    import re
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from image_crop_tool.crop_core import crop_by_pixel
+    import zipfile
+    from image_crop_tool.image_io import open_raster, opened_raster
+    from image_crop_tool.metrics import CropMetrics
+    from image_crop_tool.vsi import resolve_input_path, NETWORK_READ_OPTIONS
+    
+    print("\nTesting HTTP range-request input...")
+    
+    served = os.path.join(output_dir, 'http_root')
+    os.makedirs(served, exist_ok=True)
+    cog_path = os.path.join(served, 'remote.tif')
+    gdal.Translate(cog_path, input_path, creationOptions=[
+        'TILED=YES', 'BLOCKXSIZE=64', 'BLOCKYSIZE=64', 'COMPRESS=DEFLATE'])
+    with zipfile.ZipFile(os.path.join(served, 'remote.zip'), 'w', zipfile.ZIP_STORED) as zf:
+        zf.write(cog_path, 'scene/remote.tif')
+    
+    stats = {'requests': 0, 'connections': 0}
+    
+    class RangeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def setup(self):
+            super().setup()
+            stats['connections'] += 1
+        
+        def log_message(self, *args):
+            pass
+        
+        def do_HEAD(self):
+            self._serve(False)
+        
+        def do_GET(self):
+            self._serve(True)
+        
+        def _serve(self, body):
+            stats['requests'] += 1
+            path = os.path.join(served, os.path.basename(self.path.split('?')[0]))
+            if not os.path.isfile(path):
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            size = os.path.getsize(path)
+            start, end = 0, size - 1
+            match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2) or end), end)
+            self.send_response(206 if match else 200)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Length', str(end - start + 1))
+            if match:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            self.end_headers()
+            if body:
+                with open(path, 'rb') as f:
+                    f.seek(start)
+                    self.wfile.write(f.read(end - start + 1))
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/remote.tif"
+        assert resolve_input_path(url) == '/vsicurl/' + url, "URL not mapped to /vsicurl/"
+        
+        # 窗口涉及 4x3 个 64x64 数据块
+        output_path = os.path.join(output_dir, 'test_http.tif')
+        metrics = CropMetrics()
+        crop_by_pixel(url, output_path, 100, 50, 200, 100, metrics=metrics)
+        assert 'prefetch' in metrics.stages, "Blocks not prefetched"
+        
+        ds = gdal.Open(output_path)
+        src = gdal.Open(input_path)
+        assert (ds.ReadAsArray() == src.ReadAsArray(100, 50, 200, 100)).all(), "HTTP crop incorrect"
+        ds = src = None
+        
+        # 相邻数据块合并请求: 请求数少于数据块数
+        assert stats['requests'] < 12, f"Too many requests: {stats['requests']}"
+        
+        # 文件头已缓存: 再次打开不发出请求
+        before = stats['requests']
+        with opened_raster(url) as reopened:
+            assert reopened.RasterXSize == 500
+        assert stats['requests'] == before, "Header fetched again on reopen"
+        
+        # URL 上的压缩包: open_raster 和 crop_by_pixel 直接打开其中唯一的影像
+        zip_url = f"http://127.0.0.1:{server.server_address[1]}/remote.zip"
+        ds = open_raster(zip_url)
+        assert ds.GetDescription() == f"/vsizip//vsicurl/{zip_url}/scene/remote.tif", \
+            f"Zip URL resolved incorrectly: {ds.GetDescription()}"
+        ds = None
+        zip_output = os.path.join(output_dir, 'test_http_zip.tif')
+        crop_by_pixel(zip_url, zip_output, 100, 50, 200, 100)
+        ds = gdal.Open(zip_output)
+        src = gdal.Open(input_path)
+        assert (ds.ReadAsArray() == src.ReadAsArray(100, 50, 200, 100)).all(), "Zip URL crop incorrect"
+        ds = src = None
+        for key, value in NETWORK_READ_OPTIONS.items():
+            assert gdal.GetConfigOption(key) == value, f"{key} not applied"
+        
+        print(f"  Requests: {stats['requests']}, connections: {stats['connections']}")
+        print("  [PASS] HTTP input test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"  [FAIL] Test failed: {e}")
+        return False
+    
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
 def main():
     """主测试流程"""
     print("=" * 50)
@@ -142,6 +1124,7 @@ def main():
     test_input = os.path.join(input_dir, 'test.tif')
     pixel_output = os.path.join(output_dir, 'crop_pixel.tif')
     geo_output = os.path.join(output_dir, 'crop_geo.tif')
+    cancel_output = os.path.join(output_dir, 'crop_cancel.tif')
     
     # 创建测试影像
     print("\nCreating test image...")
@@ -151,6 +1134,27 @@ def main():
     results = []
     results.append(test_pixel_crop(test_input, pixel_output))
     results.append(test_geo_crop(test_input, geo_output))
+    results.append(test_pixel_probe(test_input))
+    results.append(test_progress_and_cancel(test_input, cancel_output))
+    results.append(test_lazy_import())
+    results.append(test_crop_server(test_input, output_dir))
+    results.append(test_in_memory_crop(test_input))
+    results.append(test_tile_server(test_input))
+    results.append(test_tiling(test_input, output_dir))
+    results.append(test_chip_shards(test_input, output_dir))
+    results.append(test_cutline_crop(test_input, output_dir))
+    results.append(test_trim_nodata(input_dir, output_dir))
+    results.append(test_band_subset(test_input, output_dir))
+    results.append(test_dtype_conversion(output_dir))
+    results.append(test_synthetic_raster(output_dir))
+    results.append(test_crop_metrics(test_input, output_dir))
+    results.append(test_gdal_profiles(output_dir))
+    results.append(test_mapped_read(test_input, output_dir))
+    results.append(test_dataset_lifecycle(test_input, output_dir))
+    results.append(test_resumable_crop(test_input, output_dir))
+    results.append(test_crop_plan(test_input, output_dir))
+    results.append(test_archive_input(test_input, output_dir))
+    results.append(test_http_input(test_input, output_dir))
     
     # 总结
     print("\n" + "=" * 50)
@@ -158,6 +1162,27 @@ def main():
     print("=" * 50)
     print(f"Pixel crop: {'PASS' if results[0] else 'FAIL'}")
     print(f"Geo crop:   {'PASS' if results[1] else 'FAIL'}")
+    print(f"Pixel probe: {'PASS' if results[2] else 'FAIL'}")
+    print(f"Progress/cancel: {'PASS' if results[3] else 'FAIL'}")
+    print(f"Lazy import: {'PASS' if results[4] else 'FAIL'}")
+    print(f"Crop server: {'PASS' if results[5] else 'FAIL'}")
+    print(f"In-memory crop: {'PASS' if results[6] else 'FAIL'}")
+    print(f"Tile server: {'PASS' if results[7] else 'FAIL'}")
+    print(f"Tiling: {'PASS' if results[8] else 'FAIL'}")
+    print(f"Chip shards: {'PASS' if results[9] else 'FAIL'}")
+    print(f"Cutline crop: {'PASS' if results[10] else 'FAIL'}")
+    print(f"Nodata trim: {'PASS' if results[11] else 'FAIL'}")
+    print(f"Band subset: {'PASS' if results[12] else 'FAIL'}")
+    print(f"Dtype conversion: {'PASS' if results[13] else 'FAIL'}")
+    print(f"Synthetic raster: {'PASS' if results[14] else 'FAIL'}")
+    print(f"Crop metrics: {'PASS' if results[15] else 'FAIL'}")
+    print(f"GDAL profiles: {'PASS' if results[16] else 'FAIL'}")
+    print(f"Mapped read: {'PASS' if results[17] else 'FAIL'}")
+    print(f"Dataset lifecycle: {'PASS' if results[18] else 'FAIL'}")
+    print(f"Resumable crop: {'PASS' if results[19] else 'FAIL'}")
+    print(f"Crop plan: {'PASS' if results[20] else 'FAIL'}")
+    print(f"Archive input: {'PASS' if results[21] else 'FAIL'}")
+    print(f"HTTP input: {'PASS' if results[22] else 'FAIL'}")
     
     if all(results):
         print("\nAll tests passed!")